@@ -1,7 +1,7 @@
 // Dashboard State
 let dashboardData = {
     trades: [],
-    signals: [],
+    signalSeries: null,
     wallet: null,
     tasks: [],
     dailyReports: [],
@@ -41,28 +41,144 @@ function switchTab(tabName) {
     if (tabName === 'signals' && signalChart) signalChart.resize();
 }
 
+// ─── Data Manifest ───
+// data/manifest.json (written by update_data.py) lists a sha256 per data file.
+// Files are requested as data/<name>?v=<hash>, so an unchanged file is served
+// from the browser cache and files already in memory are not fetched at all.
+const MANIFEST_TTL_MS = 30 * 1000;
+let dataManifest = null;
+let manifestFetchedAt = 0;
+const dataFileCache = {};  // name -> {hash, data}
+
+async function refreshManifest(force = false) {
+    if (!force && dataManifest && Date.now() - manifestFetchedAt < MANIFEST_TTL_MS) return dataManifest;
+    try {
+        const r = await fetch('./data/manifest.json', {cache: 'no-cache'});
+        if (!r.ok) throw new Error(`HTTP ${r.status}`);
+        dataManifest = await r.json();
+        manifestFetchedAt = Date.now();
+    } catch (e) {
+        console.warn('manifest load failed:', e);
+        dataManifest = null;
+    }
+    return dataManifest;
+}
+
+function dataFileHash(name) {
+    return dataManifest?.files?.[name]?.sha256?.slice(0, 16) || null;
+}
+
+async function fetchDataFile(name) {
+    await refreshManifest();
+    const hash = dataFileHash(name);
+    const cached = dataFileCache[name];
+    if (hash && cached && cached.hash === hash) return cached.data;
+
+    // Files not in the manifest (e.g. hand-maintained note.json) fall back to cache-busting
+    const url = `./data/${name}?` + (hash ? `v=${hash}` : `t=${Date.now()}`);
+    const r = await fetch(url);
+    if (!r.ok) throw new Error(`HTTP ${r.status}`);
+    const json = await r.json();
+    const data = json?.format === 'columnar' ? decodeColumnar(json) : json;
+    if (hash) dataFileCache[name] = {hash, data};
+    return data;
+}
+
+// Document bodies (update_data.py write_doc_body): reports, memories and essays list only
+// title/preview/size/hash, and the text is fetched from docs/<kind>/<hash>.md when opened.
+// The file name is the content hash, so a body is fetched at most once per page load
+const docBodyCache = {};
+
+function fetchDocBody(kind, item) {
+    if (typeof item?.content === 'string') return Promise.resolve(item.content);
+    if (!item?.hash) return Promise.resolve('');
+    const key = `${kind}/${item.hash}`;
+    if (!docBodyCache[key]) {
+        docBodyCache[key] = fetch(`./data/docs/${key}.md?v=${item.hash}`).then(r => {
+            if (!r.ok) throw new Error(`HTTP ${r.status}`);
+            return r.text();
+        }).catch(e => {
+            delete docBodyCache[key];
+            throw e;
+        });
+    }
+    return docBodyCache[key];
+}
+
+async function renderDocBody(el, kind, item, render = simpleMarkdown) {
+    if (el.dataset.loaded === item?.hash) return true;
+    el.innerHTML = '<div class="loading">読み込み中...</div>';
+    try {
+        const text = await fetchDocBody(kind, item);
+        if (!el.isConnected) return false;
+        el.innerHTML = render(text);
+        el.dataset.loaded = item?.hash || '';
+        return true;
+    } catch (e) {
+        el.innerHTML = `<div class="loading">読み込み失敗（再読み込みしてください）: ${esc(e.message)}</div>`;
+        return false;
+    }
+}
+
+// Columnar payloads (update_data.py encode_columnar, written with UPDATE_COLUMNAR=1):
+// one key list, per-column arrays, constant columns stored once, low-cardinality
+// strings as dictionary indexes, booleans as 0/1, and row numbers of absent keys per column
+function decodeColumnar(p) {
+    // Per-column getter and absent-row mask, then fill row by row so every row
+    // object gets its keys in the same order (one hidden class in V8)
+    const cols = p.columns.map(key => {
+        let absent = null;
+        if (p.missing?.[key]) {
+            absent = new Uint8Array(p.count);
+            for (const i of p.missing[key]) absent[i] = 1;
+        }
+        const col = p.data[key];
+        let get;
+        if (key in p.const) {
+            const v = p.const[key];
+            get = typeof v === 'object' && v !== null ? () => structuredClone(v) : () => v;
+        } else if (p.dicts[key]) {
+            const dict = p.dicts[key];
+            get = i => dict[col[i]];
+        } else if (p.bools?.includes(key)) {
+            get = i => col[i] === null ? null : col[i] === 1;
+        } else {
+            get = i => col[i];
+        }
+        return {key, absent, get};
+    });
+    const rows = new Array(p.count);
+    for (let i = 0; i < p.count; i++) {
+        const row = {};
+        for (const c of cols) {
+            if (c.absent === null || !c.absent[i]) row[c.key] = c.get(i);
+        }
+        rows[i] = row;
+    }
+    return rows;
+}
+
 // ─── Data Loading ───
 async function loadAllData() {
     updateStatusIndicator('loading', 'データ読み込み中...');
     let errors = 0;
 
     const loaders = [
-        ['wallet', './data/wallet.json'],
-        ['trades', './data/trades.json'],
-        ['signals', './data/signals.json'],
-        ['tasks', './data/tasks.json'],
-        ['dailyReports', './data/daily_reports.json'],
-        ['strategies', './data/strategies.json'],
-        ['portfolioHistory', './data/portfolio_history.json'],
-        ['note', './data/note.json'],
+        ['wallet', 'wallet.json'],
+        ['trades', 'trades_recent.json'],
+        ['tradesIndex', 'trades_index.json'],
+        ['signalSeries', 'signal_series.json'],
+        ['tasks', 'tasks.json'],
+        ['dailyReports', 'daily_reports.json'],
+        ['strategies', 'strategies.json'],
+        ['portfolioHistory', 'history/portfolio_raw.json'],
+        ['note', 'note.json'],
     ];
 
-    const bust = '?t=' + Date.now();
-    await Promise.all(loaders.map(async ([key, url]) => {
+    await refreshManifest(true);
+    await Promise.all(loaders.map(async ([key, name]) => {
         try {
-            const r = await fetch(url + bust);
-            if (!r.ok) throw new Error(`HTTP ${r.status}`);
-            dashboardData[key] = await r.json();
+            dashboardData[key] = await fetchDataFile(name);
         } catch (e) {
             console.warn(`${key} load failed:`, e);
             errors++;
@@ -70,10 +186,13 @@ async function loadAllData() {
             else if (key === 'wallet') dashboardData[key] = null;
             else if (key === 'dailyReports') dashboardData[key] = [];
             else if (key === 'portfolioHistory') dashboardData[key] = {portfolio_history:[], price_history:[]};
-            else if (key === 'note') dashboardData[key] = null;
+            else if (key === 'note' || key === 'tradesIndex' || key === 'signalSeries') dashboardData[key] = null;
             else dashboardData[key] = [];
         }
     }));
+    dashboardData.recentTrades = dashboardData.trades;
+    const recentOpt = document.querySelector('#trade-period-filter option[value="recent"]');
+    if (recentOpt && dashboardData.tradesIndex) recentOpt.textContent = `直近${dashboardData.tradesIndex.recent_days}日`;
 
     // Update each section independently
     const sections = [
@@ -202,9 +321,50 @@ function buildPortfolioPieChart(w) {
     });
 }
 
-function buildPortfolioHistoryChart() {
-    const histData = dashboardData.portfolioHistory?.portfolio_history || [];
-    if (histData.length < 2) return;
+// Portfolio history is precomputed in resolution tiers (history/portfolio_<tier>.json, see
+// update_data.py HISTORY_TIERS); only the tier for the selected range is fetched.
+// The raw tier (last 24h) is loaded up front for the daily change.
+// Prices come from the matching history/prices_<tier>.json (raw records or OHLC buckets).
+const HISTORY_RANGE_TIERS = {'24h': 'raw', '7d': '5m', '90d': '1h', 'all': '1d'};
+const HISTORY_PRICE_ASSET = 'SOL';
+let historyChartSeq = 0;
+
+// Price of asset at each history point: the last price record (raw tier) or the close of
+// the OHLC bucket (other tiers) starting at or before the point, null before the first one
+function alignHistoryPrices(histData, priceHistory, asset) {
+    const prices = [];
+    for (const r of priceHistory) {
+        const t = Date.parse(r.timestamp);
+        const v = Array.isArray(r[asset]) ? r[asset][3] : r.prices?.[asset];
+        if (!isNaN(t) && typeof v === 'number') prices.push([t, v]);
+    }
+    let j = -1;
+    return histData.map(h => {
+        const t = Date.parse(h.timestamp);
+        while (j + 1 < prices.length && prices[j + 1][0] <= t) j++;
+        return j >= 0 ? prices[j][1] : null;
+    });
+}
+
+async function buildPortfolioHistoryChart() {
+    const seq = ++historyChartSeq;
+    const range = document.getElementById('history-range-filter')?.value || '7d';
+    const tier = HISTORY_RANGE_TIERS[range] || '5m';
+    const pricesPromise = fetchDataFile(`history/prices_${tier}.json`).catch(e => {
+        console.warn('price history load failed:', e);
+        return null;
+    });
+    let histData;
+    try {
+        histData = tier === 'raw'
+            ? dashboardData.portfolioHistory?.portfolio_history || []
+            : (await fetchDataFile(`history/portfolio_${tier}.json`)).portfolio_history || [];
+    } catch (e) {
+        console.warn('portfolio history load failed:', e);
+        return;
+    }
+    const priceHistory = (await pricesPromise)?.price_history || [];
+    if (seq !== historyChartSeq || histData.length < 2) return;
 
     const ctx = document.getElementById('portfolioHistoryChart')?.getContext('2d');
     if (!ctx) return;
@@ -213,6 +373,8 @@ function buildPortfolioHistoryChart() {
     const labels = histData.map(h => fmtTime(h.timestamp));
     const totals = histData.map(h => h.total_usd);
     const usdcData = histData.map(h => h.usdc || 0);
+    const priceData = alignHistoryPrices(histData, priceHistory, HISTORY_PRICE_ASSET);
+    const hasPrices = priceData.some(v => v !== null);
 
     portfolioHistoryChart = new Chart(ctx, {
         type: 'line',
@@ -237,6 +399,16 @@ function buildPortfolioHistoryChart() {
                     tension: 0.3,
                     pointRadius: 0,
                 },
+                ...(hasPrices ? [{
+                    label: `${HISTORY_PRICE_ASSET}価格 (USD)`,
+                    data: priceData,
+                    borderColor: '#9945ff',
+                    fill: false,
+                    tension: 0.3,
+                    pointRadius: 0,
+                    spanGaps: true,
+                    yAxisID: 'price',
+                }] : []),
             ],
         },
         options: {
@@ -253,12 +425,27 @@ function buildPortfolioHistoryChart() {
             scales: {
                 x: { ticks: { color: '#888', maxTicksLimit: 10 }, grid: { color: '#333' } },
                 y: { ticks: { color: '#4488ff', callback: v => '$' + v }, grid: { color: '#333' } },
+                ...(hasPrices ? {
+                    price: { position: 'right', ticks: { color: '#9945ff', callback: v => '$' + v }, grid: { drawOnChartArea: false } },
+                } : {}),
             },
         },
     });
 }
 
 function updatePnLSummary() {
+    // All-time totals are precomputed in trades_index.json (only recent trades are loaded up front)
+    const totals = dashboardData.tradesIndex?.totals;
+    if (totals) {
+        const solPrice = dashboardData.wallet?.sol_price_usd || 0;
+        const winRate = totals.sells > 0 ? Math.round((totals.wins / totals.sells) * 100) : 0;
+        document.getElementById('total-trades').textContent = totals.total_trades;
+        document.getElementById('successful-trades').textContent = totals.sells > 0 ? `${totals.wins}/${totals.sells}` : totals.total_trades;
+        document.getElementById('success-rate').textContent = totals.sells > 0 ? `${winRate}%` : '--';
+        document.getElementById('total-fees').textContent = fmtCurrency(totals.total_fee_sol * solPrice);
+        return;
+    }
+
     const trades = dashboardData.trades.filter(t => !isTestTrade(t));
     const total = trades.length;
     const totalFees = trades.reduce((s, t) => s + (parseFloat(t.fee_sol) || parseFloat(t.fee_lamports || 0) / 1e9 || 0), 0);
@@ -457,7 +644,63 @@ function resetTaskFilters() {
 }
 
 // ─── Trade Filtering ───
-let tradeFilters = { strategy: '', symbol: '', direction: '', hideTest: true };
+let tradeFilters = { strategy: '', symbol: '', direction: '', hideTest: true, period: 'recent' };
+
+// ─── Trade Shards ───
+// trades_recent.json holds the last N days; older trades live in monthly shards
+// (data/trades/trades_YYYY-MM.json) listed in trades_index.json. The trade table
+// fetches shards only when the period filter reaches back past the recent window.
+// FIFO matching (open positions, round trips, cumulative P&L) needs the buys that
+// precede the window, so it runs on every shard (allTrades), loaded after startup.
+const tradeShardCache = {};  // month -> trades
+let loadedTradePeriod = 'recent';
+let allTrades = null;
+let allTradesPromise = null;
+
+async function loadTradeShards(shards) {
+    await Promise.all(shards.filter(sh => !tradeShardCache[sh.month]).map(async sh => {
+        tradeShardCache[sh.month] = await fetchDataFile(sh.file);
+    }));
+    return shards.flatMap(sh => tradeShardCache[sh.month]);
+}
+
+function ensureAllTradesLoaded() {
+    if (!allTradesPromise) {
+        const index = dashboardData.tradesIndex;
+        allTradesPromise = (index ? loadTradeShards(index.shards) : Promise.resolve(dashboardData.recentTrades || []))
+            .then(trades => { allTrades = trades; return trades; })
+            .catch(e => { allTradesPromise = null; throw e; });
+    }
+    return allTradesPromise;
+}
+
+function tradePeriodStart(period) {
+    if (period === 'all') return null;
+    if (period === 'recent') return dashboardData.tradesIndex?.recent_from ?? null;
+    const days = parseInt(period, 10);
+    return new Date(Date.now() - days * 86400000).toISOString().split('T')[0];
+}
+
+async function ensureTradesLoaded(period) {
+    const index = dashboardData.tradesIndex;
+    if (!index || period === loadedTradePeriod) return;
+    const from = tradePeriodStart(period);
+    if (period === 'recent' || (from !== null && from >= index.recent_from)) {
+        dashboardData.trades = dashboardData.recentTrades;
+        loadedTradePeriod = period;
+        return;
+    }
+    const shards = index.shards.filter(sh => from === null || sh.month >= from.slice(0, 7));
+    updateStatusIndicator('loading', `トレード履歴読み込み中 (${shards.length}ヶ月)...`);
+    try {
+        dashboardData.trades = await loadTradeShards(shards);
+        loadedTradePeriod = period;
+        updateStatusIndicator('online', '接続中');
+    } catch (e) {
+        console.warn('trade shard load failed:', e);
+        updateStatusIndicator('online', '接続中 (トレード履歴の読み込みに失敗)');
+    }
+}
 
 function filterTradesByStrategy(strategy, symbol) {
     tradeFilters.strategy = strategy || '';
@@ -471,25 +714,36 @@ function filterTradesByStrategy(strategy, symbol) {
     if (symf) symf.value = symbol || '';
 }
 
-function resetTradeFilters() {
-    tradeFilters = { strategy: '', symbol: '', direction: '', hideTest: true };
+async function resetTradeFilters() {
+    tradeFilters = { strategy: '', symbol: '', direction: '', hideTest: true, period: 'recent' };
     document.getElementById('trade-strategy-filter').value = '';
     document.getElementById('trade-symbol-filter').value = '';
     document.getElementById('trade-direction-filter').value = '';
+    document.getElementById('trade-period-filter').value = 'recent';
     document.getElementById('trade-hide-test').checked = true;
+    await ensureTradesLoaded(tradeFilters.period);
     updateTradesSection();
 }
 
-function applyTradeFilters() {
+async function applyTradeFilters() {
     tradeFilters.strategy = document.getElementById('trade-strategy-filter')?.value || '';
     tradeFilters.symbol = document.getElementById('trade-symbol-filter')?.value || '';
     tradeFilters.direction = document.getElementById('trade-direction-filter')?.value || '';
+    tradeFilters.period = document.getElementById('trade-period-filter')?.value || 'recent';
     tradeFilters.hideTest = document.getElementById('trade-hide-test')?.checked ?? true;
+    await ensureTradesLoaded(tradeFilters.period);
     updateTradesSection();
 }
 
 function getFilteredTrades() {
     let trades = dashboardData.trades || [];
+    const from = tradeFilters.period === 'recent' ? null : tradePeriodStart(tradeFilters.period);
+    if (from) trades = trades.filter(t => (t.timestamp || '').slice(0, 10) >= from);
+    return filterTradesExceptPeriod(trades);
+}
+
+// Strategy/symbol/direction/test filters, without the period (see allTrades)
+function filterTradesExceptPeriod(trades) {
     if (tradeFilters.hideTest) trades = trades.filter(t => !isTestTrade(t));
     if (tradeFilters.strategy) trades = trades.filter(t => (t.strategy || '').toUpperCase() === tradeFilters.strategy.toUpperCase());
     if (tradeFilters.symbol) {
@@ -509,6 +763,23 @@ function updateTradesSection() {
     const wallet = dashboardData.wallet;
     if (!wallet) return;
 
+    // Full trade table with USD amounts for the selected period
+    updateTradeTable(trades, wallet);
+
+    const openContainer = document.getElementById('open-positions-container');
+    const completedContainer = document.getElementById('completed-trades-container');
+    if (!allTrades) {
+        openContainer.innerHTML = completedContainer.innerHTML = '<div class="loading">トレード履歴読み込み中...</div>';
+        const pnlEl = document.getElementById('cumulative-pnl');
+        if (pnlEl) pnlEl.textContent = '';
+        ensureAllTradesLoaded().then(updateTradesSection).catch(e => {
+            console.warn('trade history load failed:', e);
+            openContainer.innerHTML = completedContainer.innerHTML = '<div class="no-position">トレード履歴の読み込みに失敗しました</div>';
+        });
+        return;
+    }
+    const history = filterTradesExceptPeriod(allTrades);
+
     // Helper to get amounts from either old or new field names
     const getInputAmt = t => t.actual_input_amount || t.input_amount || t.order_input_amount || 0;
     const getOutputAmt = t => t.actual_output_amount || t.output_amount || t.order_output_amount || 0;
@@ -520,8 +791,8 @@ function updateTradesSection() {
     const openPositions = [];
     if (wallet.wbtc_value_usd > DUST_THRESHOLD_USD) {
         // Find the LAST buy trade for WBTC that doesn't have a matching sell after it
-        const wbtcBuys = trades.filter(t => t.output_token === 'WBTC' && t.status === 'Success');
-        const wbtcSells = trades.filter(t => t.input_token === 'WBTC' && t.status === 'Success');
+        const wbtcBuys = history.filter(t => t.output_token === 'WBTC' && t.status === 'Success');
+        const wbtcSells = history.filter(t => t.input_token === 'WBTC' && t.status === 'Success');
         const lastSellTime = wbtcSells.length > 0 ? new Date(wbtcSells[wbtcSells.length-1].timestamp) : new Date(0);
         const activeBuy = wbtcBuys.filter(t => new Date(t.timestamp) > lastSellTime).slice(-1)[0];
         if (activeBuy) {
@@ -537,8 +808,8 @@ function updateTradesSection() {
         }
     }
     if (wallet.bnb_value_usd > DUST_THRESHOLD_USD) {
-        const bnbBuys = trades.filter(t => t.output_token === 'BNB' && t.status === 'Success');
-        const bnbSells = trades.filter(t => t.input_token === 'BNB' && t.status === 'Success');
+        const bnbBuys = history.filter(t => t.output_token === 'BNB' && t.status === 'Success');
+        const bnbSells = history.filter(t => t.input_token === 'BNB' && t.status === 'Success');
         const lastSellTime = bnbSells.length > 0 ? new Date(bnbSells[bnbSells.length-1].timestamp) : new Date(0);
         const activeBuy = bnbBuys.filter(t => new Date(t.timestamp) > lastSellTime).slice(-1)[0];
         if (activeBuy) {
@@ -556,8 +827,8 @@ function updateTradesSection() {
     // SOL position (from Grid Bot) — use tracked position amount, not total wallet balance
     // Gas SOL (~0.04-0.05) must be excluded from position display
     if (wallet.sol_value_usd > 1.0) {
-        const solBuys = trades.filter(t => t.output_token === 'SOL' && t.status === 'Success' && t.strategy !== 'TEST' && t.strategy !== 'PIPELINE_TEST');
-        const solSells = trades.filter(t => t.input_token === 'SOL' && t.status === 'Success' && t.strategy !== 'TEST' && t.strategy !== 'PIPELINE_TEST');
+        const solBuys = history.filter(t => t.output_token === 'SOL' && t.status === 'Success' && t.strategy !== 'TEST' && t.strategy !== 'PIPELINE_TEST');
+        const solSells = history.filter(t => t.input_token === 'SOL' && t.status === 'Success' && t.strategy !== 'TEST' && t.strategy !== 'PIPELINE_TEST');
         const lastSellTime = solSells.length > 0 ? new Date(solSells[solSells.length-1].timestamp) : new Date(0);
         const activeBuy = solBuys.filter(t => new Date(t.timestamp) > lastSellTime).slice(-1)[0];
         if (activeBuy) {
@@ -578,7 +849,6 @@ function updateTradesSection() {
     }
 
     // Open positions section
-    const openContainer = document.getElementById('open-positions-container');
     if (openPositions.length === 0) {
         openContainer.innerHTML = '<div class="no-position">ポジションなし — 全額USDC待機中</div>';
     } else {
@@ -602,8 +872,7 @@ function updateTradesSection() {
 
     // Completed round-trips: buy then sell of same token
     // For now find sell-backs (e.g. SOL→USDC after USDC→SOL)
-    const completedContainer = document.getElementById('completed-trades-container');
-    const roundTrips = findRoundTrips(trades, wallet);
+    const roundTrips = findRoundTrips(history, wallet);
     if (roundTrips.length === 0) {
         completedContainer.innerHTML = '<div class="no-position">完了済みトレードはまだありません</div>';
     } else {
@@ -623,9 +892,7 @@ function updateTradesSection() {
         }).join('');
     }
 
-    // Full trade table with USD amounts + cumulative P&L
-    updateTradeTable(trades, wallet);
-    updateCumulativePnL(dashboardData.trades.filter(t => !isTestTrade(t)), wallet);
+    updateCumulativePnL(allTrades.filter(t => !isTestTrade(t)), wallet);
 }
 
 function findRoundTrips(trades, wallet) {
@@ -728,31 +995,32 @@ function estimateUsd(token, amount, solPrice, btcPrice, bnbPrice) {
 }
 
 // ─── Signals Tab ───
+// signal_series.json (update_data.py signal_series) holds, per pair, the latest check,
+// columnar chart series per window (t = unix seconds) and entry/SL/Donchian events
+const SIGNAL_EVENT_STYLES = {
+    entry: {label: 'エントリー', color: '#00ff88', pointStyle: 'triangle'},
+    sl: {label: 'SL', color: '#ff4444', pointStyle: 'crossRot'},
+    donchian: {label: 'Donchian', color: '#ffaa00', pointStyle: 'rectRot'},
+    other: {label: 'その他', color: '#888', pointStyle: 'circle'},
+};
+let signalPeriod = '1d';
+
 function updateSignalSection() {
-    const signals = dashboardData.signals;
-    const wallet = dashboardData.wallet;
+    const pairs = dashboardData.signalSeries?.pairs || {};
 
     // Summary - what human should care about
     const summaryEl = document.getElementById('signal-summary');
-    if (!signals.length) {
+    if (!Object.keys(pairs).length) {
         summaryEl.innerHTML = '<div class="loading">シグナルデータなし</div>';
         return;
     }
 
-    // Group by pair, show latest for each
-    const byPair = {};
-    for (const s of signals) {
-        const pair = s.pair || 'BTCUSDT';
-        byPair[pair] = s;
-    }
-
     let html = '<div class="signal-cards">';
-    for (const [pair, s] of Object.entries(byPair)) {
-        const cci = s.cci ?? s.cci_value ?? 0;
-        const cciNum = parseFloat(cci);
+    for (const [pair, {latest: s}] of Object.entries(pairs)) {
+        const cciNum = parseFloat(s.cci ?? 0);
         const cciClass = cciNum < -100 ? 'signal-buy' : cciNum > 100 ? 'signal-sell' : 'signal-neutral';
         const actionText = cciNum < -100 ? '🟢 買いシグナル圏内' : cciNum > 100 ? '🔴 売り圧力' : '⚪ 中立';
-        const price = s.btc_price || s.price || s.close || 0;
+        const price = s.price || 0;
 
         html += `
             <div class="signal-card ${cciClass}">
@@ -760,15 +1028,15 @@ function updateSignalSection() {
                 <div class="signal-cci">CCI: <strong>${fmtNum(cciNum, 1)}</strong></div>
                 <div class="signal-action">${actionText}</div>
                 ${price ? `<div class="signal-price">価格: ${fmtCurrency(price)}</div>` : ''}
-                <div class="signal-time">${fmtTime(s.checked_at || s.timestamp)}</div>
+                <div class="signal-time">${fmtTime(s.checked_at)}</div>
             </div>`;
     }
     html += '</div>';
 
     // Key insight for human
-    const latestBTC = byPair['BTCUSDT'];
+    const latestBTC = pairs['BTCUSDT']?.latest;
     if (latestBTC) {
-        const cci = parseFloat(latestBTC.cci ?? latestBTC.cci_value ?? 0);
+        const cci = parseFloat(latestBTC.cci ?? 0);
         let insight = '';
         if (cci < -100) insight = '⚠️ <strong>CCI買いシグナル発生中！</strong> Botが自動でエントリーを検討しています';
         else if (cci < -50) insight = '📉 CCIが下降中。-100を下回ると買いシグナルが発生します';
@@ -779,6 +1047,14 @@ function updateSignalSection() {
 
     summaryEl.innerHTML = html;
 
+    // Pair selector for the chart
+    const pairSel = document.getElementById('signal-pair-filter');
+    if (pairSel) {
+        const current = pairSel.value || ('BTCUSDT' in pairs ? 'BTCUSDT' : Object.keys(pairs)[0]);
+        pairSel.innerHTML = Object.keys(pairs).map(p => `<option value="${p}">${p}</option>`).join('');
+        pairSel.value = current in pairs ? current : Object.keys(pairs)[0];
+    }
+
     // Chart
     setupSignalChart();
 }
@@ -787,19 +1063,30 @@ function setupSignalChart() {
     const ctx = document.getElementById('signalChart').getContext('2d');
     if (signalChart) signalChart.destroy();
 
-    const chartData = prepareChartData('1d');
+    const chartData = prepareChartData(signalPeriod);
     signalChart = new Chart(ctx, {
         type: 'line',
         data: chartData,
         options: {
             responsive: true,
             maintainAspectRatio: false,
+            parsing: false,
             plugins: {
                 legend: { labels: { color: '#fff' } },
-                annotation: undefined
+                annotation: undefined,
+                tooltip: {
+                    callbacks: {
+                        title: items => items.length ? fmtTime(new Date(items[0].parsed.x * 1000)) : '',
+                        label: ctx => ctx.raw.action ? `${ctx.dataset.label}: ${ctx.raw.action} @ ${fmtCurrency(ctx.raw.y)}` : `${ctx.dataset.label}: ${fmtNum(ctx.raw.y)}`
+                    }
+                }
             },
             scales: {
-                x: { ticks: { color: '#888', maxTicksLimit: 12 }, grid: { color: '#333' } },
+                x: {
+                    type: 'linear',
+                    ticks: { color: '#888', maxTicksLimit: 12, callback: v => fmtTime(new Date(v * 1000)) },
+                    grid: { color: '#333' }
+                },
                 y: {
                     position: 'left',
                     title: { display: true, text: 'CCI', color: '#4488ff' },
@@ -818,35 +1105,52 @@ function setupSignalChart() {
 }
 
 function prepareChartData(period) {
-    const signals = dashboardData.signals.filter(s => (s.pair || 'BTCUSDT') === 'BTCUSDT');
-    if (!signals.length) return { labels: [], datasets: [] };
+    const pairs = dashboardData.signalSeries?.pairs || {};
+    const pair = document.getElementById('signal-pair-filter')?.value || 'BTCUSDT';
+    const series = pairs[pair];
+    const w = series?.windows?.[period];
+    if (!w || !w.t.length) return { datasets: [] };
+
+    const xy = values => w.t.map((t, i) => ({x: t, y: values[i]}));
+    const datasets = [
+        {
+            label: 'CCI',
+            data: xy(w.cci),
+            borderColor: '#4488ff',
+            fill: false,
+            yAxisID: 'y',
+            pointRadius: 1
+        },
+        {
+            label: `${pair} Price`,
+            data: xy(w.price),
+            borderColor: '#ffaa00',
+            fill: false,
+            yAxisID: 'y1',
+            pointRadius: 1
+        }
+    ];
 
-    const now = new Date();
-    const ms = period === '30d' ? 30*86400000 : period === '7d' ? 7*86400000 : 86400000;
-    const cutoff = new Date(now.getTime() - ms);
-    const filtered = signals.filter(s => new Date(s.checked_at || s.timestamp) >= cutoff);
-
-    return {
-        labels: filtered.map(s => fmtTime(s.checked_at || s.timestamp)),
-        datasets: [
-            {
-                label: 'CCI',
-                data: filtered.map(s => s.cci ?? s.cci_value ?? 0),
-                borderColor: '#4488ff',
-                fill: false,
-                yAxisID: 'y',
-                pointRadius: 1
-            },
-            {
-                label: 'BTC Price',
-                data: filtered.map(s => s.btc_price || s.price || s.close || 0),
-                borderColor: '#ffaa00',
-                fill: false,
-                yAxisID: 'y1',
-                pointRadius: 1
-            }
-        ]
-    };
+    // Entry / SL / Donchian markers within the window
+    const ev = series.events;
+    for (const [type, style] of Object.entries(SIGNAL_EVENT_STYLES)) {
+        const points = [];
+        ev.t.forEach((t, i) => {
+            if (ev.type[i] === type && t >= w.t[0]) points.push({x: t, y: ev.price[i], action: ev.action[i]});
+        });
+        if (!points.length) continue;
+        datasets.push({
+            type: 'scatter',
+            label: style.label,
+            data: points,
+            yAxisID: 'y1',
+            backgroundColor: style.color,
+            borderColor: style.color,
+            pointStyle: style.pointStyle,
+            pointRadius: 6
+        });
+    }
+    return { datasets };
 }
 
 // ─── Strategies Tab ───
@@ -915,7 +1219,8 @@ function updateStrategiesSection() {
     
     for (const [stratId, strat] of Object.entries(strategies)) {
         const isActive = strat.status === 'active';
-        const statusText = isActive ? (strat.bot_running ? '🟢 稼働中' : '🔴 Bot停止') : '⏸️ 無効';
+        const bot = strat.bot_status || {};
+        const statusText = isActive ? (bot.running ? '🟢 稼働中' : '🔴 Bot停止') + botStatusDetail(bot) : '⏸️ 無効';
         const icon = {CCI: '📊', GRID: '🔧', BOLLINGER: '📉'}[stratId] || '📌';
         
         html += `<div class="strategy-section ${isActive ? '' : 'disabled'}">`;
@@ -1043,9 +1348,7 @@ function updateDailyReportsSection() {
                 <div class="report-date">${r.date}</div>
                 <div class="toggle-icon">▼</div>
             </div>
-            <div class="report-content" id="report-${r.date}">
-                ${simpleMarkdown(r.content || '')}
-            </div>
+            <div class="report-content" id="report-${r.date}"></div>
         </div>
     `).join('');
 }
@@ -1059,6 +1362,7 @@ function toggleReport(date) {
     } else {
         el.classList.add('expanded');
         icon.textContent = '▲';
+        renderDocBody(el, 'reports', dashboardData.dailyReports.find(r => r.date === date));
     }
 }
 
@@ -1071,13 +1375,20 @@ function setupEventListeners() {
         document.getElementById(id)?.addEventListener('click', () => {
             document.querySelectorAll('.chart-btn').forEach(b => b.classList.remove('active'));
             document.getElementById(id).classList.add('active');
-            const period = id.replace('chart-', '');
+            signalPeriod = id.replace('chart-', '');
             if (signalChart) {
-                signalChart.data = prepareChartData(period);
+                signalChart.data = prepareChartData(signalPeriod);
                 signalChart.update();
             }
         });
     });
+    document.getElementById('signal-pair-filter')?.addEventListener('change', () => {
+        if (signalChart) {
+            signalChart.data = prepareChartData(signalPeriod);
+            signalChart.update();
+        }
+    });
+    document.getElementById('memory-search-input')?.addEventListener('input', onMemorySearchInput);
 }
 
 function updateCumulativePnL(trades, wallet) {
@@ -1120,6 +1431,19 @@ function fmtTime(s) {
     try { return new Date(s).toLocaleString('ja-JP', {month:'2-digit',day:'2-digit',hour:'2-digit',minute:'2-digit'}); }
     catch(e) { return s; }
 }
+function fmtAge(s) {
+    const sec = Math.max(0, (Date.now() - new Date(s).getTime()) / 1000);
+    if (sec < 90) return `${Math.round(sec)}秒`;
+    if (sec < 5400) return `${Math.round(sec / 60)}分`;
+    if (sec < 172800) return `${Math.round(sec / 3600)}時間`;
+    return `${Math.round(sec / 86400)}日`;
+}
+function botStatusDetail(bot) {
+    const parts = [];
+    if (bot.running && bot.started_at) parts.push(`稼働 ${fmtAge(bot.started_at)}`);
+    if (bot.heartbeat_at) parts.push(`HB ${fmtAge(bot.heartbeat_at)}前`);
+    return parts.length ? ` <small>(${parts.join(' / ')})</small>` : '';
+}
 function esc(t) { const d = document.createElement('div'); d.textContent = t; return d.innerHTML; }
 function statusLabel(s) {
     return {pending:'未着手',in_progress:'進行中',completed:'完了',blocked:'ブロック'}[s] || s;
@@ -1148,8 +1472,7 @@ let currentFolderFile = null;
 
 async function loadMemories() {
     try {
-        const resp = await fetch('data/memories.json?' + Date.now());
-        memoryData = await resp.json();
+        memoryData = await fetchDataFile('memories.json');
         setupMemoryTabs();
         renderMemory();
     } catch (e) {
@@ -1233,7 +1556,7 @@ function flattenTree(tree, prefix) {
     let files = [];
     for (const [name, node] of Object.entries(tree)) {
         if (node.type === 'file') {
-            files.push({ path: prefix ? prefix + '/' + name : name, name, content: node.content });
+            files.push({ path: prefix ? prefix + '/' + name : name, name, doc: node });
         } else if (node.type === 'folder' && node.children) {
             files = files.concat(flattenTree(node.children, prefix ? prefix + '/' + name.replace(/\/$/, '') : name.replace(/\/$/, '')));
         }
@@ -1298,13 +1621,14 @@ function renderFolderView(folderName, tree) {
     html += `<div class="folder-content">`;
     if (currentFile) {
         html += `<div class="folder-content-path">${folderName}/${currentFile.path}</div>`;
-        html += `<div class="folder-content-body">${simpleMarkdown(currentFile.content)}</div>`;
+        html += `<div class="folder-content-body"></div>`;
     } else {
         html += `<div class="loading">ファイルを選択してください</div>`;
     }
     html += `</div></div>`;
     
     el.innerHTML = html;
+    if (currentFile) renderDocBody(el.querySelector('.folder-content-body'), 'memories', currentFile.doc);
     
     // Bind clicks
     el.querySelectorAll('.tree-item').forEach(item => {
@@ -1331,12 +1655,121 @@ function renderMemory() {
         }
     }
     
-    const content = agent.files?.[currentMemoryFile];
-    if (!content) {
+    const doc = agent.files?.[currentMemoryFile];
+    if (!doc) {
         el.innerHTML = `<div class="loading">${currentMemoryFile || 'ファイル'} が見つかりません</div>`;
         return;
     }
-    el.innerHTML = simpleMarkdown(content);
+    // The previous file's body may still be loading: render into a fresh element each time
+    el.innerHTML = '<div class="memory-file-body"></div>';
+    renderDocBody(el.firstElementChild, 'memories', doc);
+}
+
+// ─── Search (daily reports + agent memories) ───
+// Index built by update_data.py update_search_index: search/index.json lists the documents,
+// search/shard_NN.json maps each term to [docId, termFrequency, ...]. Only the shards of
+// the query's terms are fetched, and bodies are fetched only when a result is opened
+const SEARCH_BM25_K1 = 1.2;
+const SEARCH_BM25_B = 0.75;
+const SEARCH_MAX_RESULTS = 30;
+let searchSeq = 0;
+let searchTimer = null;
+let searchResults = [];
+
+// Query terms, normalized like update_data.py search_terms: NFKC + lower case, split on
+// anything that is not a letter or digit, then character bigrams per run. A one-character
+// run stays as is; the index also holds every single character, so it matches anywhere
+function searchTerms(text) {
+    const terms = [];
+    for (const run of text.normalize('NFKC').toLowerCase().split(/[^\p{L}\p{N}]+/u)) {
+        const chars = Array.from(run);
+        if (chars.length === 1) terms.push(chars[0]);
+        for (let i = 0; i + 1 < chars.length; i++) terms.push(chars[i] + chars[i + 1]);
+    }
+    return terms;
+}
+
+function searchShard(term, shards) {
+    let h = 0;
+    for (const ch of term) h = (h * 31 + ch.codePointAt(0)) % shards;
+    return h;
+}
+
+// Documents containing every query term, ranked by BM25
+async function searchDocuments(query) {
+    const terms = [...new Set(searchTerms(query))];
+    if (!terms.length) return [];
+    const index = await fetchDataFile('search/index.json');
+    const shardIds = [...new Set(terms.map(t => searchShard(t, index.shards)))];
+    const shards = {};
+    await Promise.all(shardIds.map(async i => {
+        shards[i] = await fetchDataFile(`search/shard_${String(i).padStart(2, '0')}.json`);
+    }));
+
+    const n = index.docs.length;
+    const scores = new Map();
+    const matched = new Map();
+    for (const term of terms) {
+        const postings = shards[searchShard(term, index.shards)][term];
+        if (!postings) return [];
+        const df = postings.length / 2;
+        const idf = Math.log(1 + (n - df + 0.5) / (df + 0.5));
+        for (let i = 0; i < postings.length; i += 2) {
+            const doc = postings[i], tf = postings[i + 1];
+            const norm = 1 - SEARCH_BM25_B + SEARCH_BM25_B * index.docs[doc].len / (index.avg_len || 1);
+            scores.set(doc, (scores.get(doc) || 0) + idf * tf * (SEARCH_BM25_K1 + 1) / (tf + SEARCH_BM25_K1 * norm));
+            matched.set(doc, (matched.get(doc) || 0) + 1);
+        }
+    }
+    return [...scores]
+        .filter(([doc]) => matched.get(doc) === terms.length)
+        .sort((a, b) => b[1] - a[1])
+        .slice(0, SEARCH_MAX_RESULTS)
+        .map(([doc, score]) => ({...index.docs[doc], score}));
+}
+
+function onMemorySearchInput(e) {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => renderSearchResults(e.target.value.trim()), 150);
+}
+
+async function renderSearchResults(query) {
+    const el = document.getElementById('memory-search-results');
+    if (!el) return;
+    const seq = ++searchSeq;
+    if (!query) {
+        el.innerHTML = '';
+        return;
+    }
+    let results;
+    try {
+        results = await searchDocuments(query);
+    } catch (e) {
+        if (seq === searchSeq) el.innerHTML = `<div class="loading">検索インデックス読み込み失敗: ${esc(e.message)}</div>`;
+        return;
+    }
+    if (seq !== searchSeq) return;
+    searchResults = results;
+    if (!results.length) {
+        el.innerHTML = '<div class="loading">一致する文書なし</div>';
+        return;
+    }
+    el.innerHTML = results.map((r, i) => `
+        <div class="search-result" onclick="toggleSearchResult(${i})">
+            <span class="search-result-kind">${r.kind === 'reports' ? '日報' : 'メモリ'}</span>
+            <span class="search-result-title">${esc(r.title)}</span>
+            <span class="search-result-path">${esc(r.path)}</span>
+        </div>
+        <div class="search-result-body" id="search-result-${i}" style="display:none"></div>
+    `).join('');
+}
+
+function toggleSearchResult(i) {
+    const el = document.getElementById(`search-result-${i}`);
+    if (!el) return;
+    const opening = el.style.display === 'none';
+    el.style.display = opening ? 'block' : 'none';
+    if (opening) renderDocBody(el, searchResults[i].kind, searchResults[i]);
 }
 
 // Load memories when memory tab is shown
@@ -1357,8 +1790,7 @@ let memeData = null;
 
 async function loadMemeData() {
     try {
-        const resp = await fetch('data/meme.json?' + Date.now());
-        memeData = await resp.json();
+        memeData = await fetchDataFile('meme.json');
         renderMemeTab();
     } catch (e) {
         document.getElementById('meme-tracking-list').innerHTML = 'ミームデータ読み込み失敗: ' + e.message;
@@ -1502,9 +1934,7 @@ function renderMemeTab() {
 // ─── Simulation Tab ───
 async function loadSimulationData() {
     try {
-        const r = await fetch('./data/paper_trading.json?t=' + Date.now());
-        if (!r.ok) return;
-        const data = await r.json();
+        const data = await fetchDataFile('paper_trading.json');
         renderSimulation(data);
     } catch(e) {
         console.warn('Simulation data load failed:', e);
@@ -1627,9 +2057,7 @@ let creativeData = null;
 async function loadCreativeData() {
     if (creativeData) { renderCreativeTab(); return; }
     try {
-        const resp = await fetch('data/creative.json');
-        if (!resp.ok) throw new Error('Not found');
-        creativeData = await resp.json();
+        creativeData = await fetchDataFile('creative.json');
         renderCreativeTab();
     } catch (e) {
         document.getElementById('creative-gallery').innerHTML = '<p style="color:#888">データなし</p>';
@@ -1638,18 +2066,60 @@ async function loadCreativeData() {
     }
 }
 
+// Thumbnail <img> for a gallery item: WebP thumbnails via srcset when update_data.py
+// generated them (see update_creative_images), otherwise the original image
+function galleryThumbnail(item) {
+    const v = item.hash ? `?v=${item.hash}` : '';
+    const widths = Object.keys(item.thumbs || {}).map(Number).sort((a, b) => a - b);
+    const src = widths.length ? item.thumbs[widths[0]] : item.path;
+    const srcset = widths.length
+        ? ` srcset="${widths.map(w => `data/${item.thumbs[w]}${v} ${w}w`).join(', ')}" sizes="(max-width: 600px) 100vw, 400px"`
+        : '';
+    const size = item.width && item.height ? ` width="${item.width}" height="${item.height}"` : '';
+    return `<img src="data/${src}${v}"${srcset}${size} alt="${esc(item.name)}" loading="lazy" decoding="async"
+                     onerror="galleryImageError(this, ${JSON.stringify(`data/${item.path}${v}`).replace(/"/g, '&quot;')})">`;
+}
+
+// A broken thumbnail falls back to the original image; the card is hidden only if that fails too
+function galleryImageError(img, original) {
+    if (img.dataset.fallback) {
+        img.parentElement.style.display = 'none';
+        return;
+    }
+    img.dataset.fallback = '1';
+    img.removeAttribute('srcset');
+    img.src = original;
+}
+
+// Full-size image on demand: the WebP variant, falling back to the original
+function openGalleryImage(i) {
+    const item = creativeData && creativeData.gallery[i];
+    if (!item) return;
+    const v = item.hash ? `?v=${item.hash}` : '';
+    const overlay = document.createElement('div');
+    overlay.className = 'gallery-overlay';
+    overlay.onclick = () => overlay.remove();
+    const img = document.createElement('img');
+    img.alt = item.name;
+    if (item.webp) {
+        img.onerror = () => { img.onerror = null; img.src = `data/${item.path}${v}`; };
+    }
+    img.src = `data/${item.webp || item.path}${v}`;
+    overlay.appendChild(img);
+    document.body.appendChild(overlay);
+}
+
 function renderCreativeTab() {
     if (!creativeData) return;
 
     // Gallery
     const galleryEl = document.getElementById('creative-gallery');
     if (creativeData.gallery && creativeData.gallery.length > 0) {
-        galleryEl.innerHTML = creativeData.gallery.map(item => {
+        galleryEl.innerHTML = creativeData.gallery.map((item, i) => {
             const date = new Date(item.date).toLocaleDateString('ja-JP');
             const displayName = item.name.replace(/-/g, ' ').replace(/^\d+\s*/, '');
-            return `<div class="gallery-item">
-                <img src="data/${item.path}" alt="${esc(item.name)}" loading="lazy"
-                     onerror="this.parentElement.style.display='none'">
+            return `<div class="gallery-item" onclick="openGalleryImage(${i})">
+                ${galleryThumbnail(item)}
                 <div class="gallery-caption">${esc(displayName || item.name)}</div>
                 <div class="gallery-date">${date}</div>
             </div>`;
@@ -1670,7 +2140,7 @@ function renderCreativeTab() {
             </div>
             <div id="essay-content-${i}" class="creative-full-content" style="display:none">
                 <span class="back-btn" onclick="event.stopPropagation();document.getElementById('essay-content-${i}').style.display='none'">← 閉じる</span>
-                ${simpleMarkdown(item.content)}
+                <div class="creative-doc-body"></div>
             </div>`;
         }).join('');
     } else {
@@ -1689,7 +2159,7 @@ function renderCreativeTab() {
             </div>
             <div id="diary-content-${i}" class="creative-full-content" style="display:none">
                 <span class="back-btn" onclick="event.stopPropagation();document.getElementById('diary-content-${i}').style.display='none'">← 閉じる</span>
-                ${simpleMarkdown(item.content)}
+                <div class="creative-doc-body"></div>
             </div>`;
         }).join('');
     } else {
@@ -1720,9 +2190,18 @@ function toggleNoteContent(index) {
     if (el) el.style.display = el.style.display === 'none' ? 'block' : 'none';
 }
 
+// toggleCreativeContent types whose body is fetched on first open (the rest carry content inline)
+const CREATIVE_DOC_LISTS = {essay: 'essays', diary: 'diary'};
+
 function toggleCreativeContent(type, index) {
     const el = document.getElementById(`${type}-content-${index}`);
-    if (el) el.style.display = el.style.display === 'none' ? 'block' : 'none';
+    if (!el) return;
+    const opening = el.style.display === 'none';
+    el.style.display = opening ? 'block' : 'none';
+    const body = el.querySelector('.creative-doc-body');
+    if (opening && body && CREATIVE_DOC_LISTS[type]) {
+        renderDocBody(body, 'creative', creativeData?.[CREATIVE_DOC_LISTS[type]]?.[index]);
+    }
 }
 
 // ─── note Tab ───
@@ -1793,7 +2272,7 @@ function updateNoteSection() {
     // Drafts (from creative data)
     const noteDraftsEl = document.getElementById('note-drafts-list');
     if (noteDraftsEl) {
-        fetch('data/creative.json?t=' + Date.now()).then(r=>r.json()).then(cd => {
+        fetchDataFile('creative.json').then(cd => {
             const drafts = cd.note_drafts || [];
             if (drafts.length === 0) {
                 noteDraftsEl.innerHTML = '<p style="color:#888">下書きなし</p>';
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Clawdia Dashboard Static Server
+ダッシュボードを配信する（python3 -m http.server の代わり）
+
+update_data.py が書いた .br / .gz をブラウザの Accept-Encoding に応じてそのまま返し、
+ETag / If-None-Match で変更のないファイルには 304 を返す。
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import threading
+import email.utils
+from functools import partial
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# Precompressed siblings in order of preference: (Content-Encoding, file suffix)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# data/<name>?v=<hash> (see dashboard.js fetchDataFile) never changes for a given hash,
+# but only when <hash> is the file's current hash: any other v= is revalidated
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+DATA_PREFIX = '/data/'
+HASH_LEN = 16  # dashboard.js uses the first 16 hex digits of the sha256
+_HASH_RE = re.compile(r'[0-9a-f]{%d}' % HASH_LEN)
+_manifest_cache = {}  # manifest path -> (mtime_ns, {name: hash})
+_manifest_cache_lock = threading.Lock()
+
+def accepted_encodings(header):
+    """Accept-Encoding ヘッダから受け付けるエンコーディングの集合（q=0 は除く）"""
+    accepted = set()
+    rejected = set()
+    for part in (header or '').split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        (accepted if q > 0 else rejected).add(name)
+    if '*' in accepted:
+        accepted |= {enc for enc, _ in ENCODINGS if enc not in rejected}
+    return accepted
+
+def _etag(st):
+    """ファイルのサイズと更新時刻から作るETag"""
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+def _etag_matches(header, etag):
+    """If-None-Match のどれかが etag と一致するか（弱いETagの W/ は無視）"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+def manifest_hashes(path):
+    """data/manifest.json の {ファイル名: ハッシュ先頭16桁}（更新時刻が変わるまで使い回す）"""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    with _manifest_cache_lock:
+        cached = _manifest_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            files = json.load(f).get('files', {})
+        hashes = {name: entry['sha256'][:HASH_LEN] for name, entry in files.items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+    with _manifest_cache_lock:
+        _manifest_cache[path] = (mtime, hashes)
+    return hashes
+
+def is_immutable(url, directory):
+    """url（パス+クエリ）の v= が、そのファイルの今のハッシュと一致するか
+
+    manifest.json に載っているファイルはそのハッシュと、docs/<kind>/<hash>.md や
+    creative/variants/<hash>-<幅>.webp のように内容のハッシュがファイル名のものは名前と比べる。
+    """
+    parts = urlsplit(url)
+    versions = parse_qs(parts.query).get('v', [])
+    if len(versions) != 1 or not _HASH_RE.fullmatch(versions[0]):
+        return False
+    v = versions[0]
+    path = unquote(parts.path)
+    if not path.startswith(DATA_PREFIX):
+        return False
+    name = path[len(DATA_PREFIX):]
+    basename = name.rsplit('/', 1)[-1]
+    if basename.startswith((v + '.', v + '-')):
+        return True
+    return manifest_hashes(os.path.join(directory, 'data', 'manifest.json')).get(name) == v
+
+class DashboardRequestHandler(SimpleHTTPRequestHandler):
+    """事前圧縮ファイルの選択・ETag・Cache-Control を加えた SimpleHTTPRequestHandler"""
+
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        '.json': 'application/json',
+        '.jsonl': 'application/x-ndjson',
+        '.js': 'text/javascript',
+        '.md': 'text/markdown; charset=utf-8',
+    }
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # Redirects and index.html lookup are left to SimpleHTTPRequestHandler
+            index = os.path.join(path, 'index.html')
+            if not urlsplit(self.path).path.endswith('/') or not os.path.isfile(index):
+                return super().send_head()
+            path = index
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, 'File not found')
+            return None
+
+        # A sibling older than the file itself is stale (the updater rewrites the
+        # file first, then its siblings), so fall back to the plain file meanwhile
+        serve_path, encoding = path, None
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        original_mtime = os.stat(path).st_mtime_ns
+        for enc, suffix in ENCODINGS:
+            try:
+                if enc in accepted and os.stat(path + suffix).st_mtime_ns >= original_mtime:
+                    serve_path, encoding = path + suffix, enc
+                    break
+            except OSError:
+                continue
+
+        try:
+            f = open(serve_path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, 'File not found')
+            return None
+        try:
+            st = os.fstat(f.fileno())
+            etag = _etag(st)
+            cache_control = IMMUTABLE_CACHE if is_immutable(self.path, self.directory) else REVALIDATE_CACHE
+
+            if _etag_matches(self.headers.get('If-None-Match'), etag):
+                f.close()
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', cache_control)
+                self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                return None
+
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', self.guess_type(path))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            self.send_header('Content-Length', str(st.st_size))
+            self.send_header('Last-Modified', email.utils.formatdate(st.st_mtime, usegmt=True))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return f
+        except BaseException:
+            f.close()
+            raise
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Clawdia Dashboard static server')
+    parser.add_argument('port', nargs='?', type=int, default=8080, help='待ち受けポート（デフォルト8080）')
+    parser.add_argument('--bind', '-b', default='', help='待ち受けアドレス（デフォルト: 全インターフェース）')
+    parser.add_argument('--directory', '-d', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='配信するディレクトリ（デフォルト: このスクリプトのディレクトリ）')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    handler = partial(DashboardRequestHandler, directory=args.directory)
+    with ThreadingHTTPServer((args.bind, args.port), handler) as httpd:
+        host = args.bind or 'localhost'
+        print(f"Serving {args.directory} at http://{host}:{args.port}/ (Ctrl+C to stop)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import update_data  # noqa: E402
+
+DASHBOARD_JS = Path(__file__).resolve().parent.parent / 'dashboard.js'
+
+
+def js_function(name):
+    """dashboard.js からトップレベルの function name(...) {...} を切り出す"""
+    source = DASHBOARD_JS.read_text(encoding='utf-8')
+    start = source.index(f'function {name}(')
+    end = source.index('\n}\n', start) + 3
+    return source[start:end]
+
+
+@pytest.fixture
+def node():
+    """dashboard.js の関数を node で実行し、最後の式を JSON で受け取る: node(['f', 'g'], 'f(1)')"""
+    if shutil.which('node') is None:
+        pytest.skip('node not installed')
+
+    def run(functions, expression):
+        script = '\n'.join([*(js_function(name) for name in functions),
+                            f'console.log(JSON.stringify({expression}));'])
+        out = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+        return json.loads(out)
+    return run
+
+
+@pytest.fixture
+def dashboard(tmp_path, monkeypatch):
+    """update_data の出力・キャッシュ・ワークスペースを tmp_path 以下に向ける"""
+    output_dir = tmp_path / 'data'
+    cache_dir = tmp_path / '.cache'
+    workspace = tmp_path / 'workspace'
+    for d in (output_dir, cache_dir, workspace):
+        d.mkdir()
+    monkeypatch.setitem(update_data.CONFIG, 'OUTPUT_DIR', str(output_dir))
+    monkeypatch.setitem(update_data.CONFIG, 'CACHE_DIR', str(cache_dir))
+    monkeypatch.setitem(update_data.CONFIG, 'WORKSPACE_DIR', str(workspace))
+    monkeypatch.setitem(update_data.CONFIG, 'BOT_DATA_DIR', str(tmp_path / 'bot'))
+    for name, base in [
+        ('INGEST_STATE_DIR', cache_dir),
+        ('DOC_CACHE_PATH', cache_dir),
+        ('PRICE_CACHE_PATH', cache_dir),
+        ('IMAGE_CACHE_PATH', cache_dir),
+        ('SEARCH_TERMS_PATH', cache_dir),
+        ('MANIFEST_PATH', output_dir),
+        ('PERF_HISTORY_PATH', output_dir),
+    ]:
+        monkeypatch.setattr(update_data, name, str(base / os.path.basename(getattr(update_data, name))))
+    for name in ('_ingest_state', '_doc_cache', '_manifest', '_price_cache'):
+        monkeypatch.setattr(update_data, name, None)
+    monkeypatch.setattr(update_data, '_doc_cache_dirty', False)
+    monkeypatch.setattr(update_data, '_ingest_dirty', set())
+    monkeypatch.setattr(update_data, '_ingest_used', set())
+    return tmp_path
@@ -0,0 +1,44 @@
+import pytest
+
+import update_data
+
+
+@pytest.mark.parametrize('argv, running', [
+    (['python3', 'live_trader.py'], True),
+    (['python3', '/opt/bot/live_trader.py', '--pair', 'BTCUSDT'], True),
+    (['python', '-m', 'bot.live_trader'], True),
+    (['python', '-mbot.live_trader'], True),
+    (['python3.11', '-u', '-X', 'dev', 'live_trader.py'], True),
+    (['/opt/bot/live_trader'], True),
+    (['python3', 'live_trader_backtest.py'], False),
+    (['python3', 'run.py', 'live_trader.py'], False),
+    (['python3', '-c', 'import live_trader'], False),
+    (['vim', 'live_trader.py'], False),
+    (['less', '/opt/bot/live_trader.py'], False),
+    (['grep', 'live_trader'], False),
+    (['vim', 'notes.txt'], False),
+    ([], False),
+    (None, False),
+])
+def test_runs_script(argv, running):
+    assert update_data._runs_script(argv, 'live_trader') is running
+
+
+def test_proc_is_scanned_once_for_all_bots(monkeypatch, tmp_path):
+    monkeypatch.setitem(update_data.CONFIG, 'BOT_DATA_DIR', str(tmp_path))
+    cmdlines = {
+        10: ['bash'],
+        11: ['python', '-m', 'bot.live_trader'],
+        12: ['python3', 'jupiter_grid.py'],
+    }
+    scans = []
+    monkeypatch.setattr(update_data.os.path, 'isdir', lambda p: p == '/proc/self')
+    monkeypatch.setattr(update_data, '_proc_pids', lambda: scans.append(1) or list(cmdlines))
+    monkeypatch.setattr(update_data, '_proc_cmdline', lambda pid: cmdlines.get(int(pid)))
+    monkeypatch.setattr(update_data, '_proc_start_time', lambda pid: 1000.0 + pid)
+
+    find = update_data._bot_process_finder([bot['script'] for bot in update_data.BOTS.values()])
+    status = {name: update_data.probe_bot(bot, find) for name, bot in update_data.BOTS.items()}
+    assert scans == [1]
+    assert status['CCI']['pid'] == 11 and status['CCI']['source'] == 'process'
+    assert status['GRID']['pid'] == 12 and status['GRID']['running']
@@ -0,0 +1,79 @@
+import os
+import time
+
+import update_data
+
+
+def _mtime(path):
+    return os.stat(path).st_mtime_ns
+
+
+def test_doc_cache_saved_only_when_changed(dashboard):
+    doc = dashboard / 'workspace' / 'note.md'
+    doc.write_text('# Title\nbody\n')
+    assert update_data.read_document(str(doc))['title'] == 'Title'
+    update_data.save_doc_cache()
+    saved = _mtime(update_data.DOC_CACHE_PATH)
+
+    os.utime(update_data.DOC_CACHE_PATH, ns=(saved - 10**9, saved - 10**9))
+    update_data.read_document(str(doc))
+    update_data.save_doc_cache()
+    assert _mtime(update_data.DOC_CACHE_PATH) == saved - 10**9
+
+    doc.unlink()
+    update_data.save_doc_cache()
+    assert _mtime(update_data.DOC_CACHE_PATH) != saved - 10**9
+    update_data._doc_cache = None
+    assert update_data._load_doc_cache() == {}
+
+
+def test_ingest_state_rewrites_only_changed_files(dashboard, monkeypatch):
+    closed = dashboard / 'trades_2026-10-01.jsonl'
+    today = dashboard / 'trades_2026-10-02.jsonl'
+    closed.write_text('{"a": 1}\n{"a": 2}\n')
+    today.write_text('{"a": 3}\n')
+    for path in (closed, today):
+        update_data.read_jsonl_incremental(str(path))
+    update_data.save_ingest_state()
+    closed_entry = update_data._ingest_entry_path(str(closed))
+    today_entry = update_data._ingest_entry_path(str(today))
+    closed_ino = os.stat(closed_entry).st_ino
+    today_ino = os.stat(today_entry).st_ino
+
+    # Next run: only today's file grew, and the closed file's records come from its own pickle
+    update_data._ingest_state = None
+    with today.open('a') as f:
+        f.write('{"a": 4}\n')
+    parsed = []
+    parse = update_data._parse_jsonl_lines
+    monkeypatch.setattr(update_data, '_parse_jsonl_lines', lambda chunk, *a, **k: (parsed.append(chunk), parse(chunk, *a, **k)))
+    assert [r['a'] for r in update_data.read_jsonl_incremental(str(closed))] == [1, 2]
+    assert [r['a'] for r in update_data.read_jsonl_incremental(str(today))] == [3, 4]
+    assert parsed == [b'{"a": 4}\n']
+    update_data.save_ingest_state()
+    assert os.stat(closed_entry).st_ino == closed_ino
+    assert os.stat(today_entry).st_ino != today_ino
+
+    update_data._ingest_state = None
+    assert [r['a'] for r in update_data.read_jsonl_incremental(str(today))] == [3, 4]
+    assert parsed == [b'{"a": 4}\n']
+
+
+def test_ingest_state_prunes_deleted_and_unused_files(dashboard):
+    gone = dashboard / 'trades_2026-09-01.jsonl'
+    old = dashboard / 'trades_2026-09-02.jsonl'
+    for path in (gone, old):
+        path.write_text('{"a": 1}\n')
+        update_data.read_jsonl_incremental(str(path))
+    update_data.save_ingest_state()
+
+    gone.unlink()
+    update_data.save_ingest_state()
+    assert not os.path.exists(update_data._ingest_entry_path(str(gone)))
+
+    stale = time.time() - update_data.INGEST_STATE_TTL - 60
+    update_data._ingest_state = None
+    os.utime(update_data._ingest_entry_path(str(old)), (stale, stale))
+    update_data._load_ingest_state()
+    update_data.save_ingest_state()
+    assert os.listdir(update_data.INGEST_STATE_DIR) == []
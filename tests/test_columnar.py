@@ -0,0 +1,42 @@
+import json
+
+import update_data
+
+RECORDS = [
+    {'timestamp': '2026-10-01T00:00:00', 'strategy': 'CCI', 'token': 'SOL', 'ok': True, 'amount': 1.5,
+     'extra': {'pnl_usd': 1}, 'note': None},
+    {'timestamp': '2026-10-01T00:01:00', 'strategy': 'CCI', 'token': 'SOL', 'ok': False, 'amount': 2},
+    {'strategy': 'GRID', 'token': None, 'ok': None, 'amount': 0, 'extra': {'pnl_usd': 1}, 'fee': 5000},
+    {'timestamp': '2026-10-01T00:03:00', 'token': 'SOL', 'amount': -1, 'note': 'x', 'flag': 1},
+    {'timestamp': '2026-10-01T00:04:00', 'strategy': 'CCI', 'token': 'WBTC', 'ok': True, 'amount': 3.25,
+     'extra': {'pnl_usd': 1}, 'flag': True},
+    {},
+]
+
+
+def _decode(node, records):
+    payload = json.loads(json.dumps(update_data.encode_columnar(records)))
+    return node(['decodeColumnar'], f'decodeColumnar({json.dumps(payload)})')
+
+
+def test_columnar_round_trip_with_mixed_keys(node):
+    payload = update_data.encode_columnar(RECORDS)
+    # The cases under test actually occur: constant, dictionary, boolean and missing columns
+    assert payload['const']['extra'] == {'pnl_usd': 1}
+    assert 'strategy' in payload['dicts'] and 'ok' in payload['bools']
+    assert payload['missing']['timestamp'] == [2, 5]
+
+    # Compare as JSON so that 1/True and 0/False are not taken as equal
+    assert json.dumps(_decode(node, RECORDS), sort_keys=True) == json.dumps(RECORDS, sort_keys=True)
+
+
+def test_columnar_keeps_null_apart_from_missing(node):
+    records = [{'a': None}, {}, {'a': None, 'b': 'x'}, {'b': 'x'}]
+    decoded = _decode(node, records)
+    assert decoded == records
+    assert [list(r) for r in decoded] == [['a'], [], ['a', 'b'], ['b']]
+
+
+def test_columnar_round_trip_of_empty_and_single_rows(node):
+    assert _decode(node, []) == []
+    assert _decode(node, [{'a': [1, 2]}]) == [{'a': [1, 2]}]
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+import update_data
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def _make_image(path, size, color):
+    Image.new('RGB', size, color).save(path)
+
+
+@pytest.fixture
+def art_dir(dashboard):
+    art = dashboard / 'workspace' / 'creative' / 'art'
+    art.mkdir(parents=True)
+    _make_image(art / 'a.png', (1000, 500), 'red')
+    _make_image(art / 'b.png', (1200, 600), 'blue')
+    return art
+
+
+def _variant_paths(meta):
+    return [meta['webp'], *meta['thumbs'].values()]
+
+
+def _assert_variants_match(images):
+    output_dir = update_data.CONFIG['OUTPUT_DIR']
+    for meta in images.values():
+        for rel in _variant_paths(meta):
+            assert os.path.basename(rel).startswith(meta['hash'])
+            assert os.path.exists(os.path.join(output_dir, rel))
+        with Image.open(os.path.join(output_dir, meta['webp'])) as img:
+            assert img.size == (meta['width'], meta['height'])
+
+
+def test_variants_and_metadata(art_dir):
+    images = update_data.update_creative_images()
+    assert images['a.png']['width'] == 1000 and images['a.png']['height'] == 500
+    assert set(images['a.png']['thumbs']) == {'400', '800'}
+    assert images['a.png']['hash'] != images['b.png']['hash']
+    _assert_variants_match(images)
+
+
+def test_missing_variants_are_regenerated(art_dir):
+    first = update_data.update_creative_images()
+    variant_dir = os.path.join(update_data.CONFIG['OUTPUT_DIR'], update_data.IMAGE_VARIANT_DIR)
+    for name in os.listdir(variant_dir):
+        os.remove(os.path.join(variant_dir, name))
+    second = update_data.update_creative_images()
+    assert second == first
+    _assert_variants_match(second)
+
+
+def test_touched_image_does_not_leak_its_hash(art_dir):
+    first = update_data.update_creative_images()
+    st = os.stat(art_dir / 'a.png')
+    os.utime(art_dir / 'a.png', ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    os.remove(os.path.join(update_data.CONFIG['OUTPUT_DIR'], first['b.png']['webp']))
+    second = update_data.update_creative_images()
+    assert second == first
+    _assert_variants_match(second)
+
+
+def test_variants_generated_once_pillow_is_installed(art_dir, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(update_data, 'Image', None)
+        without = update_data.update_creative_images()
+    assert without['a.png']['webp'] is None
+    assert (without['a.png']['width'], without['a.png']['height']) == (1000, 500)
+    with_pillow = update_data.update_creative_images()
+    assert with_pillow['a.png']['hash'] == without['a.png']['hash']
+    assert with_pillow['b.png']['hash'] == without['b.png']['hash']
+    _assert_variants_match(with_pillow)
+
+
+def test_broken_image_keeps_previous_variants(art_dir):
+    first = update_data.update_creative_images()
+    (art_dir / 'a.png').write_bytes(b'not an image')
+    second = update_data.update_creative_images()
+    assert second == first
+    _assert_variants_match(second)
+
+
+def test_removed_image_variants_are_pruned(art_dir):
+    first = update_data.update_creative_images()
+    os.remove(art_dir / 'b.png')
+    second = update_data.update_creative_images()
+    assert list(second) == ['a.png']
+    output_dir = update_data.CONFIG['OUTPUT_DIR']
+    assert not any(os.path.exists(os.path.join(output_dir, p)) for p in _variant_paths(first['b.png']))
+    _assert_variants_match(second)
+
+
+def test_image_cache_written_only_when_changed(art_dir):
+    update_data.update_creative_images()
+    cache_path = update_data.IMAGE_CACHE_PATH
+    old = os.stat(cache_path).st_mtime_ns - 10**9
+    os.utime(cache_path, ns=(old, old))
+
+    update_data.update_creative_images()
+    assert os.stat(cache_path).st_mtime_ns == old
+
+    st = os.stat(art_dir / 'a.png')
+    os.utime(art_dir / 'a.png', ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    update_data.update_creative_images()
+    assert os.stat(cache_path).st_mtime_ns != old
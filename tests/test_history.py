@@ -0,0 +1,69 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import update_data
+
+JST = timezone(timedelta(hours=9))
+
+
+def _points(ys):
+    return [(float(i), float(y), i) for i, y in enumerate(ys)]
+
+
+def test_lttb_keeps_endpoints_and_threshold():
+    ys = [0, 1, 0, 5, 0, 1, 0, -4, 0, 1, 0, 2]
+    sampled = update_data.lttb(_points(ys), 5)
+    assert len(sampled) == 5
+    assert sampled[0] == 0 and sampled[-1] == len(ys) - 1
+    assert sampled == sorted(sampled)
+    # The spikes survive downsampling
+    assert 3 in sampled and 7 in sampled
+
+
+def test_lttb_short_inputs_are_returned_as_is():
+    points = _points([1, 2, 3, 4])
+    assert update_data.lttb(points, 4) == [0, 1, 2, 3]
+    assert update_data.lttb(points, 10) == [0, 1, 2, 3]
+    assert update_data.lttb(points, 2) == [0, 1, 2, 3]
+    assert update_data.lttb([], 5) == []
+
+
+def _price(dt, **prices):
+    return dt, {'timestamp': dt.isoformat(), 'prices': prices}
+
+
+def test_ohlc_buckets_boundaries():
+    t0 = datetime(2026, 10, 1, 10, 0, tzinfo=JST)
+    records = [
+        _price(t0, SOL=10),
+        _price(t0 + timedelta(minutes=20), SOL=12, BTC='n/a'),
+        _price(t0 + timedelta(minutes=59, seconds=59), SOL=9),
+        _price(t0 + timedelta(hours=1), SOL=11),  # exactly on the next boundary
+        _price(t0 + timedelta(hours=3, minutes=5), SOL=8, BTC=60000),
+    ]
+    buckets = update_data.ohlc_buckets(records, 3600)
+    assert [b['timestamp'] for b in buckets] == [
+        '2026-10-01T10:00:00+09:00', '2026-10-01T11:00:00+09:00', '2026-10-01T13:00:00+09:00']
+    assert buckets[0] == {'timestamp': '2026-10-01T10:00:00+09:00', 'SOL': [10, 12, 9, 9]}
+    assert buckets[1]['SOL'] == [11, 11, 11, 11]
+    assert buckets[2] == {'timestamp': '2026-10-01T13:00:00+09:00', 'SOL': [8, 8, 8, 8], 'BTC': [60000] * 4}
+
+
+def test_daily_ohlc_buckets_follow_the_record_timezone():
+    records = [
+        _price(datetime(2026, 10, 1, 23, 30, tzinfo=JST), SOL=1),
+        _price(datetime(2026, 10, 2, 0, 30, tzinfo=JST), SOL=2),  # still Oct 1 in UTC
+    ]
+    buckets = update_data.ohlc_buckets(records, 86400)
+    assert [b['timestamp'] for b in buckets] == ['2026-10-01T00:00:00+09:00', '2026-10-02T00:00:00+09:00']
+
+
+def test_history_prices_align_with_portfolio_points(node):
+    hist = [{'timestamp': t} for t in ('2026-10-01T09:30:00+09:00', '2026-10-01T10:10:00+09:00',
+                                       '2026-10-01T11:59:00+09:00', '2026-10-01T12:00:00+09:00')]
+    buckets = [{'timestamp': '2026-10-01T10:00:00+09:00', 'SOL': [1, 3, 1, 2]},
+               {'timestamp': '2026-10-01T12:00:00+09:00', 'SOL': [5, 5, 4, 4]}]
+    raw = [{'timestamp': '2026-10-01T10:05:00+09:00', 'prices': {'SOL': 7}},
+           {'timestamp': '2026-10-01T11:00:00+09:00', 'prices': {'SOL': 'x'}}]
+    assert node(['alignHistoryPrices'], f'alignHistoryPrices({json.dumps(hist)}, {json.dumps(buckets)}, "SOL")') == [None, 2, 2, 4]
+    assert node(['alignHistoryPrices'], f'alignHistoryPrices({json.dumps(hist)}, {json.dumps(raw)}, "SOL")') == [None, 7, 7, 7]
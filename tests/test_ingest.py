@@ -0,0 +1,43 @@
+import json
+import os
+import threading
+import time
+
+import update_data
+
+
+def test_parallel_reads_share_one_pass(dashboard, monkeypatch):
+    path = dashboard / 'prices_2026-01-01.jsonl'
+    lines = [json.dumps({'timestamp': f'2026-01-01T00:00:{i:02d}', 'prices': {'SOL': 100 + i}}) for i in range(50)]
+    path.write_text('\n'.join(lines[:10]) + '\n')
+    assert len(update_data.read_jsonl_incremental(str(path))) == 10
+    with open(path, 'a') as f:
+        f.write('\n'.join(lines[10:]) + '\n')
+
+    parse = update_data._parse_jsonl_lines
+    def slow_parse(*args):
+        time.sleep(0.05)  # widen the window in which both readers would see the same offset
+        parse(*args)
+    monkeypatch.setattr(update_data, '_parse_jsonl_lines', slow_parse)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(update_data.read_jsonl_incremental(str(path))))
+               for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [len(r) for r in results] == [50, 50]
+    entry = update_data._ingest_state[str(path)]
+    assert entry['offset'] == os.path.getsize(path)
+    assert len(update_data.read_jsonl_incremental(str(path))) == 50
+
+
+def test_appended_lines_are_parsed_once(dashboard):
+    path = dashboard / 'trades.jsonl'
+    path.write_text('{"a": 1}\n{"a": 2}\n{"a": 3')
+    assert [r['a'] for r in update_data.read_jsonl_incremental(str(path))] == [1, 2]
+    with open(path, 'a') as f:
+        f.write('}\n{"a": 4}\n')
+    assert [r['a'] for r in update_data.read_jsonl_incremental(str(path))] == [1, 2, 3, 4]
@@ -0,0 +1,93 @@
+import json
+import os
+
+import update_data
+
+
+def test_remove_output_drops_manifest_entry(dashboard):
+    path = os.path.join(update_data.CONFIG['OUTPUT_DIR'], 'example.json')
+    assert update_data.write_json_output(path, {'a': 1})
+    assert 'example.json' in update_data._load_manifest()['files']
+    update_data.remove_output(path)
+    assert not os.path.exists(path)
+    assert 'example.json' not in update_data._load_manifest()['files']
+
+
+def _write_counted(path, data, **kwargs):
+    counters = {'bytes_read': 0, 'records_parsed': 0, 'bytes_written': 0}
+    update_data._stage_counters.current = counters
+    try:
+        return update_data.write_json_output(path, data, **kwargs), counters['bytes_written']
+    finally:
+        update_data._stage_counters.current = None
+
+
+def test_unchanged_output_is_not_rewritten(dashboard, monkeypatch):
+    monkeypatch.setattr(update_data, 'JSON_BATCH', 2)
+    path = os.path.join(update_data.CONFIG['OUTPUT_DIR'], 'records.json')
+    records = [{'i': i, 'name': f'record {i}'} for i in range(20)]
+    assert _write_counted(path, records, indent=2)[0]
+    mtime = os.stat(path).st_mtime_ns
+
+    opened = []
+    real_open = open
+    def tracking_open(file, mode='r', *args, **kwargs):
+        if 'w' in mode and str(file).startswith(path):
+            opened.append(file)
+        return real_open(file, mode, *args, **kwargs)
+    monkeypatch.setattr('builtins.open', tracking_open)
+    wrote, written = _write_counted(path, (r for r in records), indent=2)
+    assert (wrote, written) == (False, 0)
+    assert [f for f in opened if not f.endswith(('.gz', '.br'))] == []
+    assert os.stat(path).st_mtime_ns == mtime
+
+
+def test_changed_output_matches_json_dumps(dashboard, monkeypatch):
+    monkeypatch.setattr(update_data, 'JSON_BATCH', 2)
+    path = os.path.join(update_data.CONFIG['OUTPUT_DIR'], 'records.json')
+    records = [{'i': i} for i in range(20)]
+    update_data.write_json_output(path, records, indent=2)
+    for changed in (records[:-1] + [{'i': 'last'}], records[:5], records + [{'i': 20}], [{'x': 0}] + records[1:]):
+        assert update_data.write_json_output(path, changed, indent=2)
+        with open(path, encoding='utf-8') as f:
+            assert f.read() == json.dumps(changed, indent=2, ensure_ascii=False)
+        entry = update_data._load_manifest()['files']['records.json']
+        assert entry['size'] == os.path.getsize(path)
+
+
+def test_save_manifest_prunes_missing_files(dashboard):
+    output_dir = update_data.CONFIG['OUTPUT_DIR']
+    os.makedirs(os.path.join(output_dir, 'trades'))
+    kept = os.path.join(output_dir, 'trades', 'trades_2026-02.json')
+    gone = os.path.join(output_dir, 'trades', 'trades_2026-01.json')
+    update_data.write_json_output(kept, [])
+    update_data.write_json_output(gone, [])
+    os.remove(gone)
+    update_data.save_manifest()
+    assert 'trades/trades_2026-01.json' in update_data._load_manifest()['files']
+    update_data.save_manifest(prune=True)
+    with open(update_data.MANIFEST_PATH, encoding='utf-8') as f:
+        assert set(json.load(f)['files']) == {'trades/trades_2026-02.json'}
+
+
+def test_incompressible_output_is_not_recompressed(dashboard, monkeypatch):
+    monkeypatch.setitem(update_data.CONFIG, 'PRECOMPRESS', True)
+    path = os.path.join(update_data.CONFIG['OUTPUT_DIR'], 'tiny.json')
+    update_data.write_json_output(path, {})
+    entry = update_data._load_manifest()['files']['tiny.json']
+    assert entry['incompressible'] == sorted(suffix for suffix, _ in update_data._compressors())
+    assert not os.path.exists(path + '.gz')
+
+    compressors = update_data._compressors
+    made = []
+    def counting():
+        return [(suffix, lambda make=make, suffix=suffix: made.append(suffix) or make()) for suffix, make in compressors()]
+    monkeypatch.setattr(update_data, '_compressors', counting)
+    assert not update_data.write_json_output(path, {})
+    assert made == []
+
+    # New content gets a fresh entry, so it is compressed again
+    update_data.write_json_output(path, [{'key': 'value'} for _ in range(100)])
+    assert made
+    assert 'incompressible' not in update_data._load_manifest()['files']['tiny.json']
+    assert os.path.exists(path + '.gz')
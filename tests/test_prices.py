@@ -0,0 +1,115 @@
+import json
+from datetime import datetime
+
+import pytest
+import requests
+
+import update_data
+
+T0 = 1_800_000_000.0
+COINGECKO = {'solana': {'usd': 150.0}, 'bitcoin': {'usd': 60000.0}, 'binancecoin': {'usd': 600.0},
+             'ethereum': {'usd': 3000.0}}
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture
+def prices(dashboard, monkeypatch):
+    """CoinGecko と時計を差し替える。calls に各リクエストの params が入る"""
+    state = {'now': T0, 'data': COINGECKO, 'fail': False, 'calls': []}
+
+    def fake_get(url, params=None, timeout=None):
+        state['calls'].append(params)
+        if state['fail']:
+            raise requests.ConnectionError('offline')
+        return FakeResponse(state['data'])
+
+    monkeypatch.setattr(update_data.requests, 'get', fake_get)
+    monkeypatch.setattr(update_data.time, 'time', lambda: state['now'])
+    monkeypatch.setattr(update_data, '_price_refresh', None)
+    monkeypatch.setitem(update_data.CONFIG, 'PRICE_TTL', 300)
+    return state
+
+
+def _get():
+    result = update_data.get_crypto_prices()
+    if update_data._price_refresh is not None:
+        update_data._price_refresh.join()
+    return result
+
+
+def test_cold_cache_fetches_all_assets_in_one_request(prices):
+    assert _get() == {'sol_price': 150.0, 'btc_price': 60000.0, 'bnb_price': 600.0, 'eth_price': 3000.0}
+    assert len(prices['calls']) == 1
+    assert set(prices['calls'][0]['ids'].split(',')) == set(update_data.PRICE_ASSETS.values())
+    with open(update_data.PRICE_CACHE_PATH) as f:
+        assert json.load(f)['SOL'] == {'price': 150.0, 'at': T0, 'source': 'coingecko'}
+
+
+def test_fresh_prices_are_served_without_a_request(prices):
+    _get()
+    prices['now'] = T0 + 299
+    prices['data'] = {k: {'usd': 1.0} for k in COINGECKO}
+    assert _get()['sol_price'] == 150.0
+    assert len(prices['calls']) == 1
+
+
+def test_stale_prices_are_served_while_refreshing(prices):
+    _get()
+    prices['now'] = T0 + 301
+    prices['data'] = dict(COINGECKO, solana={'usd': 155.0})
+    assert _get()['sol_price'] == 150.0  # last known value, refresh runs in the background
+    assert len(prices['calls']) == 2
+    assert _get()['sol_price'] == 155.0  # refreshed, and fresh again
+    assert len(prices['calls']) == 2
+
+
+def test_outage_keeps_the_last_known_prices(prices):
+    _get()
+    prices['now'] = T0 + 3600
+    prices['fail'] = True
+    assert _get()['btc_price'] == 60000.0
+    assert _get()['btc_price'] == 60000.0
+    with open(update_data.PRICE_CACHE_PATH) as f:
+        assert json.load(f)['BTC']['at'] == T0
+
+
+def test_outage_with_no_cache_returns_zeros(prices):
+    prices['fail'] = True
+    assert _get() == {'sol_price': 0, 'btc_price': 0, 'bnb_price': 0, 'eth_price': 0}
+
+
+def _write_bot_prices(dashboard, at, **values):
+    stamp = datetime.fromtimestamp(at).isoformat()
+    path = dashboard / 'bot' / 'prices' / f'prices_{stamp[:10]}.jsonl'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('a') as f:
+        f.write(json.dumps({'timestamp': stamp, 'prices': values}) + '\n')
+
+
+def test_bot_price_log_seeds_the_cache_without_network(prices, dashboard):
+    _write_bot_prices(dashboard, T0 - 60, SOL=140.0, BTC=59000.0, BNB=590.0, ETH=2900.0)
+    assert _get() == {'sol_price': 140.0, 'btc_price': 59000.0, 'bnb_price': 590.0, 'eth_price': 2900.0}
+    assert prices['calls'] == []
+    with open(update_data.PRICE_CACHE_PATH) as f:
+        assert json.load(f)['ETH']['source'] == 'bot'
+
+
+def test_older_bot_prices_do_not_replace_newer_ones(prices, dashboard):
+    _get()
+    _write_bot_prices(dashboard, T0 - 60, SOL=1.0, BTC=1.0, BNB=1.0, ETH=1.0)
+    assert _get()['sol_price'] == 150.0
+    _write_bot_prices(dashboard, T0 + 10, SOL=151.0, BTC=0, BNB='n/a', ETH=3001.0)
+    result = _get()
+    assert (result['sol_price'], result['btc_price'], result['bnb_price'], result['eth_price']) == \
+        (151.0, 60000.0, 600.0, 3001.0)
+    assert len(prices['calls']) == 1
@@ -0,0 +1,145 @@
+import contextlib
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import update_data
+
+
+def _write_jsonl(path, records):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(''.join(json.dumps(r) + '\n' for r in records))
+
+
+@pytest.fixture
+def bot_logs(dashboard):
+    bot = dashboard / 'bot'
+    now = datetime.now()
+    day = now.strftime('%Y-%m-%d')
+    old_day = (now - timedelta(days=10)).strftime('%Y-%m-%d')
+    t1 = (now - timedelta(hours=2)).isoformat()
+    t2 = (now - timedelta(hours=1)).isoformat()
+    old = (now - timedelta(days=10)).isoformat()
+
+    _write_jsonl(bot / 'trades' / f'trades_{day}.jsonl', [
+        {'timestamp': t1, 'strategy': 'A', 'input_token': 'SOL', 'output_token': 'USDC', 'direction': 'sell'},
+        {'timestamp': t1, 'strategy': 'A', 'input_token': 'SOL', 'output_token': 'USDC', 'direction': 'sell'},
+        {'strategy': 'B', 'input_token': 'USDC', 'output_token': 'SOL', 'direction': 'buy'},
+        {'timestamp': t2, 'signature': 'sig1', 'strategy': 'A', 'direction': 'buy', 'amount': 1},
+        {'timestamp': t2, 'signature': 'sig1', 'strategy': 'A', 'direction': 'buy', 'amount': 1},
+        {'timestamp': t2, 'signature': '', 'strategy': 'A', 'direction': 'sell'},
+        {'timestamp': t2, 'signature': '', 'strategy': 'A', 'direction': 'sell'},
+    ])
+    _write_jsonl(bot / 'signal_logs' / f'signals_{old_day}.jsonl', [
+        {'checked_at': old, 'btc_price': 69000, 'cci': 1},
+        {'checked_at': old, 'btc_price': 632, 'cci': 2},
+    ])
+    _write_jsonl(bot / 'signal_logs' / f'signals_{day}.jsonl', [
+        {'checked_at': t1, 'btc_price': 69000, 'cci': 1},
+        {'checked_at': t1, 'btc_price': 632, 'cci': 2},
+        {'checked_at': t2, 'pair': 'BTCUSDT', 'price': 69100, 'cci': 3},
+        {'checked_at': t2, 'pair': 'BTCUSDT', 'price': 69100, 'cci': 3},
+        {'checked_at': 'not a time', 'pair': 'BNBUSDT', 'price': 630},
+        {'pair': 'BNBUSDT', 'price': 631},
+    ])
+    _write_jsonl(bot / 'portfolio_snapshots' / f'snapshots_{day}.jsonl', [
+        {'timestamp': t1, 'total_usd': 100},
+        {'timestamp': t1, 'total_usd': 101},
+        {'timestamp': '', 'total_usd': 102},
+        {'total_usd': 103},
+    ])
+    _write_jsonl(bot / 'prices' / f'prices_{day}.jsonl', [
+        {'timestamp': t1, 'prices': {'SOL': 1}},
+        {'timestamp': t1, 'prices': {'SOL': 2}},
+        {'prices': {'SOL': 3}},
+    ])
+    return bot
+
+
+def _plain(records):
+    return [dict(r) for r in records]
+
+
+def _load_all(bot):
+    store = update_data.TradeStore.load()
+    signals, history, _ = update_data.load_recent_signals(7, 30)
+    db = update_data.RecordDB.open()
+    if db is None:
+        snapshots = update_data.read_jsonl_files(str(bot / 'portfolio_snapshots' / 'snapshots_*.jsonl'))
+        prices = update_data.read_jsonl_files(str(bot / 'prices' / 'prices_*.jsonl'))
+    else:
+        with contextlib.closing(db):
+            db.sync('snapshots')
+            db.sync('prices')
+            snapshots, prices = list(db.snapshots()), list(db.prices())
+    return {
+        'trades': _plain(store.trades),
+        'signals': _plain(signals),
+        'history': _plain(history),
+        'snapshots': _plain(snapshots),
+        'prices': _plain(prices),
+    }
+
+
+def _dedupe(records, key):
+    """同じキーの2件目以降を除く（キーがないレコードはすべて残す）"""
+    seen = set()
+    kept = []
+    for r in records:
+        k = key(r)
+        if k is not None and k in seen:
+            continue
+        seen.add(k)
+        kept.append(r)
+    return kept
+
+
+def _signal_key(signal):
+    if signal.get('pair') is None or update_data._iso_epoch(update_data._signal_time(signal)) is None:
+        return None
+    return signal['pair'], update_data._signal_time(signal)
+
+
+def test_sqlite_matches_jsonl(bot_logs, monkeypatch):
+    jsonl = _load_all(bot_logs)
+    assert len(jsonl['trades']) == 7
+    assert len(jsonl['signals']) == 6
+    assert len(jsonl['history']) == 2
+    assert len(jsonl['snapshots']) == 4
+    assert len(jsonl['prices']) == 3
+
+    # The SQLite store drops repeated signatures and (pair, checked_at); rows without a key all stay
+    expected = dict(jsonl,
+                    trades=_dedupe(jsonl['trades'], lambda t: t.get('signature') or None),
+                    signals=_dedupe(jsonl['signals'], _signal_key))
+    assert len(expected['trades']) == 6
+    assert len(expected['signals']) == 5
+
+    monkeypatch.setitem(update_data.CONFIG, 'SQLITE_PATH', '1')
+    assert _load_all(bot_logs) == expected
+    # A second sync only reads appended lines and must not duplicate or drop rows
+    assert _load_all(bot_logs) == expected
+
+
+def test_sqlite_dedupes_across_files(bot_logs, monkeypatch):
+    monkeypatch.setitem(update_data.CONFIG, 'SQLITE_PATH', '1')
+    first = _load_all(bot_logs)
+    later = bot_logs / 'trades' / 'trades_2099-01-01.jsonl'
+    _write_jsonl(later, [{'timestamp': '2099-01-01T00:00:00', 'signature': 'sig1', 'strategy': 'A'},
+                         {'timestamp': '2099-01-01T00:00:00', 'signature': 'sig2', 'strategy': 'A'}])
+    trades = _load_all(bot_logs)['trades']
+    assert [t.get('signature') for t in trades].count('sig1') == 1
+    assert len(trades) == len(first['trades']) + 1
+
+
+def test_sqlite_resync_after_rewrite(bot_logs, monkeypatch):
+    monkeypatch.setitem(update_data.CONFIG, 'SQLITE_PATH', '1')
+    _load_all(bot_logs)
+    prices = next((bot_logs / 'prices').iterdir())
+    _write_jsonl(prices, [{'timestamp': 'x', 'prices': {'SOL': 9}}])
+    db = update_data.RecordDB.open()
+    with contextlib.closing(db):
+        db.sync('prices')
+        assert list(db.prices()) == [{'timestamp': 'x', 'prices': {'SOL': 9}}]
@@ -0,0 +1,73 @@
+import json
+import os
+import pickle
+
+import pytest
+
+import update_data
+
+TRADES = [
+    {'timestamp': '2026-10-01T00:00:00', 'strategy': 'CCI', 'direction': 'buy', 'input_token': 'USDC',
+     'output_token': 'SOL', 'input_amount': 10.5, 'extra': {'pnl_usd': None, 'tags': ['a', 'ü']}},
+    {'zz_custom': 1, 'signature': '5abc', 'status': 'Success', 'fee_lamports': 5000, 'timestamp': '2026-10-01T00:01:00'},
+    {'strategy': 'GRID', 'reason': '日本語', 'error': None},
+    {},
+]
+
+
+@pytest.mark.parametrize('line', TRADES)
+def test_to_dict_matches_the_parsed_line(line):
+    record = update_data.TradeRecord.from_dict(line)
+    assert record.to_dict() == line
+    assert list(record.to_dict()) == list(line)
+    assert record == line and dict(record) == line
+
+
+def test_json_output_is_identical_to_plain_dicts(dashboard):
+    records = [update_data.TradeRecord.from_dict(line) for line in TRADES]
+    for indent in (None, 2):
+        plain = json.dumps(TRADES, ensure_ascii=False, indent=indent)
+        typed = json.dumps(records, ensure_ascii=False, indent=indent, default=update_data._json_default)
+        assert typed == plain
+
+    out = update_data.CONFIG['OUTPUT_DIR']
+    update_data.write_json_output(os.path.join(out, 'plain.json'), {'trades': TRADES}, indent=2)
+    update_data.write_json_output(os.path.join(out, 'typed.json'), {'trades': records}, indent=2)
+    with open(os.path.join(out, 'plain.json'), 'rb') as a, open(os.path.join(out, 'typed.json'), 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_mutations_keep_dict_key_order():
+    line = {'timestamp': 't', 'custom': 1, 'strategy': 'CCI'}
+    record = update_data.TradeRecord.from_dict(line)
+    plain = dict(line)
+    for target in (record, plain):
+        target['unix_time'] = 5
+        target['more'] = 2
+        del target['custom']
+        target['strategy'] = 'GRID'
+    assert list(record.to_dict().items()) == list(plain.items())
+    assert record.strategy == 'GRID' and record.get('custom') is None
+
+
+@pytest.mark.parametrize('record_type', [update_data.TradeRecord, update_data.SignalRecord, update_data.SnapshotRecord])
+def test_records_pickle_round_trip(record_type):
+    line = {'timestamp': 't', 'pair': 'BTCUSDT', 'total_usd': 1.0, 'custom': [1, 2]}
+    record = record_type.from_dict(line)
+    restored = pickle.loads(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+    assert type(restored) is record_type
+    assert list(restored.to_dict().items()) == list(line.items())
+    assert restored.timestamp == 't'
+
+
+def test_typed_records_survive_the_ingest_state(dashboard):
+    path = dashboard / 'trades_2026-10-01.jsonl'
+    path.write_text(''.join(json.dumps(line, ensure_ascii=False) + '\n' for line in TRADES))
+    first = update_data.read_jsonl_incremental(str(path), update_data.TradeRecord)
+    update_data.save_ingest_state()
+
+    update_data._ingest_state = None
+    again = update_data.read_jsonl_incremental(str(path), update_data.TradeRecord)
+    assert all(type(r) is update_data.TradeRecord for r in again)
+    assert [r.to_dict() for r in again] == [r.to_dict() for r in first] == TRADES
+    assert [list(r) for r in again] == [list(line) for line in TRADES]
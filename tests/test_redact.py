@@ -0,0 +1,75 @@
+import random
+import re
+
+import pytest
+
+import update_data
+
+GHP = 'ghp_' + 'a1B2' * 9
+MTQ3 = 'MTQ3' + 'x.Y_z-' * 9
+ANT = 'sk-ant-api03-' + 'Q' * 20
+
+
+def _sequential(content):
+    """user-021 以前の、パターンごとに順番に re.sub する実装（比較用）"""
+    counts = {}
+    for name, pattern, replacement in update_data.SECRET_PATTERNS:
+        content, n = re.subn(pattern, replacement, content)
+        if n:
+            counts[name] = n
+    return content, counts
+
+
+@pytest.fixture
+def stats():
+    update_data.reset_redaction_stats()
+    update_data._redaction_cache.clear()
+    yield
+    update_data._redaction_cache.clear()
+
+
+CASES = [
+    'nothing to see here',
+    f'token {GHP} end',
+    f'{GHP}{GHP}',                               # adjacent, same rule
+    f'{GHP}{ANT}',                               # adjacent, different rules
+    f'sk-ant-{MTQ3}',                            # MTQ3 inside an sk-ant key: MTQ3 is replaced first
+    f'{MTQ3[:20]}{GHP}{MTQ3[20:]}',              # ghp token inside an MTQ3 run
+    f'MATON_API_KEY={ANT} {GHP}\nnext line',     # other secrets on a MATON_API_KEY line
+    f'daughter insect {GHP} then file and {ANT}',  # secrets inside a seed phrase
+    f'daughter insect file daughter insect x file',
+    f'{GHP[:-1]}',                               # one character short
+]
+
+
+@pytest.mark.parametrize('content', CASES)
+def test_redact_matches_sequential_rules(stats, content):
+    expected, counts = _sequential(content)
+    assert update_data.redact(content) == expected
+    assert update_data.redaction_stats()['matches'] == {
+        name: counts.get(name, 0) for name, _, _ in update_data.SECRET_PATTERNS}
+
+
+def test_redact_matches_sequential_rules_on_random_mixtures(stats):
+    rng = random.Random(21)
+    parts = [GHP, MTQ3, ANT, 'MATON_API_KEY=', 'daughter insect ', ' file', 'sk-ant-', 'MTQ3', 'ghp_',
+             ' ', '\n', 'abc', '-', '_', '.', '日本語']
+    for _ in range(2000):
+        content = ''.join(rng.choice(parts) for _ in range(rng.randint(0, 12)))
+        update_data._redaction_cache.clear()
+        update_data.reset_redaction_stats()
+        expected, counts = _sequential(content)
+        assert update_data.redact(content) == expected, content
+        matches = update_data.redaction_stats()['matches']
+        assert {name: n for name, n in matches.items() if n} == counts, content
+
+
+def test_redaction_counters_accumulate_and_count_cache_hits(stats):
+    update_data.redact(f'{GHP} {GHP}')
+    update_data.redact(f'{GHP} {GHP}')
+    update_data.redact('clean')
+    result = update_data.redaction_stats()
+    assert result['documents'] == 3
+    assert result['cache_hits'] == 1
+    assert result['matches']['github_token'] == 4
+    assert sum(result['matches'].values()) == 4
@@ -0,0 +1,96 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import update_data
+
+
+class StubRpc(BaseHTTPRequestHandler):
+    """JSON-RPCのスタブ。server.batch_status が None ならバッチに答え、数値ならそのステータスで拒否する"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(payload)
+        if isinstance(payload, list):
+            status = self.server.batch_status
+            if status is not None:
+                return self._reply(status, {'error': 'batch requests are not supported'})
+            if self.server.batch_body is not None:
+                return self._reply(200, self.server.batch_body)
+            return self._reply(200, [self._answer(call) for call in reversed(payload)])
+        return self._reply(200, self._answer(payload))
+
+    def _answer(self, call):
+        return {'jsonrpc': '2.0', 'id': call['id'], 'result': {'method': call['method'], 'params': call['params']}}
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def rpc_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubRpc)
+    server.requests = []
+    server.batch_status = None
+    server.batch_body = None
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+CALLS = [('getBalance', ['wallet']), ('getSlot', [])]
+EXPECTED = [{'method': 'getBalance', 'params': ['wallet']}, {'method': 'getSlot', 'params': []}]
+
+
+def _client(server):
+    return update_data.SolanaRpcClient([f'http://127.0.0.1:{server.server_port}/'], timeout=5, retries=0)
+
+
+def test_batch_results_in_call_order(rpc_server):
+    with _client(rpc_server) as client:
+        assert [r['result'] for r in client.batch(CALLS)] == EXPECTED
+    assert len(rpc_server.requests) == 1
+
+
+@pytest.mark.parametrize('status', [400, 403, 413])
+def test_rejected_batch_falls_back_to_single_calls(rpc_server, status):
+    rpc_server.batch_status = status
+    with _client(rpc_server) as client:
+        assert [r['result'] for r in client.batch(CALLS)] == EXPECTED
+        assert [r['result'] for r in client.batch(CALLS)] == EXPECTED
+    # The second batch goes straight to single calls
+    assert [isinstance(p, list) for p in rpc_server.requests] == [True, False, False, False, False]
+
+
+def test_non_list_batch_response_falls_back(rpc_server):
+    rpc_server.batch_body = {'jsonrpc': '2.0', 'error': {'code': -32600, 'message': 'batch disabled'}}
+    with _client(rpc_server) as client:
+        assert [r['result'] for r in client.batch(CALLS)] == EXPECTED
+
+
+def test_server_error_is_not_treated_as_batch_rejection(rpc_server):
+    rpc_server.batch_status = 500
+    with _client(rpc_server) as client:
+        with pytest.raises(update_data.RpcError):
+            client.batch(CALLS)
+    assert all(isinstance(p, list) for p in rpc_server.requests)
+
+
+def test_close_shuts_down_the_pool(rpc_server):
+    client = _client(rpc_server)
+    client.batch(CALLS)
+    client.close()
+    with pytest.raises(RuntimeError):
+        client._pool.submit(lambda: None)
@@ -0,0 +1,33 @@
+import json
+
+import update_data
+
+SAMPLES = ['金と株の相場', 'BTC/USDT 急落', 'Ｆｕｌｌ－ｗｉｄｔｈ ＡＢＣ１２３', 'snake_case-word x', '  ', '日本語のメモ、金']
+
+
+def test_search_terms_index_characters_and_bigrams():
+    assert update_data.search_terms('金と株') == ['金', 'と', '株', '金と', 'と株']
+    assert update_data.search_terms('Ａb_c') == ['a', 'b', 'ab', 'c']
+    assert update_data.search_terms('') == []
+
+
+def test_search_shard_is_stable():
+    assert update_data.search_shard('a') == ord('a') % update_data.SEARCH_SHARDS
+    assert update_data.search_shard('金と') == (ord('金') * 31 + ord('と')) % update_data.SEARCH_SHARDS
+    assert all(0 <= update_data.search_shard(t) < update_data.SEARCH_SHARDS for t in update_data.search_terms(SAMPLES[0]))
+
+
+def test_query_terms_are_indexed_and_sharded_like_python(node):
+    query_terms = node(['searchTerms', 'searchShard'],
+                       f'{json.dumps(SAMPLES)}.map(s => searchTerms(s).map(t => [t, searchShard(t, {update_data.SEARCH_SHARDS})]))')
+    for text, query in zip(SAMPLES, query_terms):
+        indexed = set(update_data.search_terms(text))
+        for term, shard in query:
+            assert term in indexed, (text, term)
+            assert shard == update_data.search_shard(term)
+
+
+def test_one_character_query_word_matches_inside_longer_runs(node):
+    terms = node(['searchTerms'], "searchTerms('株 相場')")
+    assert terms == ['株', '相場']
+    assert set(terms) <= set(update_data.search_terms('金と株の相場'))
@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+import serve
+
+
+@pytest.fixture
+def served(tmp_path):
+    data = tmp_path / 'data'
+    (data / 'docs' / 'reports').mkdir(parents=True)
+    (data / 'manifest.json').write_text(json.dumps({'files': {
+        'trades.json': {'sha256': 'ab' * 32},
+        'trades/trades_2026-01.json': {'sha256': 'cd' * 32},
+    }}))
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize('url, immutable', [
+    ('/data/trades.json?v=' + 'ab' * 8, True),
+    ('/data/trades/trades_2026-01.json?v=' + 'cd' * 8, True),
+    ('/data/trades.json?v=' + 'cd' * 8, False),
+    ('/data/trades.json?v=anything', False),
+    ('/data/trades.json', False),
+    ('/data/docs/reports/0123456789abcdef.md?v=0123456789abcdef', True),
+    ('/data/creative/variants/0123456789abcdef-400.webp?v=0123456789abcdef', True),
+    ('/data/docs/reports/0123456789abcdef.md?v=fedcba9876543210', False),
+    ('/data/unknown.json?v=' + 'ab' * 8, False),
+    ('/dashboard.js?v=' + 'ab' * 8, False),
+])
+def test_immutable_only_for_current_hash(served, url, immutable):
+    assert serve.is_immutable(url, served) is immutable
+
+
+def test_manifest_changes_are_picked_up(served, tmp_path):
+    url = '/data/trades.json?v=' + 'ab' * 8
+    assert serve.is_immutable(url, served)
+    manifest = tmp_path / 'data' / 'manifest.json'
+    manifest.write_text(json.dumps({'files': {'trades.json': {'sha256': 'ef' * 32}}}))
+    st = os.stat(manifest)
+    os.utime(manifest, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert not serve.is_immutable(url, served)
@@ -0,0 +1,62 @@
+import json
+import math
+import os
+from datetime import datetime, timedelta
+
+import update_data
+
+
+def _write_signal_logs(bot_dir, now, days):
+    logs = bot_dir / 'signal_logs'
+    logs.mkdir(parents=True)
+    by_day = {}
+    for h in range(days * 24, 0, -1):
+        at = now - timedelta(hours=h, minutes=30)
+        signal = {'checked_at': at.isoformat(), 'pair': 'BTCUSDT', 'price': 60000 + h, 'cci': 10.0, 'action': 'NONE'}
+        by_day.setdefault(at.strftime('%Y-%m-%d'), []).append(signal)
+    for day, signals in by_day.items():
+        (logs / f'signals_{day}.jsonl').write_text(''.join(json.dumps(s) + '\n' for s in signals))
+    return [s for day in sorted(by_day) for s in by_day[day]]
+
+
+def test_recent_window_and_history_split(dashboard):
+    now = datetime.now()
+    everything = _write_signal_logs(dashboard / 'bot', now, 35)
+    signals, history, _ = update_data.load_recent_signals(7, 30)
+    cutoff = (now - timedelta(days=7)).isoformat()
+    history_cutoff = (now - timedelta(days=30)).isoformat()
+    assert [s['checked_at'] for s in signals] == [s['checked_at'] for s in everything if s['checked_at'] >= cutoff]
+    assert [s['checked_at'] for s in history] == [
+        s['checked_at'] for s in everything if history_cutoff <= s['checked_at'] < cutoff]
+
+    same, none, _ = update_data.load_recent_signals(7)
+    assert none == []
+    assert [s['checked_at'] for s in same] == [s['checked_at'] for s in signals]
+
+
+def test_signal_pairs_skips_unusable_prices():
+    signals = [
+        {'pair': 'BTCUSDT', 'price': 69000},
+        {'pair': 'BNBUSDT', 'price': 'n/a'},
+        {'pair': 'BNBUSDT', 'price': 632},
+        {'btc_price': 640},
+        {'btc_price': 'bad'},
+        {'btc_price': -5},
+        {'btc_price': math.nan},
+        {'btc_price': 70000},
+        {},
+    ]
+    assert update_data._signal_pairs(signals) == [
+        'BTCUSDT', 'BNBUSDT', 'BNBUSDT', 'BNBUSDT', None, None, None, 'BTCUSDT', 'BTCUSDT']
+
+
+def test_signal_series_ignores_bad_record():
+    now = datetime.now()
+    signals = [
+        {'checked_at': (now - timedelta(minutes=10)).isoformat(), 'pair': 'BTCUSDT', 'price': 69000, 'cci': 1},
+        {'checked_at': (now - timedelta(minutes=5)).isoformat(), 'btc_price': 'oops', 'cci': 2},
+    ]
+    series = update_data.signal_series(signals)
+    assert list(series['pairs']) == ['BTCUSDT']
+    assert series['pairs']['BTCUSDT']['windows']['1d']['t'] == [int(_ts) for _ts in [
+        datetime.fromisoformat(signals[0]['checked_at']).timestamp()]]
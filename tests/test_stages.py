@@ -0,0 +1,34 @@
+import pytest
+
+import update_data
+
+
+def _stage(name, func, inputs=()):
+    return {'name': name, 'func': func, 'inputs': list(inputs)}
+
+
+def test_failed_stages_are_measured(dashboard):
+    def boom():
+        raise RuntimeError('boom')
+
+    stages = [
+        _stage('ok', lambda: 1),
+        _stage('broken', boom),
+        _stage('after', lambda value: value, inputs=['broken']),
+    ]
+    results, metrics, errors = update_data.run_stages(stages, max_workers=2)
+
+    assert results == {'ok': 1}
+    assert set(errors) == {'broken', 'after'}
+    assert 'failed' not in metrics['ok']
+    assert metrics['broken']['failed'] is True
+    assert metrics['broken']['wall'] >= 0
+    assert 'after' not in metrics  # skipped, never ran
+
+
+def test_run_instrumented_reraises_with_metrics():
+    metrics = {}
+    with pytest.raises(ValueError):
+        update_data.run_instrumented(_stage('bad', lambda: int('x')), [], 0.0, metrics=metrics)
+    assert metrics['failed'] is True
+    assert {'wall', 'cpu', 'bytes_read', 'bytes_written'} <= set(metrics)
@@ -0,0 +1,130 @@
+import random
+
+import update_data
+
+
+def _store(trades):
+    store = update_data.TradeStore()
+    for trade in trades:
+        store.add(dict(trade), '2026-10-01')
+    return store
+
+
+def test_meme_data_keeps_case_sensitive_predicates(dashboard):
+    (dashboard / 'bot' / 'onchain_tx_cache').mkdir(parents=True)
+    trades = [
+        {'strategy': 'MEME_A', 'direction': 'buy', 'input_amount': 10, 'timestamp': '2026-10-01T00:00:00'},
+        {'strategy': 'MEME_A', 'direction': 'sell', 'output_amount': 12, 'timestamp': '2026-10-01T01:00:00'},
+        {'strategy': 'MEME_A', 'direction': 'SELL', 'output_amount': 100, 'timestamp': '2026-10-01T02:00:00'},
+        {'strategy': 'MEME_A', 'direction': 'Buy', 'input_amount': 100, 'timestamp': '2026-10-01T03:00:00'},
+        {'strategy': 'meme_b', 'direction': 'sell', 'output_amount': 100, 'timestamp': '2026-10-01T04:00:00'},
+        {'strategy': 'CCI', 'direction': 'sell', 'output_amount': 100, 'timestamp': '2026-10-01T05:00:00'},
+    ]
+    meme = update_data.update_meme_data(_store(trades))
+
+    # Same rows as the pre-index filter: startswith('MEME') and direction == 'sell' / 'buy'
+    assert [dict(t) for t in meme['trades']] == [t for t in trades if t['strategy'].startswith('MEME')]
+    assert meme['onchain_pnl']['total_bought'] == 10
+    assert meme['onchain_pnl']['log_sold'] == 12
+
+
+def _legacy_live_stats(all_trades, strat_id, symbol):
+    """match_round_trips 導入前の O(買い×売り) のループ（比較用にそのまま残す）"""
+    pair_trades = [t for t in all_trades
+                   if (symbol.upper() in str(t.get('output_token', '')).upper()
+                       or symbol.upper() in str(t.get('input_token', '')).upper())
+                   and t.get('strategy', '').upper() == strat_id.upper()]
+    buys = [t for t in pair_trades if t.get('direction', '').lower() == 'buy' or t.get('input_token') == 'USDC']
+    sells = [t for t in pair_trades if t.get('direction', '').lower() == 'sell' or t.get('output_token') == 'USDC']
+    sorted_buys = sorted(buys, key=lambda t: t.get('timestamp', ''))
+    sorted_sells = sorted(sells, key=lambda t: t.get('timestamp', ''))
+    realized_pnl = 0.0
+    completed_trips = 0
+    total_invested = 0.0
+    total_returned = 0.0
+    used_sells = set()
+    for b in sorted_buys:
+        buy_usd = b.get('actual_input_amount', b.get('input_amount', 0)) if b.get('input_token') == 'USDC' else 0
+        for j, s in enumerate(sorted_sells):
+            if j in used_sells:
+                continue
+            if s.get('timestamp', '') > b.get('timestamp', ''):
+                sell_usd = s.get('actual_output_amount', s.get('output_amount', 0)) if s.get('output_token') == 'USDC' else 0
+                if sell_usd > 0.01:
+                    realized_pnl += sell_usd - buy_usd
+                    total_invested += buy_usd
+                    total_returned += sell_usd
+                    completed_trips += 1
+                    used_sells.add(j)
+                    break
+    return {
+        'total_trades': len(pair_trades),
+        'buys': len(buys),
+        'sells': len(sells),
+        'completed_trips': completed_trips,
+        'total_invested': round(total_invested, 2),
+        'total_returned': round(total_returned, 2),
+        'realized_pnl': round(realized_pnl, 2) if completed_trips > 0 else None,
+    }
+
+
+PAIRS = [('CCI', 'SOL'), ('CCI', 'WBTC'), ('GRID', 'SOL'), ('cci', 'BTC'), ('GRID', '')]
+
+
+def _assert_same_stats(trades):
+    groups = update_data.match_round_trips(trades, PAIRS)
+    for strat_id, symbol in PAIRS:
+        assert update_data.round_trip_stats(groups[(strat_id, symbol)]) == \
+            _legacy_live_stats(trades, strat_id, symbol), (strat_id, symbol)
+
+
+def test_round_trips_match_legacy_loop_on_edge_cases():
+    t = '2026-10-01T00:00:0{}'.format
+    trades = [
+        # Buy and sell at the same timestamp never pair; the later sell does
+        {'strategy': 'CCI', 'direction': 'buy', 'input_token': 'USDC', 'output_token': 'SOL', 'input_amount': 10, 'timestamp': t(1)},
+        {'strategy': 'CCI', 'direction': 'sell', 'input_token': 'SOL', 'output_token': 'USDC', 'output_amount': 11, 'timestamp': t(1)},
+        {'strategy': 'CCI', 'direction': 'sell', 'input_token': 'SOL', 'output_token': 'USDC', 'output_amount': 12, 'timestamp': t(2)},
+        # Two buys at the same time compete for the sells in file order
+        {'strategy': 'CCI', 'direction': 'buy', 'input_token': 'USDC', 'output_token': 'SOL', 'actual_input_amount': 5, 'input_amount': 6, 'timestamp': t(3)},
+        {'strategy': 'CCI', 'direction': 'buy', 'input_token': 'USDC', 'output_token': 'SOL', 'input_amount': 7, 'timestamp': t(3)},
+        # Dust sells (<= $0.01) are skipped but counted as sells
+        {'strategy': 'CCI', 'direction': 'sell', 'input_token': 'SOL', 'output_token': 'USDC', 'output_amount': 0.01, 'timestamp': t(4)},
+        {'strategy': 'CCI', 'direction': 'sell', 'input_token': 'SOL', 'output_token': 'USDC', 'actual_output_amount': 0.005, 'output_amount': 9, 'timestamp': t(5)},
+        # Non-USDC legs: the buy costs $0 and the sell returns $0 (never matched)
+        {'strategy': 'CCI', 'direction': 'buy', 'input_token': 'SOL', 'output_token': 'WBTC', 'input_amount': 3, 'timestamp': t(6)},
+        {'strategy': 'CCI', 'direction': 'sell', 'input_token': 'WBTC', 'output_token': 'SOL', 'output_amount': 3, 'timestamp': t(7)},
+        {'strategy': 'CCI', 'direction': 'sell', 'input_token': 'WBTC', 'output_token': 'USDC', 'output_amount': 8, 'timestamp': t(8)},
+        {'strategy': 'CCI', 'direction': 'sell', 'input_token': 'SOL', 'output_token': 'USDC', 'output_amount': 9, 'timestamp': t(8)},
+        # Direction missing: classified by the USDC leg; case of strategy/direction ignored
+        {'strategy': 'grid', 'input_token': 'USDC', 'output_token': 'SOL', 'input_amount': 4, 'timestamp': t(1)},
+        {'strategy': 'GRID', 'direction': 'SELL', 'input_token': 'SOL', 'output_token': 'USDC', 'output_amount': 4.5, 'timestamp': t(2)},
+        {'strategy': 'CCI', 'direction': 'buy', 'input_token': 'USDC', 'output_token': 'WBTC', 'input_amount': 1, 'timestamp': ''},
+        {'strategy': 'OTHER', 'direction': 'buy', 'input_token': 'USDC', 'output_token': 'SOL', 'input_amount': 1, 'timestamp': t(0)},
+    ]
+    _assert_same_stats(trades)
+    _assert_same_stats(list(reversed(trades)))
+
+
+def test_round_trips_match_legacy_loop_on_random_trades():
+    rng = random.Random(20261017)
+    for _ in range(200):
+        trades = []
+        for _ in range(rng.randint(0, 40)):
+            token = rng.choice(['SOL', 'WBTC', 'BONK'])
+            buy = rng.random() < 0.5
+            usdc = rng.random() < 0.8
+            trade = {
+                'strategy': rng.choice(['CCI', 'cci', 'GRID', 'TEST']),
+                'input_token': ('USDC' if usdc else 'SOL') if buy else token,
+                'output_token': token if buy else ('USDC' if usdc else 'SOL'),
+                'timestamp': f'2026-10-01T00:00:{rng.randint(0, 9):02d}',
+                'input_amount': round(rng.uniform(0, 20), 3),
+                'output_amount': rng.choice([0.0, 0.005, 0.01, round(rng.uniform(0, 20), 3)]),
+            }
+            if rng.random() < 0.8:
+                trade['direction'] = rng.choice(['buy', 'Buy']) if buy else rng.choice(['sell', 'SELL'])
+            if rng.random() < 0.2:
+                trade['actual_output_amount'] = round(rng.uniform(0, 0.02), 3)
+            trades.append(trade)
+        _assert_same_stats(trades)
@@ -0,0 +1,57 @@
+import sys
+
+import pytest
+
+import update_data
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify is Linux only')
+
+
+def _drain(watcher, rounds=5):
+    changed = set()
+    for _ in range(rounds):
+        events = watcher.wait(timeout=0.2)
+        if not events:
+            break
+        changed.update(events)
+    return changed
+
+
+def test_inotify_watches_new_subdirectories(tmp_path):
+    root = tmp_path / 'creative'
+    root.mkdir()
+    watcher = update_data.InotifyWatcher([(str(root), True)])
+
+    (root / 'new').mkdir()
+    _drain(watcher)
+    (root / 'new' / 'image.png').write_bytes(b'x')
+    assert str(root / 'new' / 'image.png') in _drain(watcher)
+
+
+def test_inotify_reports_files_written_before_the_watch(tmp_path):
+    root = tmp_path / 'creative'
+    root.mkdir()
+    watcher = update_data.InotifyWatcher([(str(root), True)])
+
+    (root / 'a' / 'b').mkdir(parents=True)
+    (root / 'a' / 'b' / 'image.png').write_bytes(b'x')
+    assert str(root / 'a' / 'b' / 'image.png') in _drain(watcher)
+
+
+def test_inotify_picks_up_roots_created_later(tmp_path):
+    root = tmp_path / 'bot' / 'trades'
+    watcher = update_data.InotifyWatcher([(str(root), False)])
+
+    root.mkdir(parents=True)
+    _drain(watcher)
+    (root / 'trades_2026-10-17.jsonl').write_text('{}\n')
+    assert str(root / 'trades_2026-10-17.jsonl') in _drain(watcher)
+
+    # Deleted and recreated roots are watched again
+    (root / 'trades_2026-10-17.jsonl').unlink()
+    root.rmdir()
+    _drain(watcher)
+    root.mkdir()
+    _drain(watcher)
+    (root / 'trades_2026-10-18.jsonl').write_text('{}\n')
+    assert str(root / 'trades_2026-10-18.jsonl') in _drain(watcher)
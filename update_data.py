@@ -4,67 +4,1260 @@ Clawdia Dashboard Data Updater
 ローカルJSONLファイルを読み込み、ダッシュボード用JSONファイルを生成する
 """
 import os
+import sys
 import json
 import glob
 from datetime import datetime, timedelta
 import requests
 import time
 import re
+import io
+import math
+import unicodedata
+import zlib
+import pickle
+import hashlib
+import sqlite3
+import contextlib
+import bisect
+import threading
+import traceback
+import argparse
+import atexit
+import cProfile
+import pstats
+import fnmatch
+import select
+import struct
+import ctypes
+import ctypes.util
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz siblings are written
+    brotli = None
+try:
+    import orjson
+except ImportError:  # optional: JSONL parsing falls back to msgspec or the stdlib json module
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: without Pillow the gallery serves the original images only
+    Image = ImageOps = None
 
 # Configuration
 CONFIG = {
     'SOLANA_RPC_URL': 'https://api.mainnet-beta.solana.com',
+    # Extra endpoints (comma separated) are queried concurrently with SOLANA_RPC_URL; the first good answer wins
+    'SOLANA_RPC_FALLBACK_URLS': [u for u in os.environ.get('SOLANA_RPC_FALLBACK_URLS', '').split(',') if u],
+    'RPC_TIMEOUT': float(os.environ.get('RPC_TIMEOUT', 10)),
+    'RPC_RETRIES': int(os.environ.get('RPC_RETRIES', 2)),
+    # Prices younger than PRICE_TTL seconds are used as-is; older ones are served while a refresh runs
+    'PRICE_TTL': float(os.environ.get('PRICE_TTL', 300)),
     'WALLET_ADDRESS': 'CdJSUeHX49eFK8hixbfDKNRLTakYcy59MbVEh8pDnn9U',
     'USDC_MINT': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',
     'WBTC_MINT': '3NZ9JMVBmGAqocybic2c7LQCJScmgsAZ6vQqTDzcqmJh',
     'BNB_MINT': '9gP2kCy3wA1ctvYWQk75guqXuHfrEomqydHLtcTCqiLa',
     'BOT_DATA_DIR': '../bot/data',
-    'OUTPUT_DIR': './data'
+    'OUTPUT_DIR': './data',
+    'CACHE_DIR': './.cache',
+    'SIGNAL_WINDOW_DAYS': int(os.environ.get('SIGNAL_WINDOW_DAYS', 7)),
+    'TRADES_RECENT_DAYS': int(os.environ.get('TRADES_RECENT_DAYS', 30)),
+    'MAX_WORKERS': int(os.environ.get('UPDATE_MAX_WORKERS', 6)),
+    'PROFILE': os.environ.get('UPDATE_PROFILE', '') not in ('', '0'),
+    # Write trades/signals as columnar payloads (see encode_columnar); dashboard.js decodes both formats
+    'COLUMNAR_OUTPUT': os.environ.get('UPDATE_COLUMNAR', '') not in ('', '0'),
+    # Optional SQLite store synced from the JSONL logs (UPDATE_SQLITE=1 or a database path)
+    'SQLITE_PATH': os.environ.get('UPDATE_SQLITE', ''),
+    # Write .gz/.br siblings of every data file for serve.py (UPDATE_PRECOMPRESS=0 to disable)
+    'PRECOMPRESS': os.environ.get('UPDATE_PRECOMPRESS', '1') not in ('', '0'),
+    'WATCH_DEBOUNCE': float(os.environ.get('WATCH_DEBOUNCE', 2.0)),
+    'WATCH_POLL_INTERVAL': float(os.environ.get('WATCH_POLL_INTERVAL', 5.0)),
+    'WATCH_FULL_INTERVAL': float(os.environ.get('WATCH_FULL_INTERVAL', 900)),
+    # A bot whose heartbeat file is older than this (seconds) is reported as stopped
+    'BOT_HEARTBEAT_STALE': float(os.environ.get('BOT_HEARTBEAT_STALE', 180)),
 }
 
+# Incremental JSONL ingest state (persisted between cron runs, one pickle per source file)
+INGEST_STATE_DIR = os.path.join(CONFIG['CACHE_DIR'], 'ingest')
+INGEST_STATE_VERSION = 3
+INGEST_HEAD_BYTES = 256
+INGEST_STATE_TTL = 2 * 86400  # 使われなくなったファイル（期間外のシグナル等）のキャッシュ保持期間
+_ingest_state = None  # source path -> entry (only files read by this process)
+_ingest_dirty = set()  # source paths whose entry changed since it was loaded/saved
+_ingest_used = set()  # source paths read since the last save (their entry files are touched)
+_ingest_state_lock = threading.Lock()
+_ingest_file_locks = {}  # file path -> Lock (stages running in parallel may read the same file)
+
+# Markdown documents (reports, memories, essays) keyed by path, reused while mtime/size are unchanged
+DOC_CACHE_PATH = os.path.join(CONFIG['CACHE_DIR'], 'documents.pkl')
+DOC_CACHE_VERSION = 2
+# Document bodies (content-addressed, fetched on demand by dashboard.js) live under OUTPUT_DIR/docs/<kind>/
+DOC_BODY_DIR = 'docs'
+_doc_cache = None
+_doc_cache_dirty = False  # entries added, replaced or removed since the cache was loaded/saved
+_doc_cache_lock = threading.Lock()
+
+# Output manifest (sha256/size/mtime per data file, used to skip unchanged writes)
+MANIFEST_PATH = os.path.join(CONFIG['OUTPUT_DIR'], 'manifest.json')
+MANIFEST_VERSION = 1
+_manifest = None
+_manifest_lock = threading.Lock()
+
+# Per-stage performance history (one JSON line per run, trimmed when it grows too large)
+PERF_HISTORY_PATH = os.path.join(CONFIG['OUTPUT_DIR'], 'perf_history.jsonl')
+PERF_HISTORY_MAX_BYTES = 2 * 1024 * 1024
+
+# Buffer size for streamed output writes and compression
+STREAM_CHUNK_BYTES = 1024 * 1024
+# Array elements encoded per json.dumps call when streaming
+JSON_BATCH = 256
+
+# Last known good prices per asset (see get_crypto_prices)
+PRICE_CACHE_PATH = os.path.join(CONFIG['CACHE_DIR'], 'prices.json')
+PRICE_ASSETS = {'SOL': 'solana', 'BTC': 'bitcoin', 'BNB': 'binancecoin', 'ETH': 'ethereum'}
+_price_cache = None
+_price_cache_lock = threading.Lock()
+_price_refresh = None
+
+# I/O counters of the stage running on the current thread (see run_stages)
+_stage_counters = threading.local()
+
 def ensure_output_dir():
     """出力ディレクトリを作成"""
     if not os.path.exists(CONFIG['OUTPUT_DIR']):
         os.makedirs(CONFIG['OUTPUT_DIR'])
 
-def read_jsonl_files(pattern):
-    """JSONLファイルを読み込み、リストに変換"""
-    data = []
+def _load_ingest_state():
+    """インジェスト状態（このプロセスで読んだファイルのエントリ）を返す。エントリは読むときに1件ずつ読み込む"""
+    global _ingest_state
+    with _ingest_state_lock:
+        if _ingest_state is None:
+            _ingest_state = {}
+    return _ingest_state
+
+def _ingest_entry_path(file_path):
+    """file_path のインジェスト状態を保存するファイル"""
+    return os.path.join(INGEST_STATE_DIR, hashlib.sha1(os.fsencode(file_path)).hexdigest() + '.pkl')
+
+def _load_ingest_entry(state, file_path):
+    """file_path のエントリ（オフセット・パース済みレコード）を返す。メモリになければディスクから読む"""
+    if file_path in state:
+        return state[file_path]
+    entry = None
+    try:
+        with open(_ingest_entry_path(file_path), 'rb') as f:
+            saved = pickle.load(f)
+        if saved.get('version') == INGEST_STATE_VERSION and saved.get('path') == file_path:
+            entry = saved['entry']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Ingest state for {file_path} unreadable, re-reading: {e}")
+    if entry is not None:
+        state[file_path] = entry
+    return entry
+
+def save_ingest_state():
+    """変わったエントリだけを書き直す
+
+    閉じた日付のファイルのエントリは書き直さず、mtime だけ更新する（TTL判定用）。
+    消えたファイル・しばらく読まれていないファイルのエントリは削除する。
+    """
+    if _ingest_state is None:
+        return
+    os.makedirs(INGEST_STATE_DIR, exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(CONFIG['CACHE_DIR'], 'ingest_state.pkl'))  # single-file state before v3
+    for file_path in sorted(_ingest_dirty):
+        entry = _ingest_state.get(file_path)
+        entry_path = _ingest_entry_path(file_path)
+        if entry is None or not os.path.exists(file_path):
+            _ingest_state.pop(file_path, None)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(entry_path)
+            continue
+        tmp_path = entry_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': INGEST_STATE_VERSION, 'path': file_path, 'entry': entry}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+    for file_path in _ingest_used - _ingest_dirty:
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(_ingest_entry_path(file_path))
+    _ingest_dirty.clear()
+    _ingest_used.clear()
+    
+    now = time.time()
+    for file_path in [p for p in _ingest_state if not os.path.exists(p)]:
+        del _ingest_state[file_path]
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(_ingest_entry_path(file_path))
+    for entry in os.scandir(INGEST_STATE_DIR):
+        with contextlib.suppress(FileNotFoundError):
+            if now - entry.stat().st_mtime > INGEST_STATE_TTL:
+                os.remove(entry.path)
+
+def _load_doc_cache():
+    """ドキュメントキャッシュ（パスごとの mtime_ns・サイズ・内容・タイトル・プレビュー）を読み込む"""
+    global _doc_cache
+    with _doc_cache_lock:
+        if _doc_cache is None:
+            cache = {}
+            try:
+                with open(DOC_CACHE_PATH, 'rb') as f:
+                    saved = pickle.load(f)
+                if saved.get('version') == DOC_CACHE_VERSION:
+                    cache = saved.get('files', {})
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Document cache unreadable, starting fresh: {e}")
+            _doc_cache = cache
+    return _doc_cache
+
+def save_doc_cache():
+    """ドキュメントキャッシュを保存（消えたファイルのエントリは削除）
+
+    読み込んでから追加・更新・削除したエントリがなければ書き直さない。
+    """
+    global _doc_cache_dirty
+    if _doc_cache is None:
+        return
+    with _doc_cache_lock:
+        for file_path in [p for p in _doc_cache if not os.path.exists(p)]:
+            del _doc_cache[file_path]
+            _doc_cache_dirty = True
+        if not _doc_cache_dirty:
+            return
+        os.makedirs(CONFIG['CACHE_DIR'], exist_ok=True)
+        tmp_path = DOC_CACHE_PATH + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': DOC_CACHE_VERSION, 'files': _doc_cache}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, DOC_CACHE_PATH)
+        _doc_cache_dirty = False
+
+def count_io(bytes_read=0, records_parsed=0, bytes_written=0):
+    """実行中ステージのI/Oカウンタに加算（ステージ外から呼ばれた場合は何もしない）"""
+    counters = getattr(_stage_counters, 'current', None)
+    if counters is not None:
+        counters['bytes_read'] += bytes_read
+        counters['records_parsed'] += records_parsed
+        counters['bytes_written'] += bytes_written
+
+def _load_manifest():
+    """data/manifest.json（出力ファイルごとのハッシュ・サイズ・更新時刻）を読み込む"""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            manifest = {'files': {}}
+            try:
+                with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Manifest unreadable, rebuilding: {e}")
+            _manifest = manifest
+    return _manifest
+
+def _atomic_write(path, payload):
+    """同じディレクトリの一時ファイルに書いてから os.replace で差し替える"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _compressors():
+    """(拡張子, 圧縮器を作る関数)。圧縮器は (process, finish) の組（brotliがなければ .gz のみ）"""
+    def gz():
+        c = zlib.compressobj(9, zlib.DEFLATED, 31)  # wbits=31: gzip形式（ヘッダのmtimeは0）
+        return c.compress, c.flush
+    compressors = [('.gz', gz)]
+    if brotli is not None:
+        def br():
+            c = brotli.Compressor(quality=11)
+            return c.process, c.finish
+        compressors.append(('.br', br))
+    return compressors
+
+def write_compressed_siblings(path, missing_only=False):
+    """path の .gz / .br を書く（serve.py が Accept-Encoding に応じてそのまま返す）
+
+    元のファイルを STREAM_CHUNK_BYTES ずつ読んで圧縮するので、大きな出力でも全体をメモリに載せない。
+    小さすぎて圧縮しても縮まないファイルには作らない（古いものがあれば消す）。
+    manifest.json に載っているファイルなら、縮まなかった拡張子をエントリの incompressible に
+    記録する（内容が変わるとエントリごと書き換わるので記録も消える）。
+    missing_only: まだない圧縮ファイルだけを書く（内容に変更がなかったとき・書き直さなかった出力用）。
+    incompressible に記録された拡張子は圧縮し直さない。
+    """
+    if not CONFIG['PRECOMPRESS']:
+        return
+    size = os.path.getsize(path)
+    manifest = _load_manifest()
+    entry = manifest['files'].get(os.path.relpath(path, CONFIG['OUTPUT_DIR']))
+    incompressible = set(entry.get('incompressible', ())) if entry else set()
+    for suffix, make in _compressors():
+        sibling = path + suffix
+        if missing_only and (suffix in incompressible or os.path.exists(sibling)):
+            continue
+        process, finish = make()
+        tmp_path = f"{sibling}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                while chunk := src.read(STREAM_CHUNK_BYTES):
+                    dst.write(process(chunk))
+                dst.write(finish())
+                compressed = dst.tell()
+            if compressed >= size:
+                os.remove(tmp_path)
+                if os.path.exists(sibling):
+                    os.remove(sibling)
+                incompressible.add(suffix)
+                continue
+            os.replace(tmp_path, sibling)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        incompressible.discard(suffix)
+        count_io(bytes_written=compressed)
+    if entry is not None and incompressible != set(entry.get('incompressible', ())):
+        with _manifest_lock:
+            if incompressible:
+                entry['incompressible'] = sorted(incompressible)
+            else:
+                entry.pop('incompressible', None)
+        save_manifest()
+
+def remove_output(path):
+    """出力ファイルとその圧縮ファイルを削除し、manifest.json からも外す"""
+    for target in [path] + [path + suffix for suffix, _ in _compressors()]:
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+    manifest = _load_manifest()
+    with _manifest_lock:
+        removed = manifest['files'].pop(os.path.relpath(path, CONFIG['OUTPUT_DIR']), None)
+    if removed is not None:
+        save_manifest()
+
+def _iter_json(data, indent, level=0, expand=True):
+    """json.dumps と同じ文字列を少しずつ返す
+
+    最上位と dict の値にある dict・リスト、およびジェネレータ等の反復可能オブジェクトは
+    展開し、配列の要素（各レコード）は JSON_BATCH 件ずつまとめて json.dumps に任せる。
+    ジェネレータを渡せば、レコード全体をリストにしなくても配列として書き出せる。
+    """
+    is_dict = isinstance(data, dict)
+    is_stream = not is_dict and not isinstance(data, list) and hasattr(data, '__iter__') \
+        and not isinstance(data, (str, bytes, tuple, Record))
+    if not ((expand and (is_dict or isinstance(data, list))) or is_stream):
+        text = json.dumps(data, ensure_ascii=False, indent=indent, default=_json_default)
+        if indent is not None and level and '\n' in text:
+            text = text.replace('\n', '\n' + ' ' * (indent * level))
+        yield text
+        return
+    
+    if indent is None:
+        newline, separator, inner, outer = '', ', ', '', ''
+    else:
+        newline, separator = '\n', ','
+        inner = ' ' * (indent * (level + 1))
+        outer = ' ' * (indent * level)
+    
+    if is_dict:
+        first = True
+        for key, value in data.items():
+            yield ('{' if first else separator) + newline + inner
+            first = False
+            yield json.dumps(key if isinstance(key, str) else str(key), ensure_ascii=False) + ': '
+            yield from _iter_json(value, indent, level + 1)
+        yield '{}' if first else newline + outer + '}'
+        return
+    
+    # 配列: 要素をまとめて json.dumps し、外側の [ ] を外して字下げを合わせる
+    first = True
+    batch = []
+    def flush():
+        text = json.dumps(batch, ensure_ascii=False, indent=indent, default=_json_default)
+        if indent is None:
+            return text[1:-1]
+        return outer + text[2:-2].replace('\n', '\n' + outer)
+    for item in data:
+        batch.append(item)
+        if len(batch) >= JSON_BATCH:
+            yield ('[' if first else separator) + newline + flush()
+            first = False
+            batch = []
+    if batch:
+        yield ('[' if first else separator) + newline + flush()
+        first = False
+    yield '[]' if first else newline + outer + ']'
+
+def _copy_prefix(src, dst, size):
+    """src の先頭 size バイトを dst に書く"""
+    src.seek(0)
+    while size > 0:
+        chunk = src.read(min(size, STREAM_CHUNK_BYTES))
+        if not chunk:
+            raise OSError(f"{src.name} shrank while being compared")
+        dst.write(chunk)
+        size -= len(chunk)
+
+def write_json_output(path, data, indent=None):
+    """JSONを出力する。内容が前回と同じなら書き込みを省略する
+
+    少しずつエンコードしながら既存のファイルと比較し、違いが出た時点で初めて
+    一時ファイルを開く（そこまでの一致した部分は既存のファイルから写す）。
+    出力全体の文字列をメモリに作らず、変更のない出力はディスクに書かない
+    （data にはジェネレータを含めてもよい。_iter_json 参照）。
+    差し替えは os.replace なので、ダッシュボードが書きかけのファイルを読むことはない。
+    ハッシュ・サイズ・更新時刻は manifest.json に記録する。
+    書き込んだときは .gz / .br も作り直す（write_compressed_siblings）。
+    戻り値: 書き込んだらTrue、変更なしで省略したらFalse
+    """
+    name = os.path.relpath(path, CONFIG['OUTPUT_DIR'])
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    sha = hashlib.sha256()
+    size = 0
+    manifest = _load_manifest()
+    entry = manifest['files'].get(name)
+    try:
+        existing = open(path, 'rb') if entry else None
+    except OSError:
+        existing = None
+    out = None
+    try:
+        for chunk in _iter_json(data, indent):
+            encoded = chunk.encode('utf-8')
+            sha.update(encoded)
+            if out is None:
+                if existing is not None and existing.read(len(encoded)) == encoded:
+                    size += len(encoded)
+                    continue
+                out = open(tmp_path, 'wb', buffering=STREAM_CHUNK_BYTES)
+                if existing is not None:
+                    _copy_prefix(existing, out, size)
+            out.write(encoded)
+            size += len(encoded)
+        digest = sha.hexdigest()
+        
+        if out is None and existing is not None and existing.read(1) == b'' and entry['sha256'] == digest:
+            existing.close()
+            write_compressed_siblings(path, missing_only=True)
+            return False
+        if out is None:  # the new output is a prefix of the old file (or the manifest is stale)
+            out = open(tmp_path, 'wb', buffering=STREAM_CHUNK_BYTES)
+            if existing is not None:
+                _copy_prefix(existing, out, size)
+        out.close()
+        if existing is not None:
+            existing.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if out is not None:
+            out.close()
+        if existing is not None:
+            existing.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    count_io(bytes_written=size)
+    with _manifest_lock:
+        manifest['files'][name] = {
+            'sha256': digest,
+            'size': size,
+            'mtime': datetime.fromtimestamp(os.path.getmtime(path)).isoformat(),
+        }
+    write_compressed_siblings(path)
+    # dashboard.js requests data/<name>?v=<hash> from the manifest, so publish
+    # the new hash right away instead of at the end of the run
+    save_manifest()
+    return True
+
+def _same_value(a, b):
+    """定数列の判定用（True と 1 のように型が違うものは別扱い）"""
+    return type(a) is type(b) and a == b
+
+def encode_columnar(records):
+    """レコード（dictのリスト）を列形式に変換する（dashboard.js decodeColumnar で元に戻る）
+
+    キーは columns に1回だけ書き、値は列ごとの配列にする。全行同じ値の列は const に
+    1つだけ置き、種類の少ない文字列の列（トークン・戦略・status等）は dicts に値の一覧を
+    置いて配列はインデックスにする。真偽値の列は 0/1（bools）にする。
+    キーのない行は missing に行番号を記録する（null と区別する）。
+    """
+    columns = []
+    seen = set()
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+    
+    data, const, dicts, missing, bools = {}, {}, {}, {}, []
+    for key in columns:
+        absent = [i for i, record in enumerate(records) if key not in record]
+        if absent:
+            missing[key] = absent
+        present = [record[key] for record in records if key in record]
+        first = present[0]
+        if all(_same_value(v, first) for v in present):
+            const[key] = first
+        elif all(v is None or isinstance(v, bool) for v in present):
+            bools.append(key)
+            data[key] = [None if record.get(key) is None else int(record[key]) for record in records]
+        elif all(v is None or isinstance(v, str) for v in present) and len(set(present)) * 2 <= len(present):
+            values = list(dict.fromkeys(present))
+            lookup = {v: i for i, v in enumerate(values)}
+            dicts[key] = values
+            data[key] = [lookup[record[key]] if key in record else None for record in records]
+        else:
+            data[key] = [record.get(key) for record in records]
+    
+    return {
+        'format': 'columnar',
+        'version': 1,
+        'count': len(records),
+        'columns': columns,
+        'const': const,
+        'dicts': dicts,
+        'missing': missing,
+        'bools': bools,
+        'data': data,
+    }
+
+def write_records_output(path, records, indent=None):
+    """レコード配列を出力（COLUMNAR_OUTPUT なら列形式・インデントなし）"""
+    if CONFIG['COLUMNAR_OUTPUT']:
+        return write_json_output(path, encode_columnar(records))
+    return write_json_output(path, records, indent=indent)
+
+def save_manifest(prune=False):
+    """manifest.json を保存
+
+    prune: 出力ファイルがなくなったエントリ（手で消した古い月のシャード等）を削除する（実行の最後に1回）
+    """
+    if _manifest is None:
+        return
+    with _manifest_lock:
+        if prune:
+            for name in [n for n in _manifest['files'] if not os.path.exists(os.path.join(CONFIG['OUTPUT_DIR'], n))]:
+                del _manifest['files'][name]
+        _manifest['version'] = MANIFEST_VERSION
+        _manifest['updated'] = datetime.now().isoformat()
+        payload = json.dumps(_manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+        _atomic_write(MANIFEST_PATH, payload)
+
+# JSON decoding backend: orjson > msgspec > stdlib json (see json_loads)
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+    _fast_loads = orjson.loads
+elif msgspec is not None:
+    JSON_BACKEND = 'msgspec'
+    _fast_loads = msgspec.json.Decoder().decode
+else:
+    JSON_BACKEND = 'json'
+    _fast_loads = None
+
+def json_loads(data):
+    """JSON（str / bytes）をパースする。orjson か msgspec があればそちらを使う
+
+    高速なパーサが受け付けない入力（NaN・64bitを超える整数など）は標準の json で読み直すので、
+    結果は json.loads と同じになる。パースできなければ ValueError（json.JSONDecodeError）。
+    """
+    if _fast_loads is not None:
+        try:
+            return _fast_loads(data)
+        except Exception:
+            pass
+    return json.loads(data)
+
+def _json_default(obj):
+    """json.dumps の default: Record を元の行と同じキー順の dict にする"""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+_record_shapes = {}
+
+class Record(MutableMapping):
+    """JSONLの1行を表す型付きレコード
+
+    FIELDS のキーは __slots__ の属性（record.strategy のように読める）に、それ以外のキーは
+    _more に入る。キーの並びは _order に持ち、同じ並びのレコードは同じタプルを共有する。
+    dict と同じく get / [] / in / items が使え、JSONに書くと元の行と同じ並びになる（_json_default）。
+    """
+    __slots__ = ('_order', '_more')
+    FIELDS = frozenset()
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        fields = cls.FIELDS
+        more = None
+        for key, value in data.items():
+            if key in fields:
+                setattr(record, key, value)
+            elif more is None:
+                more = {key: value}
+            else:
+                more[key] = value
+        record._more = more
+        order = tuple(data)
+        record._order = _record_shapes.setdefault(order, order)
+        return record
+
+    def to_dict(self):
+        return {key: self[key] for key in self._order}
+
+    def get(self, key, default=None):
+        if key in self.FIELDS:
+            return getattr(self, key, default)
+        more = self._more
+        return more.get(key, default) if more else default
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._more and key in self._more:
+            return self._more[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            order = self._order + (key,)
+            self._order = _record_shapes.setdefault(order, order)
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        elif self._more is None:
+            self._more = {key: value}
+        else:
+            self._more[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in self.FIELDS:
+            delattr(self, key)
+        else:
+            del self._more[key]
+        order = tuple(k for k in self._order if k != key)
+        self._order = _record_shapes.setdefault(order, order)
+
+    def __contains__(self, key):
+        return key in self._order
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+class TradeRecord(Record):
+    """trades_*.jsonl の1行"""
+    __slots__ = (
+        'timestamp', 'unix_time', 'signature', 'status', 'strategy', 'direction', 'pair',
+        'input_token', 'output_token', 'input_amount', 'output_amount',
+        'order_input_amount', 'order_output_amount', 'actual_input_amount', 'actual_output_amount',
+        'price_at_signal', 'effective_price', 'slippage_pct', 'fee_lamports', 'fee_sol',
+        'swap_type', 'latency_ms', 'pre_balance_sol', 'post_balance_sol', 'reason', 'error',
+    )
+    FIELDS = frozenset(__slots__)
+
+class SignalRecord(Record):
+    """signals_*.jsonl の1行"""
+    __slots__ = (
+        'checked_at', 'timestamp', 'pair', 'price', 'btc_price', 'cci', 'donchian_low', 'action',
+        'in_position', 'entry_condition_met', 'sl_triggered', 'donchian_triggered',
+    )
+    FIELDS = frozenset(__slots__)
+
+class SnapshotRecord(Record):
+    """snapshots_*.jsonl の1行"""
+    __slots__ = ('timestamp', 'total_usd', 'usdc_balance', 'sol_balance', 'token_balances', 'prices')
+    FIELDS = frozenset(__slots__)
+
+def _parse_jsonl_lines(chunk, file_path, records, record_type=None, offsets=None, base=0):
+    """バイト列を行ごとにパースしてrecordsに追加（record_type があればその型に変換）
+
+    offsets（リスト）を渡すと、各レコードの行のファイル内の位置（base + chunk内の位置）を追加する。
+    """
+    pos = base
+    for line in chunk.splitlines(keepends=True):
+        start = pos
+        pos += len(line)
+        line = line.strip()
+        if line:
+            try:
+                record = json_loads(line)
+            except ValueError as e:
+                print(f"JSON parse error in {file_path}: {e}")
+                continue
+            if record_type is not None and isinstance(record, dict):
+                record = record_type.from_dict(record)
+            records.append(record)
+            if offsets is not None:
+                offsets.append(start)
+
+def _ingest_file_lock(file_path):
+    """file_path のインジェスト状態を更新するときに持つロック"""
+    with _ingest_state_lock:
+        return _ingest_file_locks.setdefault(file_path, threading.Lock())
+
+def read_jsonl_incremental(file_path, record_type=None):
+    """前回のオフセット以降に追記された行だけをパースし、キャッシュ済みレコードと合わせて返す
+
+    inodeが変わった（ローテーション）、サイズが縮んだ、先頭バイトが変わった
+    （切り詰め後に再書き込み）場合は先頭から読み直す。
+    末尾の書きかけの行は次回に回す。
+    record_type（TradeRecord 等）を渡すと各行をその型にする。
+    同じファイルを並列のステージ（wallet と portfolio_history の prices_*.jsonl 等）が
+    読んでも、同じ範囲を二重にパースしないようファイルごとのロックで直列化する。
+    """
+    with _ingest_file_lock(file_path):
+        return _read_jsonl_incremental(file_path, record_type)
+
+def _read_jsonl_incremental(file_path, record_type):
+    state = _load_ingest_state()
+    st = os.stat(file_path)
+    entry = _load_ingest_entry(state, file_path)
+    _ingest_used.add(file_path)
+
+    if entry is not None:
+        if entry['inode'] != st.st_ino or st.st_size < entry['offset']:
+            print(f"{file_path} was rotated or truncated, re-reading")
+            entry = None
+        elif st.st_size == entry['size']:
+            return entry['records']
+
+    with open(file_path, 'rb') as f:
+        if entry is not None and entry['head']:
+            if f.read(len(entry['head'])) != entry['head']:
+                print(f"{file_path} was rewritten, re-reading")
+                entry = None
+        if entry is None:
+            entry = {'inode': st.st_ino, 'size': 0, 'offset': 0, 'head': b'', 'records': []}
+        print(f"Reading {file_path} from offset {entry['offset']}...")
+        f.seek(entry['offset'])
+        chunk = f.read()
+
+    # Only consume complete lines; a trailing partial line is kept for the next run
+    # unless it already parses (files that simply lack a final newline)
+    end = chunk.rfind(b'\n') + 1
+    tail = chunk[end:]
+    if tail.strip():
+        try:
+            json_loads(tail)
+            end = len(chunk)
+        except ValueError:
+            pass
+    parsed_before = len(entry['records'])
+    _parse_jsonl_lines(chunk[:end], file_path, entry['records'], record_type)
+    count_io(end, len(entry['records']) - parsed_before)
+
+    if entry['offset'] == 0:
+        entry['head'] = chunk[:min(end, INGEST_HEAD_BYTES)]
+    entry['offset'] += end
+    entry['size'] = st.st_size
+    state[file_path] = entry
+    _ingest_dirty.add(file_path)
+    return entry['records']
+
+def iter_jsonl_files(pattern, record_type=None):
+    """パターンに一致するJSONLファイルを日付順に読み込み、(file_path, records) を返す"""
     files = glob.glob(pattern)
     files.sort()  # 日付順に並べる
     
     for file_path in files:
-        print(f"Reading {file_path}...")
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            obj = json.loads(line)
-                            data.append(obj)
-                        except json.JSONDecodeError as e:
-                            print(f"JSON parse error in {file_path}: {e}")
+            yield file_path, read_jsonl_incremental(file_path, record_type)
         except FileNotFoundError:
             print(f"File not found: {file_path}")
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
-    
+
+def read_jsonl_files(pattern, record_type=None):
+    """JSONLファイルを読み込み、リストに変換（追記分のみ差分パース）"""
+    data = []
+    for _, records in iter_jsonl_files(pattern, record_type):
+        data.extend(records)
     return data
 
+def _sqlite_path():
+    """SQLiteストアのパス（無効ならNone）"""
+    value = CONFIG['SQLITE_PATH']
+    if value in ('', '0'):
+        return None
+    return os.path.join(CONFIG['CACHE_DIR'], 'records.sqlite3') if value == '1' else value
+
+def _iso_epoch(value):
+    """ISO 8601 文字列をunix秒に（解析できなければNone）"""
+    dt = _parse_ts(value)
+    return dt.timestamp() if dt else None
+
+def _normalize_trade_time(trade):
+    """timestampをISO形式に統一（Unix timestampの場合）"""
+    if isinstance(trade.get('timestamp'), (int, float)):
+        try:
+            trade['timestamp'] = datetime.fromtimestamp(trade['timestamp']).isoformat()
+        except (OverflowError, OSError, ValueError):
+            pass
+    return trade
+
+class RecordDB:
+    """トレード・シグナル・スナップショット・価格のSQLiteストア（WALモード）
+
+    JSONLログは引き続き正本のまま、ファイルごとのオフセットを ingest_files に記録して
+    追記分だけを取り込む。トレードは signature、シグナルは (pair, checked_at) で重複を除き
+    （最初に記録された行を残す）、そのキーがない行は (ファイルのパス, 行の位置) をキーに upsert するので、
+    時刻が重複・欠けている行もJSONLから読んだときと同じく1行ずつ残る。
+    ファイルを先頭から読み直すとき（ローテーション・書き換え）はそのファイルの行を消してから入れ直す。
+    出力用の読み出しは ts（unix秒）等のインデックスを使うクエリで、順序はJSONLと同じ (path, offset)。
+    ts が NULL（時刻を解析できない）行は期間の判定にファイル名の日付（date）を使う。
+    """
+    SCHEMA_VERSION = 3
+    TABLES = ('ingest_files', 'trades', 'signals', 'snapshots', 'prices')
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ingest_files (
+            path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, offset INTEGER, head BLOB);
+        CREATE TABLE IF NOT EXISTS trades (
+            id INTEGER PRIMARY KEY, path TEXT NOT NULL, offset INTEGER NOT NULL, date TEXT, ts REAL,
+            timestamp TEXT, signature TEXT, strategy TEXT, input_token TEXT, output_token TEXT, direction TEXT,
+            body TEXT NOT NULL, UNIQUE (path, offset));
+        CREATE UNIQUE INDEX IF NOT EXISTS trades_signature ON trades(signature) WHERE signature IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS trades_ts ON trades(ts);
+        CREATE INDEX IF NOT EXISTS trades_strategy ON trades(strategy, ts);
+        CREATE INDEX IF NOT EXISTS trades_input_token ON trades(input_token, ts);
+        CREATE INDEX IF NOT EXISTS trades_output_token ON trades(output_token, ts);
+        CREATE TABLE IF NOT EXISTS signals (
+            id INTEGER PRIMARY KEY, path TEXT NOT NULL, offset INTEGER NOT NULL, date TEXT,
+            pair TEXT, checked_at TEXT, ts REAL, body TEXT NOT NULL, UNIQUE (path, offset));
+        CREATE UNIQUE INDEX IF NOT EXISTS signals_key ON signals(pair, checked_at)
+            WHERE pair IS NOT NULL AND ts IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS signals_ts ON signals(ts);
+        CREATE INDEX IF NOT EXISTS signals_undated ON signals(date) WHERE ts IS NULL;
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY, path TEXT NOT NULL, offset INTEGER NOT NULL,
+            timestamp TEXT, ts REAL, body TEXT NOT NULL, UNIQUE (path, offset));
+        CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots(ts);
+        CREATE TABLE IF NOT EXISTS prices (
+            id INTEGER PRIMARY KEY, path TEXT NOT NULL, offset INTEGER NOT NULL,
+            timestamp TEXT, ts REAL, body TEXT NOT NULL, UNIQUE (path, offset));
+        CREATE INDEX IF NOT EXISTS prices_ts ON prices(ts);
+    """
+    # kind -> (BOT_DATA_DIR 配下のディレクトリ, ファイル名パターン)
+    SOURCES = {
+        'trades': ('trades', 'trades_*.jsonl'),
+        'signals': ('signal_logs', 'signals_*.jsonl'),
+        'snapshots': ('portfolio_snapshots', 'snapshots_*.jsonl'),
+        'prices': ('prices', 'prices_*.jsonl'),
+    }
+    # kind -> 読み出すレコードの型（prices は dict のまま）
+    RECORD_TYPES = {'trades': TradeRecord, 'signals': SignalRecord, 'snapshots': SnapshotRecord}
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != self.SCHEMA_VERSION:
+            # JSONLが正本なので、スキーマが変わったら作り直して全ファイルを取り込み直す
+            for table in self.TABLES:
+                self.conn.execute(f'DROP TABLE IF EXISTS {table}')
+            self.conn.executescript(self.SCHEMA)
+            self.conn.execute(f'PRAGMA user_version={self.SCHEMA_VERSION}')
+            self.conn.commit()
+
+    @classmethod
+    def open(cls):
+        """CONFIG の SQLITE_PATH で開く（無効ならNone）"""
+        path = _sqlite_path()
+        return cls(path) if path else None
+
+    def close(self):
+        self.conn.close()
+
+    def sync(self, kind):
+        """kind のJSONLファイルの追記分を取り込む。戻り値: 対象ファイル数"""
+        subdir, pattern = self.SOURCES[kind]
+        files = sorted(glob.glob(os.path.join(CONFIG['BOT_DATA_DIR'], subdir, pattern)))
+        for file_path in files:
+            try:
+                self._sync_file(kind, file_path)
+            except FileNotFoundError:
+                print(f"File not found: {file_path}")
+            except Exception as e:
+                self.conn.rollback()
+                print(f"Error syncing {file_path}: {e}")
+        return len(files)
+
+    def _sync_file(self, kind, file_path):
+        st = os.stat(file_path)
+        row = self.conn.execute(
+            'SELECT inode, size, offset, head FROM ingest_files WHERE path = ?', (file_path,)).fetchone()
+        offset, head = 0, b''
+        if row is not None:
+            inode, size, offset, head = row
+            if inode != st.st_ino or st.st_size < offset:
+                print(f"{file_path} was rotated or truncated, re-syncing")
+                offset, head = 0, b''
+            elif st.st_size == size:
+                return
+        
+        with open(file_path, 'rb') as f:
+            if head and f.read(len(head)) != head:
+                print(f"{file_path} was rewritten, re-syncing")
+                offset, head = 0, b''
+            f.seek(offset)
+            chunk = f.read()
+        
+        # Same partial-line handling as read_jsonl_incremental
+        end = chunk.rfind(b'\n') + 1
+        tail = chunk[end:]
+        if tail.strip():
+            try:
+                json_loads(tail)
+                end = len(chunk)
+            except ValueError:
+                pass
+        records, offsets = [], []
+        _parse_jsonl_lines(chunk[:end], file_path, records, self.RECORD_TYPES.get(kind), offsets, offset)
+        count_io(end, len(records))
+        if offset == 0:
+            head = chunk[:min(end, INGEST_HEAD_BYTES)]
+        
+        upsert = getattr(self, f'_upsert_{kind}')
+        with self.conn:
+            if offset == 0:
+                self.conn.execute(f'DELETE FROM {kind} WHERE path = ?', (file_path,))
+            upsert(file_path, zip(offsets, records))
+            self.conn.execute(
+                'INSERT OR REPLACE INTO ingest_files (path, inode, size, offset, head) VALUES (?, ?, ?, ?, ?)',
+                (file_path, st.st_ino, st.st_size, offset + end, head))
+        if records:
+            print(f"Synced {len(records)} {kind} from {file_path}")
+
+    @staticmethod
+    def _file_date(file_path):
+        """trades_2026-01-01.jsonl 等のファイル名の日付"""
+        return os.path.basename(file_path).rpartition('_')[2][:-len('.jsonl')]
+
+    def _upsert_trades(self, file_path, rows):
+        date_str = self._file_date(file_path)
+        values = []
+        for offset, trade in rows:
+            _normalize_trade_time(trade)
+            timestamp = trade.get('timestamp')
+            values.append((file_path, offset, date_str, _iso_epoch(timestamp), timestamp,
+                           trade.get('signature') or None, trade.get('strategy'),
+                           trade.get('input_token'), trade.get('output_token'), trade.get('direction'),
+                           json.dumps(trade, ensure_ascii=False, default=_json_default)))
+        self.conn.executemany("""
+            INSERT INTO trades (path, offset, date, ts, timestamp, signature, strategy, input_token, output_token,
+                                direction, body)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(signature) WHERE signature IS NOT NULL DO NOTHING
+            ON CONFLICT(path, offset) DO UPDATE SET
+                date = excluded.date, ts = excluded.ts, timestamp = excluded.timestamp,
+                signature = excluded.signature, strategy = excluded.strategy, input_token = excluded.input_token,
+                output_token = excluded.output_token, direction = excluded.direction, body = excluded.body
+        """, values)
+
+    def _upsert_signals(self, file_path, rows):
+        date_str = self._file_date(file_path)
+        values = []
+        for offset, signal in rows:
+            checked_at = _signal_time(signal)
+            values.append((file_path, offset, date_str, signal.get('pair'), checked_at, _iso_epoch(checked_at),
+                           json.dumps(signal, ensure_ascii=False, default=_json_default)))
+        self.conn.executemany("""
+            INSERT INTO signals (path, offset, date, pair, checked_at, ts, body) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(pair, checked_at) WHERE pair IS NOT NULL AND ts IS NOT NULL DO NOTHING
+            ON CONFLICT(path, offset) DO UPDATE SET
+                date = excluded.date, pair = excluded.pair, checked_at = excluded.checked_at,
+                ts = excluded.ts, body = excluded.body
+        """, values)
+
+    def _upsert_timestamped(self, table, file_path, rows):
+        values = [
+            (file_path, offset, r.get('timestamp'), _iso_epoch(r.get('timestamp')),
+             json.dumps(r, ensure_ascii=False, default=_json_default))
+            for offset, r in rows
+        ]
+        self.conn.executemany(f"""
+            INSERT INTO {table} (path, offset, timestamp, ts, body) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(path, offset) DO UPDATE SET timestamp = excluded.timestamp, ts = excluded.ts, body = excluded.body
+        """, values)
+
+    def _upsert_snapshots(self, file_path, rows):
+        self._upsert_timestamped('snapshots', file_path, rows)
+
+    def _upsert_prices(self, file_path, rows):
+        self._upsert_timestamped('prices', file_path, rows)
+
+    def _bodies(self, sql, params=(), record_type=None):
+        for (body,) in self.conn.execute(sql, params):
+            count_io(records_parsed=1)
+            record = json_loads(body)
+            yield record_type.from_dict(record) if record_type else record
+
+    def trades(self):
+        """全トレードを (ファイル日付, TradeRecord) でJSONLと同じ順に返す"""
+        for date_str, body in self.conn.execute('SELECT date, body FROM trades ORDER BY path, offset'):
+            count_io(records_parsed=1)
+            yield date_str, TradeRecord.from_dict(json_loads(body))
+
+    def signals(self, since, until=None):
+        """unix秒 since 以降（until があればそれより前）のシグナルをファイル・行の順に返す
+
+        時刻を解析できない行は、ファイル名の日付が since の日（until があればその日より前）
+        より後なら含める（JSONLから読むときも期間内のファイルの行はすべて含まれる）。
+        """
+        def day(t):
+            return datetime.fromtimestamp(t).strftime('%Y-%m-%d')
+        if until is None:
+            return self._bodies(
+                'SELECT body FROM signals WHERE ts >= ? OR (ts IS NULL AND date > ?) ORDER BY path, offset',
+                (since, day(since)), SignalRecord)
+        return self._bodies(
+            'SELECT body FROM signals WHERE (ts >= ? AND ts < ?) OR (ts IS NULL AND date > ? AND date <= ?)'
+            ' ORDER BY path, offset', (since, until, day(since), day(until)), SignalRecord)
+
+    def snapshots(self):
+        return self._bodies('SELECT body FROM snapshots ORDER BY path, offset', record_type=SnapshotRecord)
+
+    def prices(self):
+        return self._bodies('SELECT body FROM prices ORDER BY path, offset')
+
+class TradeStore:
+    """全トレードを1回だけ読み込み、戦略・シンボル・方向・日付でインデックスする
+
+    各ステージはファイルを読み直さず、このストアに問い合わせる。
+    インデックスのキーは strategy=大文字, symbol=input/output_tokenの大文字,
+    direction=小文字, date=ファイル名の YYYY-MM-DD。
+    """
+    TEST_STRATEGIES = ('TEST', 'PIPELINE_TEST')
+
+    def __init__(self):
+        self.trades = []
+        self._indexes = {'strategy': {}, 'symbol': {}, 'direction': {}, 'date': {}}
+
+    @classmethod
+    def load(cls):
+        """trades_*.jsonl を読み込んでストアを作る（SQLiteストアが有効ならそこから）"""
+        store = cls()
+        db = RecordDB.open()
+        if db is not None:
+            with contextlib.closing(db):
+                db.sync('trades')
+                for date_str, trade in db.trades():
+                    store.add(trade, date_str)
+            return store
+        pattern = os.path.join(CONFIG['BOT_DATA_DIR'], 'trades', 'trades_*.jsonl')
+        for file_path, records in iter_jsonl_files(pattern, TradeRecord):
+            date_str = os.path.basename(file_path)[len('trades_'):-len('.jsonl')]
+            for trade in records:
+                store.add(trade, date_str)
+        return store
+
+    @staticmethod
+    def _normalize(field, value):
+        if field == 'direction':
+            return str(value).lower()
+        if field == 'date':
+            return value
+        return str(value).upper()
+
+    def add(self, trade, date_str):
+        """トレードを追加してインデックスを更新"""
+        _normalize_trade_time(trade)
+        pos = len(self.trades)
+        self.trades.append(trade)
+        keys = {
+            'strategy': [trade.get('strategy', '')],
+            'symbol': {str(trade.get('input_token', '')).upper(), str(trade.get('output_token', '')).upper()},
+            'direction': [trade.get('direction', '')],
+            'date': [date_str],
+        }
+        for field, values in keys.items():
+            index = self._indexes[field]
+            for value in values:
+                index.setdefault(self._normalize(field, value), []).append(pos)
+
+    def keys(self, field):
+        """インデックスのキー一覧（例: keys('strategy')）"""
+        return list(self._indexes[field])
+
+    def select(self, **criteria):
+        """条件に一致するトレードを読み込み順で返す
+
+        criteria: strategy/symbol/direction/date。値は単一キーまたはキーのリストで、
+        リストはOR、フィールド間はANDで結合する。
+        """
+        positions = None
+        for field, values in criteria.items():
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            index = self._indexes[field]
+            matched = set()
+            for value in values:
+                matched.update(index.get(self._normalize(field, value), ()))
+            positions = matched if positions is None else positions & matched
+        if positions is None:
+            return list(self.trades)
+        return [self.trades[pos] for pos in sorted(positions)]
+
+    def live_trades(self):
+        """テスト用戦略を除いたトレード"""
+        return self.select(strategy=[s for s in self.keys('strategy') if s not in self.TEST_STRATEGIES])
+
+class RpcError(Exception):
+    """JSON-RPCエンドポイントへの問い合わせ失敗"""
+
+class SolanaRpcClient:
+    """Solana JSON-RPCクライアント
+
+    - エンドポイントごとに requests.Session を持ち、接続を使い回す
+    - 複数の呼び出しを1回のJSON-RPCバッチで送る。バッチを4xxで拒否する・配列で返さない
+      エンドポイントには個別に送り、以後そのエンドポイントにはバッチを送らない
+    - エンドポイントが複数あれば同時に投げ、最初に成功した応答を使う
+    - 全滅したら指数バックオフで再試行する
+    - with 文か close() でスレッドプールとセッションを閉じる
+    """
+
+    def __init__(self, endpoints, timeout=10, retries=2, backoff=0.5):
+        self.endpoints = list(endpoints)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._sessions = {url: requests.Session() for url in self.endpoints}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.endpoints)), thread_name_prefix='rpc')
+        self._no_batch = set()  # endpoints that rejected a batch request
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """スレッドプールを止め、セッションを閉じる"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        for session in self._sessions.values():
+            session.close()
+
+    def _post(self, url, payload):
+        response = self._sessions[url].post(url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _batch_on(self, url, calls):
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        if url in self._no_batch:
+            return [self._post(url, p) for p in payload]
+        try:
+            data = self._post(url, payload)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status is None or not 400 <= status < 500 or status == 429:
+                raise
+            data = None  # many providers answer a batch with 400/403/413
+        if not isinstance(data, list):
+            # Batch requests disabled on this endpoint: fall back to one call per request
+            # (remembered only once single calls work, so an auth error is not mistaken for it)
+            responses = [self._post(url, p) for p in payload]
+            self._no_batch.add(url)
+            return responses
+        by_id = {item.get('id'): item for item in data if isinstance(item, dict)}
+        if len(by_id) != len(calls):
+            raise RpcError(f"{url}: batch response has {len(by_id)} of {len(calls)} results")
+        return [by_id[i] for i in range(len(calls))]
+
+    def batch(self, calls):
+        """calls: [(method, params), ...] → 各呼び出しのJSON-RPCレスポンス（'result' か 'error' を含むdict）"""
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            futures = [self._pool.submit(self._batch_on, url, calls) for url in self.endpoints]
+            for future in as_completed(futures):
+                try:
+                    responses = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for other in futures:
+                    other.cancel()
+                return responses
+        raise RpcError(f"All RPC endpoints failed after {self.retries + 1} attempts: {last_error}")
+
+    def call(self, method, params):
+        return self.batch([(method, params)])[0]
+
+_rpc_client = None
+_rpc_client_lock = threading.Lock()
+
+def get_rpc_client():
+    """プロセス内で共有するRPCクライアント（--watch では接続が使い回される。終了時に閉じる）"""
+    global _rpc_client
+    with _rpc_client_lock:
+        if _rpc_client is None:
+            _rpc_client = SolanaRpcClient(
+                [CONFIG['SOLANA_RPC_URL']] + CONFIG['SOLANA_RPC_FALLBACK_URLS'],
+                timeout=CONFIG['RPC_TIMEOUT'],
+                retries=CONFIG['RPC_RETRIES'],
+            )
+            atexit.register(_rpc_client.close)
+    return _rpc_client
+
+# Standard SPL token program + Token-2022
+TOKEN_PROGRAM_IDS = [
+    "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+    "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb",
+]
+
 def get_solana_balance(wallet_address):
-    """Solana RPC APIでウォレット残高を取得"""
+    """Solana RPC APIでウォレット残高を取得（SOL残高と両トークンプログラムの残高を1バッチで問い合わせ）"""
     try:
-        # SOL残高取得
-        sol_payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getBalance",
-            "params": [wallet_address]
-        }
-        
-        sol_response = requests.post(CONFIG['SOLANA_RPC_URL'], json=sol_payload, timeout=10)
-        sol_data = sol_response.json()
+        sol_data, *token_responses = get_rpc_client().batch(
+            [("getBalance", [wallet_address])] + [
+                ("getTokenAccountsByOwner", [
+                    wallet_address,
+                    {"programId": program_id},
+                    {"encoding": "jsonParsed"}
+                ])
+                for program_id in TOKEN_PROGRAM_IDS
+            ]
+        )
         
         if 'result' in sol_data:
             sol_balance = sol_data['result']['value'] / 1e9  # lamports to SOL
@@ -78,28 +1271,7 @@ def get_solana_balance(wallet_address):
         bnb_balance = 0
         other_tokens = []
         
-        # Query BOTH token programs (standard + Token-2022)
-        for program_id in [
-            "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
-            "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb",
-        ]:
-            token_payload = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "getTokenAccountsByOwner",
-                "params": [
-                    wallet_address,
-                    {"programId": program_id},
-                    {"encoding": "jsonParsed"}
-                ]
-            }
-            
-            try:
-                token_response = requests.post(CONFIG['SOLANA_RPC_URL'], json=token_payload, timeout=10)
-                token_data = token_response.json()
-            except:
-                continue
-        
+        for token_data in token_responses:
             if 'result' in token_data and 'value' in token_data['result']:
                 for account in token_data['result']['value']:
                     token_info = account['account']['data']['parsed']['info']
@@ -115,6 +1287,8 @@ def get_solana_balance(wallet_address):
                         bnb_balance = amount
                     else:
                         other_tokens.append({'mint': mint, 'amount': amount})
+            else:
+                print(f"Token accounts error: {token_data.get('error', token_data)}")
         
         return {
             'sol_balance': sol_balance,
@@ -131,83 +1305,432 @@ def get_solana_balance(wallet_address):
             'usdc_balance': 0
         }
 
+def _load_price_cache():
+    """価格キャッシュ {asset: {price, at, source}} を読み込む（呼び出し側でロック済み）"""
+    global _price_cache
+    if _price_cache is None:
+        cache = {}
+        try:
+            with open(PRICE_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Price cache unreadable, starting fresh: {e}")
+        _price_cache = cache
+    return _price_cache
+
+def _store_prices(prices, at, source):
+    """取得した価格をキャッシュに反映して保存（手元より古い値では上書きしない）"""
+    with _price_cache_lock:
+        cache = _load_price_cache()
+        changed = False
+        for asset, price in prices.items():
+            if asset not in PRICE_ASSETS or not isinstance(price, (int, float)) or price <= 0:
+                continue
+            if at >= cache.get(asset, {}).get('at', 0):
+                cache[asset] = {'price': price, 'at': at, 'source': source}
+                changed = True
+        if changed:
+            os.makedirs(CONFIG['CACHE_DIR'], exist_ok=True)
+            _atomic_write(PRICE_CACHE_PATH, json.dumps(cache, indent=2).encode('utf-8'))
+
+def _bot_latest_prices():
+    """botの prices/prices_*.jsonl の最新レコードを価格キャッシュに取り込む（ネットワーク不要）"""
+    files = sorted(glob.glob(os.path.join(CONFIG['BOT_DATA_DIR'], 'prices', 'prices_*.jsonl')))
+    if not files:
+        return
+    records = read_jsonl_incremental(files[-1])
+    if not records:
+        return
+    latest = records[-1]
+    try:
+        at = datetime.fromisoformat(latest['timestamp']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return
+    _store_prices(latest.get('prices') or {}, at, 'bot')
+
+def _fetch_coingecko_prices():
+    """CoinGecko APIで全アセットの価格を1回のリクエストで取得"""
+    url = 'https://api.coingecko.com/api/v3/simple/price'
+    params = {
+        'ids': ','.join(PRICE_ASSETS.values()),
+        'vs_currencies': 'usd'
+    }
+    response = requests.get(url, params=params, timeout=CONFIG['RPC_TIMEOUT'])
+    response.raise_for_status()
+    data = response.json()
+    prices = {asset: data.get(coin_id, {}).get('usd', 0) for asset, coin_id in PRICE_ASSETS.items()}
+    _store_prices(prices, time.time(), 'coingecko')
+
+def _refresh_prices():
+    """CoinGeckoから再取得する。実行中の取得があればそれに相乗りする（同時に1リクエストまで）"""
+    global _price_refresh
+    with _price_cache_lock:
+        if _price_refresh is None or not _price_refresh.is_alive():
+            def run():
+                try:
+                    _fetch_coingecko_prices()
+                except Exception as e:
+                    print(f"Error fetching crypto prices: {e}")
+            _price_refresh = threading.Thread(target=run, name='price-refresh')
+            _price_refresh.start()
+        return _price_refresh
+
 def get_crypto_prices():
-    """CoinGecko APIで価格情報を取得"""
+    """価格情報を取得（botの価格ログ → キャッシュ → CoinGecko の順）
+
+    PRICE_TTL 以内の価格はそのまま使う。古くなった価格は最後に取れた値を返しつつ
+    裏でCoinGeckoから取り直す（stale-while-revalidate）。一度も取れていない
+    アセットがあるときだけ取得を待つ。取得に失敗しても最後に取れた値を返し、
+    何もなければ0を返す。
+    """
     try:
-        url = 'https://api.coingecko.com/api/v3/simple/price'
-        params = {
-            'ids': 'solana,bitcoin,binancecoin',
-            'vs_currencies': 'usd'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        
-        return {
-            'sol_price': data.get('solana', {}).get('usd', 0),
-            'btc_price': data.get('bitcoin', {}).get('usd', 0),
-            'bnb_price': data.get('binancecoin', {}).get('usd', 0)
-        }
-        
+        _bot_latest_prices()
     except Exception as e:
-        print(f"Error fetching crypto prices: {e}")
-        return {
-            'sol_price': 0,
-            'btc_price': 0
-        }
+        print(f"Error reading bot price log: {e}")
+    
+    now = time.time()
+    with _price_cache_lock:
+        cache = dict(_load_price_cache())
+    missing = [a for a in PRICE_ASSETS if a not in cache]
+    stale = [a for a in PRICE_ASSETS if a in cache and now - cache[a]['at'] > CONFIG['PRICE_TTL']]
+    
+    if missing:
+        _refresh_prices().join()
+        with _price_cache_lock:
+            cache = dict(_load_price_cache())
+    elif stale:
+        _refresh_prices()
+        oldest = max(now - cache[a]['at'] for a in stale)
+        print(f"Using cached prices ({oldest:.0f}s old), refreshing in background")
+    
+    return {
+        'sol_price': cache.get('SOL', {}).get('price', 0),
+        'btc_price': cache.get('BTC', {}).get('price', 0),
+        'bnb_price': cache.get('BNB', {}).get('price', 0),
+        'eth_price': cache.get('ETH', {}).get('price', 0),
+    }
 
-def update_trades_data():
+def _js_float(value):
+    """JavaScriptの parseFloat(v) || 0 相当（数値化できなければ0）"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if value != value else value
+
+def _trade_totals(trades):
+    """概要タブの損益サマリー（dashboard.js updatePnLSummary と同じ集計）"""
+    totals = {'total_trades': 0, 'sells': 0, 'wins': 0, 'total_pnl_usd': 0.0, 'total_fee_sol': 0.0}
+    for t in trades:
+        totals['total_trades'] += 1
+        totals['total_fee_sol'] += _js_float(t.get('fee_sol')) or _js_float(t.get('fee_lamports') or 0) / 1e9
+        if t.get('direction') in ('sell', 'SELL'):
+            totals['sells'] += 1
+            pnl = _js_float((t.get('extra') or {}).get('pnl_usd') or 0)
+            totals['total_pnl_usd'] += pnl
+            if pnl > 0:
+                totals['wins'] += 1
+    totals['total_pnl_usd'] = round(totals['total_pnl_usd'], 2)
+    totals['total_fee_sol'] = round(totals['total_fee_sol'], 9)
+    return totals
+
+def _trade_range(trades):
+    """トレードの最初と最後のtimestamp"""
+    stamps = [t['timestamp'] for t in trades if isinstance(t.get('timestamp'), str)]
+    return (min(stamps), max(stamps)) if stamps else (None, None)
+
+def update_trade_shards(store):
+    """月別シャード（data/trades/trades_YYYY-MM.json）・直近分・シャード索引を出力
+
+    過去の月のシャードは確定済みなので、前回の索引と件数が同じなら作り直さない。
+    dashboard.js は trades_recent.json と索引だけを最初に読み、期間フィルタで
+    必要になったシャードだけを取りに行く。
+    """
+    shard_dir = os.path.join(CONFIG['OUTPUT_DIR'], 'trades')
+    os.makedirs(shard_dir, exist_ok=True)
+    index_path = os.path.join(CONFIG['OUTPUT_DIR'], 'trades_index.json')
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            previous = {s['month']: s for s in json.load(f).get('shards', [])}
+    except (OSError, ValueError, KeyError):
+        previous = {}
+    
+    months = {}
+    for date_str in store.keys('date'):
+        months.setdefault(date_str[:7], []).append(date_str)
+    current_month = datetime.now().strftime('%Y-%m')
+    output_format = 'columnar' if CONFIG['COLUMNAR_OUTPUT'] else 'rows'
+    
+    shards = []
+    for month in sorted(months):
+        dates = months[month]
+        name = f'trades/trades_{month}.json'
+        closed = month < current_month
+        count = len(store.select(date=dates))
+        prev = previous.get(month)
+        if closed and prev and prev.get('closed') and prev['count'] == count \
+                and prev.get('format', 'rows') == output_format \
+                and os.path.exists(os.path.join(CONFIG['OUTPUT_DIR'], name)):
+            write_compressed_siblings(os.path.join(CONFIG['OUTPUT_DIR'], name), missing_only=True)
+            shards.append(prev)
+            continue
+        trades = store.select(date=dates)
+        first, last = _trade_range(trades)
+        write_records_output(os.path.join(CONFIG['OUTPUT_DIR'], name), trades)
+        shards.append({
+            'month': month,
+            'file': name,
+            'from': first,
+            'to': last,
+            'count': len(trades),
+            'closed': closed,
+            'format': output_format,
+        })
+    
+    # Drop shards for months that no longer have source files
+    for month in set(previous) - set(months):
+        remove_output(os.path.join(CONFIG['OUTPUT_DIR'], previous[month]['file']))
+    
+    recent_days = CONFIG['TRADES_RECENT_DAYS']
+    recent_from = (datetime.now() - timedelta(days=recent_days)).strftime('%Y-%m-%d')
+    recent = store.select(date=[d for d in store.keys('date') if d >= recent_from])
+    write_records_output(os.path.join(CONFIG['OUTPUT_DIR'], 'trades_recent.json'), recent)
+    
+    index = {
+        'recent_days': recent_days,
+        'recent_from': recent_from,
+        'recent_count': len(recent),
+        'total_count': len(store.trades),
+        'totals': _trade_totals(store.live_trades()),
+        'shards': shards,
+    }
+    write_json_output(index_path, index, indent=2)
+    print(f"Saved {len(shards)} monthly trade shards + {len(recent)} recent trades (last {recent_days} days)")
+    return index
+
+def update_trades_data(store):
     """トレードデータを更新"""
     print("Updating trades data...")
-    pattern = os.path.join(CONFIG['BOT_DATA_DIR'], 'trades', 'trades_*.jsonl')
-    trades = read_jsonl_files(pattern)
+    trades = store.trades
     
     # Note: Grid trades now use unified tracker (trades_*.jsonl) with strategy="GRID"
     # Legacy jgrid_*.jsonl files are no longer written by the bot
+    # timestampのISO形式への統一は TradeStore.add() で済んでいる
     
-    # データの整形（必要に応じて）
-    for trade in trades:
-        # timestampをISO形式に統一
-        if 'timestamp' in trade:
-            try:
-                # Unix timestampの場合
-                if isinstance(trade['timestamp'], (int, float)):
-                    trade['timestamp'] = datetime.fromtimestamp(trade['timestamp']).isoformat()
-            except:
-                pass
-    
+    # Full history, kept for other consumers; the dashboard reads the shards
     output_path = os.path.join(CONFIG['OUTPUT_DIR'], 'trades.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(trades, f, ensure_ascii=False, indent=2)
+    write_records_output(output_path, trades, indent=2)
     
     print(f"Saved {len(trades)} trades to {output_path}")
     return trades
 
-def update_signals_data():
-    """シグナルデータを更新"""
-    print("Updating signals data...")
-    pattern = os.path.join(CONFIG['BOT_DATA_DIR'], 'signal_logs', 'signals_*.jsonl')
-    signals = read_jsonl_files(pattern)
+def _parse_ts(ts):
+    """ISO 8601 文字列を datetime に（解析できなければNone）"""
+    try:
+        return datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+
+def _signal_time(signal):
+    """シグナルの時刻（ISO形式）。Unix timestampはISO形式に変換して書き戻す"""
+    if isinstance(signal.get('checked_at'), (int, float)):
+        try:
+            signal['checked_at'] = datetime.fromtimestamp(signal['checked_at']).isoformat()
+        except (OverflowError, OSError, ValueError):
+            pass
+    return signal.get('checked_at') or signal.get('timestamp', '')
+
+def load_recent_signals(days, history_days=0):
+    """直近days日分のシグナルを読み込む
+
+    ファイル名の YYYY-MM-DD で対象日を選ぶので、期間外のファイルは開かない。
+    タイムゾーンのずれを吸収するため境界の前日から読み、境界付近のファイルは
+    時刻順に追記されている前提で二分探索して切り出す。
+    history_days が days より長ければ、その差の期間（days日より前）の分も
+    別のリストで返す（signal_series 用。境界のファイル以外は時刻を比較しない）。
+    SQLiteストアが有効なら追記分を取り込んでから ts のインデックスで引く。
+    戻り値: (signals, history, ファイル数)
+    """
+    now = datetime.now()
+    history_days = max(history_days, days)
+    db = RecordDB.open()
+    if db is not None:
+        with contextlib.closing(db):
+            file_count = db.sync('signals')
+            since = (now - timedelta(days=days)).timestamp()
+            history = []
+            if history_days > days:
+                history = list(db.signals((now - timedelta(days=history_days)).timestamp(), since))
+            return list(db.signals(since)), history, file_count
+    
+    def bounds(n):
+        cutoff = (now - timedelta(days=n)).isoformat()
+        return cutoff, cutoff[:10], (now - timedelta(days=n + 1)).strftime('%Y-%m-%d')
+    cutoff, cutoff_day, first_day = bounds(days)
+    history_cutoff, history_cutoff_day, history_first_day = bounds(history_days)
     
-    # データの整形
+    pattern = os.path.join(CONFIG['BOT_DATA_DIR'], 'signal_logs', 'signals_*.jsonl')
+    files = {}
+    for f in glob.glob(pattern):
+        day = os.path.basename(f)[len('signals_'):-len('.jsonl')]
+        if day >= history_first_day:
+            files[f] = day
+    
+    signals, history = [], []
+    for file_path in sorted(files):
+        day = files[file_path]
+        try:
+            records = read_jsonl_incremental(file_path, SignalRecord)
+        except FileNotFoundError:
+            print(f"File not found: {file_path}")
+            continue
+        except Exception as e:
+            print(f"Error reading {file_path}: {e}")
+            continue
+        start = bisect.bisect_left(records, history_cutoff, key=_signal_time) if day <= history_cutoff_day else 0
+        if day < first_day:
+            split = len(records)
+        elif day <= cutoff_day:
+            split = max(start, bisect.bisect_left(records, cutoff, key=_signal_time))
+        else:
+            split = start
+        for signal in records[start:split]:
+            _signal_time(signal)
+            history.append(signal)
+        for signal in records[split:]:
+            _signal_time(signal)
+            signals.append(signal)
+    return signals, history, len(files)
+
+# Windows of the signal chart: (name, seconds, bucket seconds). bucket None = every check
+SIGNAL_SERIES_WINDOWS = [
+    ('1d', 86400, None),
+    ('7d', 7 * 86400, 1800),
+    ('30d', 30 * 86400, 7200),
+]
+
+def _positive_price(value):
+    """有限の正の数か（bool は除く）"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value) and value > 0
+
+def _signal_pairs(signals):
+    """各シグナルのペア名（signals と同じ順のリスト）
+
+    pair のない旧形式の行は全ペアの価格を btc_price に入れていた（BTC ~69k と
+    BNB ~632 が混在）ので、pair付きの行の価格と桁が最も近いペアに振り分ける。
+    参考になる行がなければ BTCUSDT（dashboard.js の既定と同じ）。
+    価格が数値でない・正でない行は振り分けられないので None（signal_series で除外）。
+    """
+    refs = {}
     for signal in signals:
-        if 'checked_at' in signal:
-            try:
-                # Unix timestampの場合
-                if isinstance(signal['checked_at'], (int, float)):
-                    signal['checked_at'] = datetime.fromtimestamp(signal['checked_at']).isoformat()
-            except:
-                pass
+        if signal.get('pair') and _positive_price(signal.get('price')):
+            refs.setdefault(signal['pair'], signal['price'])
+    pairs = []
+    for signal in signals:
+        price = signal.get('btc_price') or signal.get('price') or 0
+        if signal.get('pair'):
+            pairs.append(signal['pair'])
+        elif not price:
+            pairs.append('BTCUSDT')
+        elif not _positive_price(price):
+            pairs.append(None)
+        elif refs:
+            pairs.append(min(refs, key=lambda pair: abs(math.log(price / refs[pair]))))
+        else:
+            pairs.append('BTCUSDT')
+    return pairs
+
+def _signal_event(signal):
+    """チャートに印を付けるイベントの種類（なければNone）"""
+    if signal.get('sl_triggered'):
+        return 'sl'
+    if signal.get('donchian_triggered'):
+        return 'donchian'
+    action = signal.get('action') or 'NONE'
+    if action == 'NONE':
+        return None
+    return 'entry' if 'BUY' in action else 'other'
+
+def signal_series(signals):
+    """signalChart 用にペアごと・期間ごとの列形式データを作る
+
+    期間は各ペアの最新チェックから遡る。7d/30d はバケットごとの最後の値に間引く。
+    時刻はunix秒。エントリー・SL・Donchianのイベントは間引かず別に持つ。
+    """
+    by_pair = {}
+    for signal, pair in zip(signals, _signal_pairs(signals)):
+        if pair is None:
+            continue
+        dt = _parse_ts(_signal_time(signal))
+        if dt is not None:
+            by_pair.setdefault(pair, []).append((int(dt.timestamp()), signal))
+    
+    pairs = {}
+    for pair, rows in sorted(by_pair.items()):
+        rows.sort(key=lambda r: r[0])
+        latest_t, latest = rows[-1]
+        windows = {}
+        for name, seconds, bucket_sec in SIGNAL_SERIES_WINDOWS:
+            since = latest_t - seconds
+            picked = []
+            for t, signal in rows:
+                if t < since:
+                    continue
+                if bucket_sec and picked and picked[-1][0] // bucket_sec == t // bucket_sec:
+                    picked[-1] = (t, signal)
+                else:
+                    picked.append((t, signal))
+            windows[name] = {
+                'bucket_sec': bucket_sec,
+                't': [t for t, _ in picked],
+                'cci': [round(_js_float(sig.get('cci', sig.get('cci_value'))), 2) for _, sig in picked],
+                'price': [sig.get('price') or sig.get('btc_price') or 0 for _, sig in picked],
+                'donchian_low': [sig.get('donchian_low') for _, sig in picked],
+            }
+        
+        since = latest_t - max(seconds for _, seconds, _ in SIGNAL_SERIES_WINDOWS)
+        events = {'t': [], 'type': [], 'action': [], 'price': []}
+        for t, signal in rows:
+            kind = _signal_event(signal) if t >= since else None
+            if kind:
+                events['t'].append(t)
+                events['type'].append(kind)
+                events['action'].append(signal.get('action'))
+                events['price'].append(signal.get('price') or signal.get('btc_price') or 0)
+        
+        pairs[pair] = {
+            'latest': {
+                'checked_at': _signal_time(latest),
+                'cci': latest.get('cci', latest.get('cci_value')),
+                'price': latest.get('price') or latest.get('btc_price') or 0,
+                'donchian_low': latest.get('donchian_low'),
+                'in_position': latest.get('in_position'),
+                'action': latest.get('action'),
+            },
+            'windows': windows,
+            'events': events,
+        }
+    return {'pairs': pairs}
+
+def update_signals_data():
+    """シグナルデータを更新（signals.json と チャート用の signal_series.json）"""
+    print("Updating signals data...")
     
-    # Limit to last 7 days to prevent JSON bloat (was 200KB+)
-    cutoff = (datetime.now() - timedelta(days=7)).isoformat()
-    recent_signals = [s for s in signals if (s.get('checked_at') or s.get('timestamp', '')) >= cutoff]
+    # Limit to last N days to prevent JSON bloat (was 200KB+)
+    days = CONFIG['SIGNAL_WINDOW_DAYS']
+    series_days = max(seconds for _, seconds, _ in SIGNAL_SERIES_WINDOWS) // 86400
+    recent_signals, history, file_count = load_recent_signals(days, series_days)
     
     output_path = os.path.join(CONFIG['OUTPUT_DIR'], 'signals.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(recent_signals, f, ensure_ascii=False, indent=2)
+    write_records_output(output_path, recent_signals, indent=2)
+    
+    series = signal_series(history + recent_signals)
+    write_json_output(os.path.join(CONFIG['OUTPUT_DIR'], 'signal_series.json'), series)
     
-    print(f"Saved {len(recent_signals)} signals (filtered from {len(signals)}, last 7 days) to {output_path}")
+    print(f"Saved {len(recent_signals)} signals (last {days} days, {file_count} files) to {output_path}")
+    print(f"  Chart series: {', '.join(series['pairs']) or 'none'} (last {series_days} days)")
     return recent_signals
 
 def update_wallet_data():
@@ -252,6 +1775,7 @@ def update_wallet_data():
         sol_price = prices_raw['sol_price']
         btc_price = prices_raw['btc_price']
         bnb_price = prices_raw['bnb_price']
+        prices = {'ETH': prices_raw['eth_price']}
         
         sol_value_usd = sol_balance * sol_price
         wbtc_value_usd = wbtc_balance * btc_price
@@ -287,8 +1811,7 @@ def update_wallet_data():
     }
     
     output_path = os.path.join(CONFIG['OUTPUT_DIR'], 'wallet.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(wallet_data, f, ensure_ascii=False, indent=2)
+    write_json_output(output_path, wallet_data, indent=2)
     
     print(f"Saved wallet data to {output_path}")
     print(f"SOL: {sol_balance:.4f} (${sol_value_usd:.2f})")
@@ -366,24 +1889,142 @@ def update_tasks_data():
     }
     
     output_path = os.path.join(CONFIG['OUTPUT_DIR'], 'tasks.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(tasks_data, f, ensure_ascii=False, indent=2)
+    write_json_output(output_path, tasks_data, indent=2)
     
     print(f"Saved {len(tasks_data.get('projects', []))} projects with {total_all_tasks} total tasks to {output_path}")
     return tasks_data
 
-def _get_live_trade_summary(date_str):
-    """当日のトレードJSONLからリアルタイムサマリーを生成"""
-    trades_file = os.path.join(os.path.dirname(__file__), '..', 'bot', 'data', 'trades', f'trades_{date_str}.jsonl')
-    if not os.path.exists(trades_file):
-        return ""
-    trades = []
-    with open(trades_file) as f:
-        for line in f:
-            try:
-                trades.append(json.loads(line.strip()))
-            except:
-                pass
+# Secrets masked in daily reports and agent memories: (name, pattern, replacement).
+# All patterns are compiled into one alternation and applied in a single pass (see redact)
+SECRET_PATTERNS = [
+    ('github_token', r'ghp_[A-Za-z0-9]{36}', 'ghp_***REDACTED***'),
+    ('discord_token', r'MTQ3[A-Za-z0-9._\-]{50,}', 'MTQ3***REDACTED***'),
+    ('anthropic_key', r'sk-ant-[A-Za-z0-9\-]+', 'sk-ant-***REDACTED***'),
+    ('maton_api_key', r'MATON_API_KEY[^\n]*', 'MATON_API_KEY***REDACTED***'),
+    ('seed_phrase', r'daughter insect.*?file', '***SEED_REDACTED***'),
+]
+# One scan over all patterns finds documents with nothing to redact (almost all of them).
+# Non-capturing on purpose: named groups disable sre's first-character prefilter and make
+# the scan ~15x slower
+_SECRET_RE = re.compile('|'.join(f'(?:{pattern})' for _, pattern, _ in SECRET_PATTERNS))
+_SECRET_RULES = [(name, re.compile(pattern), replacement) for name, pattern, replacement in SECRET_PATTERNS]
+REDACTION_CACHE_MAX = 1024
+_redaction_cache = {}
+_redaction_stats = None
+_redaction_lock = threading.Lock()
+
+def reset_redaction_stats():
+    """redact のカウンタを0に戻す（run_update の実行ごと）"""
+    global _redaction_stats
+    with _redaction_lock:
+        _redaction_stats = {'documents': 0, 'cache_hits': 0, 'matches': {name: 0 for name, _, _ in SECRET_PATTERNS}}
+
+def redaction_stats():
+    """redact のカウンタ: 処理した文書数・キャッシュヒット数・パターンごとの置換数"""
+    with _redaction_lock:
+        if _redaction_stats is None:
+            return None
+        return {**_redaction_stats, 'matches': dict(_redaction_stats['matches'])}
+
+def redact(content):
+    """SECRET_PATTERNS に一致する部分を、パターンの順に1つずつ置き換える
+
+    どのパターンにも一致しない文書（ほとんど）は全パターンをまとめた1回の走査で判定して終わる。
+    一致があるときだけパターンごとに置き換える（重なった・隣り合った秘密情報も、前のパターンの
+    置換結果に次のパターンを当てるので、以前の順番どおりの re.sub と同じ結果・同じ件数になる）。
+    結果は内容のハッシュでキャッシュするので、変わっていない文書は走査し直さない。
+    """
+    key = hashlib.sha1(content.encode('utf-8')).digest()
+    with _redaction_lock:
+        cached = _redaction_cache.get(key)
+    if cached is None:
+        counts = {}
+        redacted = content
+        if _SECRET_RE.search(content) is not None:
+            for name, rule, replacement in _SECRET_RULES:
+                redacted, n = rule.subn(replacement, redacted)
+                if n:
+                    counts[name] = n
+        cached = (redacted, counts)
+        hit = False
+    else:
+        hit = True
+    
+    with _redaction_lock:
+        if not hit:
+            if len(_redaction_cache) >= REDACTION_CACHE_MAX:
+                del _redaction_cache[next(iter(_redaction_cache))]
+            _redaction_cache[key] = cached
+        if _redaction_stats is not None:
+            _redaction_stats['documents'] += 1
+            _redaction_stats['cache_hits'] += hit
+            for name, n in cached[1].items():
+                _redaction_stats['matches'][name] += n
+    return cached[0]
+
+# Changes whenever SECRET_PATTERNS is edited, so cached redacted documents are redone
+_SECRET_RULES_ID = hashlib.sha1(repr(SECRET_PATTERNS).encode('utf-8')).hexdigest()
+
+def read_document(path, redacted=False):
+    """Markdownファイルを読み、{'content', 'title', 'preview', 'mtime'} を返す
+
+    title は1行目（# を除く）、preview は2〜4行目。redacted=True なら content・title・preview とも redact 済み。
+    (mtime_ns, size) が前回と同じならファイルを開かずドキュメントキャッシュから返す。
+    """
+    st = os.stat(path)
+    rules = _SECRET_RULES_ID if redacted else None
+    cache = _load_doc_cache()
+    with _doc_cache_lock:
+        entry = cache.get(path)
+    if entry is not None and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size \
+            and entry['rules'] == rules:
+        return entry['doc']
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    count_io(bytes_read=st.st_size)
+    if redacted:
+        content = redact(content)
+    lines = content.strip().split('\n')
+    doc = {
+        'content': content,
+        'title': lines[0].lstrip('#').strip() if lines else os.path.basename(path),
+        'preview': '\n'.join(lines[1:4]).strip() if len(lines) > 1 else '',
+        'mtime': st.st_mtime,
+    }
+    global _doc_cache_dirty
+    with _doc_cache_lock:
+        cache[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'rules': rules, 'doc': doc}
+        _doc_cache_dirty = True
+    return doc
+
+def write_doc_body(kind, content):
+    """本文を docs/<kind>/<hash>.md に書き、索引に載せる {'size', 'hash'} を返す
+
+    ファイル名は内容のsha256なので、同じ本文は書き直さない（ブラウザも ?v=<hash> で永続キャッシュできる）。
+    """
+    payload = content.encode('utf-8')
+    digest = hashlib.sha256(payload).hexdigest()[:16]
+    path = os.path.join(CONFIG['OUTPUT_DIR'], DOC_BODY_DIR, kind, f'{digest}.md')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_write(path, payload)
+        count_io(bytes_written=len(payload))
+        write_compressed_siblings(path)
+    return {'size': len(payload), 'hash': digest}
+
+def prune_doc_bodies(kind, keep):
+    """docs/<kind>/ から keep（ハッシュの集合）に含まれない本文を削除"""
+    body_dir = os.path.join(CONFIG['OUTPUT_DIR'], DOC_BODY_DIR, kind)
+    if not os.path.isdir(body_dir):
+        return
+    for name in os.listdir(body_dir):
+        if name.endswith('.md') and name[:-len('.md')] not in keep:
+            remove_output(os.path.join(body_dir, name))
+
+def _get_live_trade_summary(store, date_str):
+    """当日のトレードからリアルタイムサマリーを生成"""
+    trades = store.select(date=date_str)
     if not trades:
         return ""
     
@@ -401,8 +2042,12 @@ def _get_live_trade_summary(date_str):
         lines.append(f"- **{strat}**: {len(buys)}買/{len(sells)}売, P&L: ${pnl:+.2f}")
     return '\n'.join(lines)
 
-def update_daily_reports_data():
-    """日報データを更新"""
+def update_daily_reports_data(store):
+    """日報データを更新
+
+    daily_reports.json は日付・タイトル・プレビュー・サイズ・ハッシュだけの索引で、
+    本文は docs/reports/<hash>.md（write_doc_body）。
+    """
     print("Updating daily reports data...")
     
     memory_dir = '../memory'  # ワークスペースルートのmemoryディレクトリ
@@ -427,26 +2072,22 @@ def update_daily_reports_data():
                     except ValueError:
                         continue
                     
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
+                    # Filter out secrets (tokens, API keys, passwords)
+                    doc = read_document(file_path, redacted=True)
+                    content = doc['content'].strip()
                     
                     if content:  # 空でないファイルのみ
-                        # Filter out secrets (tokens, API keys, passwords)
-                        import re
-                        content = re.sub(r'ghp_[A-Za-z0-9]{36}', '[REDACTED]', content)
-                        content = re.sub(r'MTQ3[A-Za-z0-9._\-]{50,}', '[REDACTED]', content)
-                        content = re.sub(r'sk-ant-[A-Za-z0-9\-]{50,}', '[REDACTED]', content)
-                        content = re.sub(r'MATON_API_KEY[^\n]*', '[REDACTED]', content)
-                        
                         # 当日の日報にリアルタイムトレードサマリーを追加
                         if date_str == today_str:
-                            live_summary = _get_live_trade_summary(date_str)
+                            live_summary = _get_live_trade_summary(store, date_str)
                             if live_summary:
                                 content += live_summary
                         
                         reports.append({
                             'date': date_str,
-                            'content': content
+                            'title': doc['title'],
+                            'preview': doc['preview'],
+                            **write_doc_body('reports', content),
                         })
                         
                 except Exception as e:
@@ -458,13 +2099,277 @@ def update_daily_reports_data():
         print(f"Error updating daily reports: {e}")
     
     output_path = os.path.join(CONFIG['OUTPUT_DIR'], 'daily_reports.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(reports, f, ensure_ascii=False, indent=2)
+    write_json_output(output_path, reports, indent=2)
+    prune_doc_bodies('reports', {r['hash'] for r in reports})
     
     print(f"Saved {len(reports)} daily reports to {output_path}")
     return reports
 
-def update_portfolio_strategies():
+def _trade_usd_in(t):
+    """買いトレードで支払ったUSDC額（USDC以外で買った場合は0）"""
+    return t.get('actual_input_amount', t.get('input_amount', 0)) if t.get('input_token') == 'USDC' else 0
+
+def _trade_usd_out(t):
+    """売りトレードで受け取ったUSDC額（USDC以外で売った場合は0）"""
+    return t.get('actual_output_amount', t.get('output_amount', 0)) if t.get('output_token') == 'USDC' else 0
+
+def match_round_trips(trades, pairs):
+    """(戦略, シンボル)ごとにトレードを振り分け、FIFOで往復トレードをマッチングする
+
+    trades: トレードのリスト（順不同）
+    pairs: (strategy_id, symbol) のイテラブル
+    戻り値: {(strategy_id, symbol): {'trades', 'buys', 'sells', 'trips'}}
+
+    トレードは時刻順に一度だけ走査し、シンボルがinput/output_tokenに含まれ
+    戦略名が一致する全ペアに振り分ける。各買いは、その後に約定した最初の
+    未使用の売り（USDC受取 > $0.01）と組み合わせる。買いも売りも時刻順なので
+    売り側のポインタは単調に進むだけで済む。
+    """
+    by_strategy = {}
+    groups = {}
+    for strat_id, symbol in pairs:
+        key = (strat_id, symbol)
+        if key not in groups:
+            groups[key] = {'trades': [], 'buys': [], 'sells': [], 'trips': []}
+            by_strategy.setdefault(strat_id.upper(), []).append((symbol.upper(), groups[key]))
+
+    for t in sorted(trades, key=lambda t: t.get('timestamp', '')):
+        targets = by_strategy.get(t.get('strategy', '').upper())
+        if not targets:
+            continue
+        out_token = str(t.get('output_token', '')).upper()
+        in_token = str(t.get('input_token', '')).upper()
+        is_buy = t.get('direction', '').lower() == 'buy' or t.get('input_token') == 'USDC'
+        is_sell = t.get('direction', '').lower() == 'sell' or t.get('output_token') == 'USDC'
+        for symbol, group in targets:
+            if symbol in out_token or symbol in in_token:
+                group['trades'].append(t)
+                if is_buy:
+                    group['buys'].append(t)
+                if is_sell:
+                    group['sells'].append(t)
+
+    for (strat_id, symbol), group in groups.items():
+        sells = [(s, _trade_usd_out(s)) for s in group['sells']]
+        sells = [(s, usd) for s, usd in sells if usd > 0.01]
+        j = 0
+        for b in group['buys']:
+            buy_ts = b.get('timestamp', '')
+            while j < len(sells) and sells[j][0].get('timestamp', '') <= buy_ts:
+                j += 1
+            if j == len(sells):
+                break
+            s, sell_usd = sells[j]
+            j += 1
+            buy_usd = _trade_usd_in(b)
+            group['trips'].append({
+                'strategy': strat_id,
+                'symbol': symbol,
+                'buy_time': buy_ts,
+                'sell_time': s.get('timestamp', ''),
+                'buy_signature': b.get('signature', ''),
+                'sell_signature': s.get('signature', ''),
+                'invested_usd': buy_usd,
+                'returned_usd': sell_usd,
+                'pnl_usd': sell_usd - buy_usd,
+            })
+    return groups
+
+def round_trip_stats(group):
+    """match_round_trips() の1グループから live_stats を作る"""
+    trips = group['trips']
+    realized_pnl = 0.0
+    total_invested = 0.0
+    total_returned = 0.0
+    for trip in trips:
+        realized_pnl += trip['pnl_usd']
+        total_invested += trip['invested_usd']
+        total_returned += trip['returned_usd']
+    return {
+        'total_trades': len(group['trades']),
+        'buys': len(group['buys']),
+        'sells': len(group['sells']),
+        'completed_trips': len(trips),
+        'total_invested': round(total_invested, 2),
+        'total_returned': round(total_returned, 2),
+        'realized_pnl': round(realized_pnl, 2) if trips else None,
+    }
+
+# Trading bots per strategy. Each bot may write run/<name>.pid (its pid) and touch
+# run/<name>.heartbeat under BOT_DATA_DIR; without a pidfile the process is found by script name
+BOTS = {
+    'CCI': {'name': 'live_trader', 'script': 'live_trader'},
+    'GRID': {'name': 'jupiter_grid', 'script': 'jupiter_grid'},
+}
+
+def _proc_cmdline(pid):
+    """/proc/<pid>/cmdline の引数リスト（プロセスがなければNone）"""
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return [a.decode('utf-8', 'replace') for a in f.read().split(b'\0') if a]
+    except OSError:
+        return None
+
+PYTHON_ARG_OPTIONS = ('-W', '-X', '-Q')  # python options that take the next argument
+
+def _script_name(path):
+    base = os.path.basename(path)
+    return base[:-len('.py')] if base.endswith('.py') else base
+
+def _argv_scripts(argv):
+    """argv が起動したスクリプト名の集合
+
+    argv[0] のベース名（実行ファイルとして直接起動）と、pythonインタプリタの場合は
+    最初のオプションでない引数（python live_trader.py）か -m のモジュール名の最後の要素
+    （python -m bot.live_trader → live_trader）だけを見る。
+    それ以外の引数（vim live_trader.py や grep live_trader）はスクリプトとみなさない。
+    """
+    if not argv:
+        return set()
+    names = {_script_name(argv[0])}
+    if re.fullmatch(r'python[\d.]*', os.path.basename(argv[0])):
+        args = iter(argv[1:])
+        for arg in args:
+            if arg.startswith('-m'):
+                module = arg[2:] or next(args, '')
+                names.add(module.rpartition('.')[2])
+                break
+            if arg.startswith('-c') or arg == '-':
+                break
+            if arg in PYTHON_ARG_OPTIONS:
+                next(args, None)
+            elif not arg.startswith('-'):
+                names.add(_script_name(arg))
+                break
+    names.discard('')
+    return names
+
+def _runs_script(argv, script):
+    """argv が script（.py付き・-m のモジュール名も可）を起動したものか"""
+    return script in _argv_scripts(argv)
+
+def _proc_start_time(pid):
+    """/proc/<pid>/stat の起動時刻（unix time、取れなければNone）"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/stat', 'r') as f:
+            btime = next(int(line.split()[1]) for line in f if line.startswith('btime '))
+        return btime + int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError, StopIteration):
+        return None
+
+def _parse_etime(etime):
+    """ps の etime（[[dd-]hh:]mm:ss）を秒に"""
+    days, _, clock = etime.rpartition('-')
+    seconds = 0
+    for part in clock.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds + int(days or 0) * 86400
+
+def _proc_pids():
+    """/proc にある全プロセスのpid"""
+    return [int(entry.name) for entry in os.scandir('/proc') if entry.name.isdigit()]
+
+def _find_bot_processes(scripts):
+    """scripts のそれぞれについて、一致するプロセスを1回の走査で探す
+
+    /proc がある場合は /proc を1回、なければ ps を1回だけ呼ぶ。
+    戻り値: {script: (pid, 起動時刻)}（見つかったものだけ）
+    """
+    scripts = set(scripts)
+    found = {}
+    if os.path.isdir('/proc/self'):
+        for pid in _proc_pids():
+            for script in (_argv_scripts(_proc_cmdline(pid)) & scripts) - set(found):
+                found[script] = (pid, _proc_start_time(pid))
+            if len(found) == len(scripts):
+                break
+        return found
+    # /proc のないホスト（macOS）: argv単位で照合する
+    import subprocess
+    try:
+        out = subprocess.run(['ps', '-axo', 'pid=,etime=,command='], capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return found
+    for line in out.splitlines():
+        parts = line.split(None, 2)
+        if len(parts) == 3:
+            for script in (_argv_scripts(parts[2].split()) & scripts) - set(found):
+                found[script] = (int(parts[0]), time.time() - _parse_etime(parts[1]))
+    return found
+
+def _bot_process_finder(scripts):
+    """script → (pid, 起動時刻) を返す関数。最初に呼ばれたときに全botをまとめて1回だけ探す"""
+    found = None
+    def find(script):
+        nonlocal found
+        if found is None:
+            found = _find_bot_processes(scripts)
+        return found.get(script, (None, None))
+    return find
+
+def _pid_alive(pid, script):
+    """pidのプロセスが生きていて、同じbotであるか（pid再利用を /proc のcmdlineで除外）"""
+    if os.path.isdir('/proc/self'):
+        return _runs_script(_proc_cmdline(pid), script)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def probe_bot(bot, find_process=None):
+    """botの稼働状態。pidfile → プロセス検索 の順で確認し、heartbeat も見る
+
+    起動時刻・最終heartbeatは時刻で返す（経過時間はダッシュボード側で計算するので、
+    稼働中でも strategies.json の内容は毎回変わらない）。
+    find_process: _bot_process_finder の関数（複数のbotで /proc の走査を共有する）
+    """
+    if find_process is None:
+        find_process = _bot_process_finder([bot['script']])
+    run_dir = os.path.join(CONFIG['BOT_DATA_DIR'], 'run')
+    status = {'running': False, 'pid': None, 'source': None, 'started_at': None, 'heartbeat_at': None}
+    
+    heartbeat_age = None
+    try:
+        heartbeat = os.path.getmtime(os.path.join(run_dir, bot['name'] + '.heartbeat'))
+        status['heartbeat_at'] = datetime.fromtimestamp(heartbeat).isoformat(timespec='seconds')
+        heartbeat_age = time.time() - heartbeat
+    except OSError:
+        pass
+    
+    pid, started = None, None
+    pid_path = os.path.join(run_dir, bot['name'] + '.pid')
+    try:
+        with open(pid_path, 'r') as f:
+            pid = int(f.read().split()[0])
+        if _pid_alive(pid, bot['script']):
+            started = _proc_start_time(pid) or os.path.getmtime(pid_path)
+            status['source'] = 'pidfile'
+        else:
+            pid = None
+    except (OSError, ValueError, IndexError):
+        pid = None
+    if pid is None and not os.path.exists(pid_path):
+        pid, started = find_process(bot['script'])
+        if pid is not None:
+            status['source'] = 'process'
+    
+    if pid is not None:
+        status['pid'] = pid
+        status['running'] = heartbeat_age is None or heartbeat_age <= CONFIG['BOT_HEARTBEAT_STALE']
+        if started:
+            status['started_at'] = datetime.fromtimestamp(started).isoformat(timespec='seconds')
+    elif heartbeat_age is not None and heartbeat_age <= CONFIG['BOT_HEARTBEAT_STALE']:
+        # プロセスを確認できない（別ホスト・権限なし）が heartbeat は新しい
+        status['running'] = True
+        status['source'] = 'heartbeat'
+    return status
+
+def update_portfolio_strategies(store, wallet):
     """戦略データを階層構造(strategies.json)から生成 + ライブ状態を付与"""
     print("Updating portfolio strategies...")
     
@@ -480,18 +2385,8 @@ def update_portfolio_strategies():
         print(f"  Error reading strategies.json: {e}")
         strategies = {}
     
-    # Read all recent trades for stats
-    all_trades = []
-    trade_pattern = os.path.join(CONFIG['BOT_DATA_DIR'], 'trades', 'trades_*.jsonl')
-    for f in sorted(glob.glob(trade_pattern)):
-        with open(f) as fh:
-            for line in fh:
-                try:
-                    t = json.loads(line.strip())
-                    if t.get('strategy', '').upper() not in ('TEST', 'PIPELINE_TEST'):
-                        all_trades.append(t)
-                except:
-                    pass
+    # Trades for stats (test strategies excluded)
+    all_trades = store.live_trades()
     
     # Read live states
     live_states = {}
@@ -515,11 +2410,16 @@ def update_portfolio_strategies():
         with open(gf_legacy) as f:
             grid_states['SOL'] = json.load(f)
     
-    # Check running processes
-    import subprocess
-    ps_out = subprocess.run(['ps', 'aux'], capture_output=True, text=True).stdout
-    cci_running = 'live_trader' in ps_out
-    grid_running = 'jupiter_grid' in ps_out
+    # Bot liveness (pidfile / process / heartbeat)
+    find_process = _bot_process_finder([bot['script'] for bot in BOTS.values()])
+    bot_status = {strat_id: probe_bot(bot, find_process) for strat_id, bot in BOTS.items()}
+    
+    # Realized P&L from completed round-trips, matched for every pair in one pass
+    round_trips = match_round_trips(all_trades, [
+        (strat_id, pair.get('symbol', ''))
+        for strat_id, strat in strategies.items()
+        for pair in strat.get('pairs', {}).values()
+    ])
     
     # Enrich each strategy with live data
     for strat_id, strat in strategies.items():
@@ -556,65 +2456,17 @@ def update_portfolio_strategies():
                         'ref_price': gs.get('ref_price'),
                     }
             
-            # Trade stats per pair
-            pair_trades = [t for t in all_trades 
-                          if (symbol.upper() in str(t.get('output_token', '')).upper()
-                              or symbol.upper() in str(t.get('input_token', '')).upper())
-                          and t.get('strategy', '').upper() == strat_id.upper()]
-            buys = [t for t in pair_trades if t.get('direction', '').lower() == 'buy' or t.get('input_token') == 'USDC']
-            sells = [t for t in pair_trades if t.get('direction', '').lower() == 'sell' or t.get('output_token') == 'USDC']
-            
-            # Calculate realized P&L from completed round-trips only (FIFO matching)
-            sorted_buys = sorted(buys, key=lambda t: t.get('timestamp', ''))
-            sorted_sells = sorted(sells, key=lambda t: t.get('timestamp', ''))
-            realized_pnl = 0.0
-            completed_trips = 0
-            total_invested = 0.0
-            total_returned = 0.0
-            used_sells = set()
-            for b in sorted_buys:
-                buy_usd = b.get('actual_input_amount', b.get('input_amount', 0)) if b.get('input_token') == 'USDC' else 0
-                for j, s in enumerate(sorted_sells):
-                    if j in used_sells: continue
-                    if s.get('timestamp', '') > b.get('timestamp', ''):
-                        sell_usd = s.get('actual_output_amount', s.get('output_amount', 0)) if s.get('output_token') == 'USDC' else 0
-                        if sell_usd > 0.01:
-                            realized_pnl += sell_usd - buy_usd
-                            total_invested += buy_usd
-                            total_returned += sell_usd
-                            completed_trips += 1
-                            used_sells.add(j)
-                            break
-            
-            pair['live_stats'] = {
-                'total_trades': len(pair_trades),
-                'buys': len(buys),
-                'sells': len(sells),
-                'completed_trips': completed_trips,
-                'total_invested': round(total_invested, 2),
-                'total_returned': round(total_returned, 2),
-                'realized_pnl': round(realized_pnl, 2) if completed_trips > 0 else None,
-            }
+            # Trade stats per pair (FIFO round-trips, see match_round_trips)
+            pair['live_stats'] = round_trip_stats(round_trips[(strat_id, symbol)])
         
         # Bot running status
-        if strat_id == 'CCI':
-            strat['bot_running'] = cci_running
-        elif strat_id == 'GRID':
-            strat['bot_running'] = grid_running
-        else:
-            strat['bot_running'] = False
+        strat['bot_status'] = bot_status.get(strat_id, {'running': False})
     
     # Dynamic allocation calculation
-    # Read wallet for total portfolio value
-    wallet_path = os.path.join(CONFIG['OUTPUT_DIR'], 'wallet.json')
-    wallet_total = 0
-    usdc_balance = 0
-    try:
-        with open(wallet_path, 'r') as f:
-            w = json.load(f)
-        wallet_total = w.get('total_usd', 0)
-        usdc_balance = w.get('usdc_balance', 0)
-    except: pass
+    # Wallet (from update_wallet_data) for total portfolio value
+    w = wallet or {}
+    wallet_total = w.get('total_usd', 0)
+    usdc_balance = w.get('usdc_balance', 0)
     
     alloc_config = strat_data.get('portfolio_allocation', {})
     dynamic_alloc = {}
@@ -683,109 +2535,231 @@ def update_portfolio_strategies():
     }
     
     output_path = os.path.join(CONFIG['OUTPUT_DIR'], 'strategies.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    write_json_output(output_path, output, indent=2)
     
     print(f"  Saved {len(strategies)} strategies to {output_path}")
     return output
 
 
+# Resolution tiers of the portfolio history chart: (name, bucket seconds, window seconds).
+# bucket None = every snapshot as recorded, window None = whole history
+HISTORY_TIERS = [
+    ('raw', None, 86400),
+    ('5m', 300, 7 * 86400),
+    ('1h', 3600, 90 * 86400),
+    ('1d', 86400, None),
+]
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets で (x, y, item) の列を threshold 点に間引く
+
+    先頭と末尾は必ず残し、間の各バケットからは前の採用点・次のバケットの平均点と
+    作る三角形が最大になる点を選ぶ。見た目の山・谷が残るので折れ線の間引きに向く。
+    戻り値: 採用した item のリスト
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return [p[2] for p in points]
+    
+    sampled = [points[0][2]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        nxt = points[end:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in nxt) / len(nxt)
+        avg_y = sum(p[1] for p in nxt) / len(nxt)
+        ax, ay = points[a][0], points[a][1]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best][2])
+        a = best
+    sampled.append(points[-1][2])
+    return sampled
+
+def ohlc_buckets(records, bucket_sec):
+    """価格レコード（timestamp, prices{asset: price}）をバケットごとのOHLCに集約
+
+    バケットの区切りは各レコードのタイムゾーンの時刻で揃える（日足はJSTの日付単位）。
+    戻り値: [{'timestamp': バケット開始, asset: [open, high, low, close], ...}, ...]
+    """
+    buckets = []
+    current_start = None
+    for dt, rec in records:
+        offset = dt.utcoffset().total_seconds() if dt.tzinfo else 0
+        start = (dt.timestamp() + offset) // bucket_sec * bucket_sec - offset
+        if start != current_start:
+            current_start = start
+            stamp = datetime.fromtimestamp(start, tz=dt.tzinfo) if dt.tzinfo else datetime.fromtimestamp(start)
+            buckets.append({'timestamp': stamp.isoformat()})
+        bucket = buckets[-1]
+        for asset, price in (rec.get('prices') or {}).items():
+            if not isinstance(price, (int, float)):
+                continue
+            ohlc = bucket.get(asset)
+            if ohlc is None:
+                bucket[asset] = [price, price, price, price]
+            else:
+                ohlc[1] = max(ohlc[1], price)
+                ohlc[2] = min(ohlc[2], price)
+                ohlc[3] = price
+    return buckets
+
+def history_tiers(history, price_history):
+    """資産推移チャート用の解像度別データ（HISTORY_TIERS）を作る
+
+    各ティアの期間は最新のスナップショットから遡る（データが止まっても内容が変わらない）。
+    総資産の折れ線は LTTB でバケット数まで間引き、価格はバケットごとのOHLCにする。
+    """
+    snaps = [(_parse_ts(h['timestamp']), h) for h in history]
+    snaps = sorted((p for p in snaps if p[0]), key=lambda p: p[0].timestamp())
+    prices = [(_parse_ts(r.get('timestamp')), r) for r in price_history]
+    prices = sorted((p for p in prices if p[0]), key=lambda p: p[0].timestamp())
+    latest = max([series[-1][0].timestamp() for series in (snaps, prices) if series], default=0)
+    
+    tiers = {}
+    for name, bucket_sec, window in HISTORY_TIERS:
+        since = latest - window if window else float('-inf')
+        tier_snaps = [(dt, h) for dt, h in snaps if dt.timestamp() >= since]
+        tier_prices = [(dt, r) for dt, r in prices if dt.timestamp() >= since]
+        points = [
+            {'timestamp': h['timestamp'], 'total_usd': h['total_usd'], 'usdc': h['usdc'], 'sol': h['sol']}
+            for _, h in tier_snaps
+        ]
+        if bucket_sec and len(tier_snaps) > 2:
+            span = tier_snaps[-1][0].timestamp() - tier_snaps[0][0].timestamp()
+            threshold = int(span // bucket_sec) + 1
+            points = lttb([(dt.timestamp(), h['total_usd'] or 0, p) for (dt, h), p in zip(tier_snaps, points)], threshold)
+        tiers[name] = {
+            'tier': name,
+            'bucket_sec': bucket_sec,
+            'from': points[0]['timestamp'] if points else None,
+            'to': points[-1]['timestamp'] if points else None,
+            'portfolio_history': points,
+            # raw は記録そのまま、それ以外はバケットごとのOHLC
+            'price_history': ohlc_buckets(tier_prices, bucket_sec) if bucket_sec else [r for _, r in tier_prices],
+        }
+    return tiers
+
+def _history_entry(snap):
+    """スナップショット1件を portfolio_history.json の1要素にする"""
+    return {
+        'timestamp': snap.get('timestamp', ''),
+        'total_usd': snap.get('total_usd', 0),
+        'usdc': snap.get('usdc_balance', 0),
+        'sol': snap.get('sol_balance', 0),
+        'tokens': snap.get('token_balances', {}),
+        'prices': snap.get('prices', {}),
+    }
+
+def _history_point(snap):
+    """ティア計算に使う項目だけのスナップショット（トークン残高・価格は持たない）"""
+    return {
+        'timestamp': snap.get('timestamp', ''),
+        'total_usd': snap.get('total_usd', 0),
+        'usdc': snap.get('usdc_balance', 0),
+        'sol': snap.get('sol_balance', 0),
+    }
+
+def _counted(records, counts, key):
+    """records をそのまま返しつつ件数を counts[key] に数える"""
+    counts[key] = 0
+    for record in records:
+        counts[key] += 1
+        yield record
+
 def update_portfolio_history():
-    """ポートフォリオ履歴データを生成（スナップショットJSONLから）"""
+    """ポートフォリオ履歴データを生成（スナップショットJSONLから。SQLiteストアが有効ならそこから）
+
+    SQLiteストアが有効なときはカーソルから直接ストリーム出力し、全件をリストにしない。
+    """
     print("Updating portfolio history...")
     
     snapshots_dir = os.path.join(CONFIG['BOT_DATA_DIR'], 'portfolio_snapshots')
-    history = []
-    
-    if os.path.exists(snapshots_dir):
-        pattern = os.path.join(snapshots_dir, 'snapshots_*.jsonl')
-        files = sorted(glob.glob(pattern))
-        
-        for file_path in files:
-            try:
-                with open(file_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            snap = json.loads(line)
-                            history.append({
-                                'timestamp': snap.get('timestamp', ''),
-                                'total_usd': snap.get('total_usd', 0),
-                                'usdc': snap.get('usdc_balance', 0),
-                                'sol': snap.get('sol_balance', 0),
-                                'tokens': snap.get('token_balances', {}),
-                                'prices': snap.get('prices', {}),
-                            })
-                        except json.JSONDecodeError:
-                            pass
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-    
-    # 価格履歴も追加
     prices_dir = os.path.join(CONFIG['BOT_DATA_DIR'], 'prices')
-    price_history = []
-    if os.path.exists(prices_dir):
-        pattern = os.path.join(prices_dir, 'prices_*.jsonl')
-        for file_path in sorted(glob.glob(pattern)):
-            try:
-                with open(file_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line:
-                            try:
-                                price_history.append(json.loads(line))
-                            except json.JSONDecodeError:
-                                pass
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-    
-    output = {
-        'portfolio_history': history,
-        'price_history': price_history,
-    }
-    
     output_path = os.path.join(CONFIG['OUTPUT_DIR'], 'portfolio_history.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False)
-    
-    print(f"Saved {len(history)} portfolio snapshots + {len(price_history)} price records")
-    return output
+    counts = {}
+    
+    db = RecordDB.open()
+    if db is not None:
+        with contextlib.closing(db):
+            db.sync('snapshots')
+            db.sync('prices')
+            write_json_output(output_path, {
+                'portfolio_history': _counted((_history_entry(s) for s in db.snapshots()), counts, 'snapshots'),
+                'price_history': _counted(db.prices(), counts, 'prices'),
+            })
+            # ティアは項目を絞ったスナップショットで別途計算する
+            tiers = history_tiers((_history_point(s) for s in db.snapshots()), db.prices())
+    else:
+        snapshots = []
+        price_history = []
+        if os.path.exists(snapshots_dir):
+            snapshots = read_jsonl_files(os.path.join(snapshots_dir, 'snapshots_*.jsonl'), SnapshotRecord)
+        # 価格履歴も追加
+        if os.path.exists(prices_dir):
+            price_history = read_jsonl_files(os.path.join(prices_dir, 'prices_*.jsonl'))
+        write_json_output(output_path, {
+            'portfolio_history': _counted((_history_entry(s) for s in snapshots), counts, 'snapshots'),
+            'price_history': _counted(price_history, counts, 'prices'),
+        })
+        tiers = history_tiers([_history_point(s) for s in snapshots], price_history)
+    
+    # ダッシュボードは表示期間に合ったティア（history/portfolio_<tier>.json）だけを読む。
+    # 価格のOHLCは別ファイル（history/prices_<tier>.json）
+    tier_dir = os.path.join(CONFIG['OUTPUT_DIR'], 'history')
+    os.makedirs(tier_dir, exist_ok=True)
+    for name, tier in tiers.items():
+        meta = {k: tier[k] for k in ('tier', 'bucket_sec', 'from', 'to')}
+        write_json_output(os.path.join(tier_dir, f'portfolio_{name}.json'), {**meta, 'portfolio_history': tier['portfolio_history']})
+        write_json_output(os.path.join(tier_dir, f'prices_{name}.json'), {**meta, 'price_history': tier['price_history']})
+    
+    print(f"Saved {counts['snapshots']} portfolio snapshots + {counts['prices']} price records")
+    print("  Tiers: " + ', '.join(f"{name} {len(t['portfolio_history'])}/{len(t['price_history'])}" for name, t in tiers.items()))
+    return counts
+
 
+# Agent workspaces collected by update_agent_memories (also watched in --watch mode)
+AGENTS = {
+    'clawdia': {
+        'name': 'Clawdia 🩶',
+        'workspace': os.path.expanduser('~/.openclaw/workspace/'),
+        'files': ['MEMORY.md', 'SOUL.md', 'HEARTBEAT.md', 'TOOLS.md', 'IDENTITY.md'],
+        'folders': ['recollection', 'emotion', 'persona']
+    },
+    'talon': {
+        'name': 'Talon 🦅',
+        'workspace': os.path.expanduser('~/.openclaw/workspace-talon/'),
+        'files': ['MEMORY.md', 'SOUL.md', 'HEARTBEAT.md', 'TOOLS.md', 'IDENTITY.md'],
+        'folders': []
+    },
+    'velvet': {
+        'name': 'Velvet 🌙',
+        'workspace': os.path.expanduser('~/.openclaw/workspace-velvet/'),
+        'files': ['MEMORY.md', 'SOUL.md', 'HEARTBEAT.md', 'TOOLS.md', 'IDENTITY.md'],
+        'folders': []
+    }
+}
 
 def update_agent_memories():
-    """全エージェントのメモリファイルを収集"""
+    """全エージェントのメモリファイルを収集
+
+    memories.json にはファイルごとのタイトル・プレビュー・サイズ・ハッシュだけを載せ、
+    本文は docs/memories/<hash>.md に置く（dashboard.js が開いたときに読む）。
+    """
     print("Updating agent memories...")
+    keep = set()
     
-    agents = {
-        'clawdia': {
-            'name': 'Clawdia 🩶',
-            'workspace': os.path.expanduser('~/.openclaw/workspace/'),
-            'files': ['MEMORY.md', 'SOUL.md', 'HEARTBEAT.md', 'TOOLS.md', 'IDENTITY.md'],
-            'folders': ['recollection', 'emotion', 'persona']
-        },
-        'talon': {
-            'name': 'Talon 🦅',
-            'workspace': os.path.expanduser('~/.openclaw/workspace-talon/'),
-            'files': ['MEMORY.md', 'SOUL.md', 'HEARTBEAT.md', 'TOOLS.md', 'IDENTITY.md'],
-            'folders': []
-        },
-        'velvet': {
-            'name': 'Velvet 🌙',
-            'workspace': os.path.expanduser('~/.openclaw/workspace-velvet/'),
-            'files': ['MEMORY.md', 'SOUL.md', 'HEARTBEAT.md', 'TOOLS.md', 'IDENTITY.md'],
-            'folders': []
-        }
-    }
-    
-    import re
-    def redact(content):
-        content = re.sub(r'ghp_[A-Za-z0-9]{36}', 'ghp_***REDACTED***', content)
-        content = re.sub(r'MTQ3[A-Za-z0-9._\-]{50,}', 'MTQ3***REDACTED***', content)
-        content = re.sub(r'sk-ant-[A-Za-z0-9\-]+', 'sk-ant-***REDACTED***', content)
-        content = re.sub(r'daughter insect.*?file', '***SEED_REDACTED***', content)
-        return content
+    def file_entry(path):
+        doc = read_document(path, redacted=True)
+        entry = {'title': doc['title'], 'preview': doc['preview'], **write_doc_body('memories', doc['content'])}
+        keep.add(entry['hash'])
+        return entry
     
     def scan_folder(folder_path):
         """Recursively scan a folder and return a tree structure"""
@@ -799,18 +2773,16 @@ def update_agent_memories():
             if os.path.isdir(item_path):
                 tree[item + '/'] = {'type': 'folder', 'children': scan_folder(item_path)}
             elif item.endswith('.md'):
-                with open(item_path, 'r', encoding='utf-8') as f:
-                    tree[item] = {'type': 'file', 'content': redact(f.read())}
+                tree[item] = {'type': 'file', **file_entry(item_path)}
         return tree
     
     result = {}
-    for agent_id, agent in agents.items():
+    for agent_id, agent in AGENTS.items():
         agent_data = {'name': agent['name'], 'files': {}, 'folders': {}}
         for fname in agent['files']:
             fpath = os.path.join(agent['workspace'], fname)
             if os.path.exists(fpath):
-                with open(fpath, 'r', encoding='utf-8') as f:
-                    agent_data['files'][fname] = redact(f.read())
+                agent_data['files'][fname] = file_entry(fpath)
         for folder_name in agent.get('folders', []):
             folder_path = os.path.join(agent['workspace'], folder_name)
             if os.path.isdir(folder_path):
@@ -818,15 +2790,15 @@ def update_agent_memories():
         result[agent_id] = agent_data
     
     output_path = os.path.join(CONFIG['OUTPUT_DIR'], 'memories.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    write_json_output(output_path, result, indent=2)
+    prune_doc_bodies('memories', keep)
     
     total_files = sum(len(a['files']) for a in result.values())
     print(f"  Saved {total_files} memory files from {len(result)} agents")
     return result
 
 
-def update_meme_data(all_trades):
+def update_meme_data(store):
     """ミームタブ用データを生成"""
     meme = {
         'scanner': {'tracking': [], 'last_scan': None},
@@ -866,11 +2838,9 @@ def update_meme_data(all_trades):
         except:
             pass
     
-    # Meme trades (filter from all trades)
-    meme['trades'] = [
-        t for t in all_trades
-        if t.get('strategy', '').startswith('MEME')
-    ]
+    # Meme trades (the index keys are case-folded, so re-check the case-sensitive prefix)
+    meme_strategies = [s for s in store.keys('strategy') if s.startswith('MEME')]
+    meme['trades'] = [t for t in store.select(strategy=meme_strategies) if t.get('strategy', '').startswith('MEME')]
     
     # Onchain P&L summary
     onchain_cache_dir = os.path.join(CONFIG['BOT_DATA_DIR'], 'onchain_tx_cache')
@@ -912,8 +2882,7 @@ def update_meme_data(all_trades):
     
     # Save
     out = os.path.join(CONFIG['OUTPUT_DIR'], 'meme.json')
-    with open(out, 'w', encoding='utf-8') as f:
-        json.dump(meme, f, ensure_ascii=False, indent=2)
+    write_json_output(out, meme, indent=2)
     
     print(f"Saved meme data: {len(meme['scanner']['tracking'])} tracking, {len(meme['trades'])} trades")
     return meme
@@ -927,33 +2896,152 @@ def update_paper_trading():
     if not os.path.exists(paper_summary):
         print("  Paper trading: no data yet")
         # Write empty placeholder
-        with open(output_path, 'w') as f:
-            json.dump({"updated": None, "total_completed": 0, "param_summary": {}, "open_positions": [], "recent_completed": []}, f)
+        write_json_output(output_path, {"updated": None, "total_completed": 0, "param_summary": {}, "open_positions": [], "recent_completed": []})
         return {}
 
     with open(paper_summary) as f:
         data = json.load(f)
 
     # Pass through to dashboard (summary.json already has the right structure)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json_output(output_path, data, indent=2)
 
     n = data.get("total_completed", 0)
     print(f"  Paper trading: {n} completed, {data.get('total_open', 0)} open")
     return data
 
 
-def update_creative_data():
-    """Creative（アート・エッセイ・日記）データを更新"""
-    workspace = CONFIG.get('WORKSPACE_DIR', '/Users/oc.hikarimaru/.openclaw/workspace')
-    creative_dir = os.path.join(workspace, 'creative')
+def _workspace_dir():
+    """Creativeデータのあるワークスペース"""
+    return CONFIG.get('WORKSPACE_DIR', '/Users/oc.hikarimaru/.openclaw/workspace')
+
+# Gallery image variants (see update_creative_images)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+IMAGE_CACHE_PATH = os.path.join(CONFIG['CACHE_DIR'], 'images.json')
+IMAGE_VARIANT_DIR = 'creative/variants'  # under OUTPUT_DIR
+THUMB_WIDTHS = (400, 800)  # gallery cards are 280-400px wide; 800 covers 2x screens
+WEBP_QUALITY = 82
+
+def _png_size(path):
+    """PNGのIHDRから (width, height)。PNGでなければ None（Pillowがないときの寸法取得用）"""
+    with open(path, 'rb') as f:
+        head = f.read(24)
+    if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24])
+    return None
+
+def _write_image_variants(src_path, digest):
+    """src_path の WebP サムネイル（THUMB_WIDTHS）と原寸 WebP を書き、メタデータを返す
+
+    ファイル名は元画像の内容ハッシュ（<digest>-<幅>.webp・<digest>.webp）。
+    元画像より大きいサムネイルは作らない。
+    """
+    with Image.open(src_path) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        width, height = img.size
+        outputs = {f'{digest}.webp': img}
+        thumbs = {}
+        for w in THUMB_WIDTHS:
+            if w >= width:
+                continue
+            name = f'{digest}-{w}.webp'
+            outputs[name] = img.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+            thumbs[str(w)] = f'{IMAGE_VARIANT_DIR}/{name}'
+        for name, variant in outputs.items():
+            buf = io.BytesIO()
+            variant.save(buf, 'WEBP', quality=WEBP_QUALITY)
+            _atomic_write(os.path.join(CONFIG['OUTPUT_DIR'], IMAGE_VARIANT_DIR, name), buf.getvalue())
+            count_io(bytes_written=buf.tell())
+    return {'width': width, 'height': height, 'thumbs': thumbs, 'webp': f'{IMAGE_VARIANT_DIR}/{digest}.webp'}
+
+def update_creative_images():
+    """creative/art/ の画像ごとに寸法・内容ハッシュ・サムネイル・WebP版を用意する
+
+    戻り値: ファイル名 → {'hash', 'width', 'height', 'thumbs': {幅: パス}, 'webp': パス}
+    元画像の (mtime_ns, サイズ) が前回と同じなら .cache/images.json の結果をそのまま使い、
+    変わっていても内容のハッシュが同じなら作り直さない。
+    Pillow がなければ寸法（PNGのみ）とハッシュだけを返し、ギャラリーは元画像を使う。
+    """
+    art_dir = os.path.join(_workspace_dir(), 'creative', 'art')
+    variant_dir = os.path.join(CONFIG['OUTPUT_DIR'], IMAGE_VARIANT_DIR)
+    try:
+        with open(IMAGE_CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if Image is None:
+        print("  Pillow not installed: skipping thumbnails and WebP variants")
+    
+    images = {}
+    new_cache = {}
+    generated = 0
+    files = sorted(os.listdir(art_dir)) if os.path.isdir(art_dir) else []
+    for f in files:
+        if not f.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        src_path = os.path.join(art_dir, f)
+        try:
+            st = os.stat(src_path)
+            entry = cache.get(src_path)
+            digest = entry['hash'] if entry else None
+            if entry and (entry['mtime_ns'], entry['size']) != (st.st_mtime_ns, st.st_size):
+                with open(src_path, 'rb') as fh:
+                    digest = hashlib.sha256(fh.read()).hexdigest()[:16]
+                count_io(bytes_read=st.st_size)
+                entry = entry if entry['hash'] == digest else None
+            variants = [entry['webp'], *entry['thumbs'].values()] if entry and entry.get('webp') else []
+            stale = entry is None or (Image is not None and not entry.get('webp')) \
+                or not all(os.path.exists(os.path.join(CONFIG['OUTPUT_DIR'], v)) for v in variants)
+            if stale:
+                if digest is None:
+                    with open(src_path, 'rb') as fh:
+                        digest = hashlib.sha256(fh.read()).hexdigest()[:16]
+                    count_io(bytes_read=st.st_size)
+                if Image is not None:
+                    os.makedirs(variant_dir, exist_ok=True)
+                    meta = _write_image_variants(src_path, digest)
+                    generated += 1
+                else:
+                    width, height = _png_size(src_path) or (None, None)
+                    meta = {'width': width, 'height': height, 'thumbs': {}, 'webp': None}
+                entry = {'hash': digest, **meta}
+            entry = {**entry, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}  # cache stays as loaded
+        except Exception as e:
+            # 前回の結果があればそれを使い続ける（その派生画像も削除しない）
+            print(f"Error processing image {src_path}: {e}")
+            entry = cache.get(src_path)
+            if entry is None:
+                continue
+        new_cache[src_path] = entry
+        images[f] = {k: entry[k] for k in ('hash', 'width', 'height', 'thumbs', 'webp')}
+    
+    # 参照されなくなった派生画像を削除
+    if os.path.isdir(variant_dir):
+        keep = {os.path.basename(p) for meta in images.values() for p in [meta['webp'], *meta['thumbs'].values()] if p}
+        for name in os.listdir(variant_dir):
+            if name not in keep:
+                remove_output(os.path.join(variant_dir, name))
+    
+    if new_cache != cache:
+        os.makedirs(CONFIG['CACHE_DIR'], exist_ok=True)
+        _atomic_write(IMAGE_CACHE_PATH, json.dumps(new_cache, indent=2).encode('utf-8'))
+    print(f"🖼️ Images: {len(images)} ({generated} regenerated)")
+    return images
+
+def update_creative_data(images):
+    """Creative（アート・エッセイ・日記）データを更新
+
+    ギャラリーには update_creative_images の寸法・ハッシュ・サムネイルを付ける。
+    エッセイ・日記の本文は docs/creative/<hash>.md に置き、creative.json には索引だけを載せる。
+    """
+    creative_dir = os.path.join(_workspace_dir(), 'creative')
     data = {'gallery': [], 'essays': [], 'diary': []}
 
     # Gallery - art/
     art_dir = os.path.join(creative_dir, 'art')
     if os.path.isdir(art_dir):
         for f in sorted(os.listdir(art_dir)):
-            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
+            if f.lower().endswith(IMAGE_EXTENSIONS):
                 # Extract date from filename if possible
                 name = os.path.splitext(f)[0]
                 fpath = os.path.join(art_dir, f)
@@ -962,26 +3050,21 @@ def update_creative_data():
                     'filename': f,
                     'name': name,
                     'path': f'creative/art/{f}',
-                    'date': mtime
+                    'date': mtime,
+                    **images.get(f, {}),
                 })
 
     # Essays
     for f in sorted(os.listdir(creative_dir)):
         if f.startswith('essay') and f.endswith('.md'):
-            fpath = os.path.join(creative_dir, f)
-            with open(fpath, 'r', encoding='utf-8') as fh:
-                content = fh.read()
             # First line as title
-            lines = content.strip().split('\n')
-            title = lines[0].lstrip('#').strip() if lines else f
-            preview = '\n'.join(lines[1:4]).strip() if len(lines) > 1 else ''
-            mtime = datetime.fromtimestamp(os.path.getmtime(fpath)).isoformat()
+            doc = read_document(os.path.join(creative_dir, f))
             data['essays'].append({
                 'filename': f,
-                'title': title,
-                'preview': preview,
-                'content': content,
-                'date': mtime
+                'title': doc['title'],
+                'preview': doc['preview'],
+                'date': datetime.fromtimestamp(doc['mtime']).isoformat(),
+                **write_doc_body('creative', doc['content']),
             })
 
     # Diary
@@ -989,49 +3072,411 @@ def update_creative_data():
     if os.path.isdir(diary_dir):
         for f in sorted(os.listdir(diary_dir), reverse=True):
             if f.endswith('.md'):
-                fpath = os.path.join(diary_dir, f)
-                with open(fpath, 'r', encoding='utf-8') as fh:
-                    content = fh.read()
-                lines = content.strip().split('\n')
-                title = lines[0].lstrip('#').strip() if lines else f
-                preview = '\n'.join(lines[1:4]).strip() if len(lines) > 1 else ''
-                mtime = datetime.fromtimestamp(os.path.getmtime(fpath)).isoformat()
+                doc = read_document(os.path.join(diary_dir, f))
                 data['diary'].append({
                     'filename': f,
-                    'title': title,
-                    'preview': preview,
-                    'content': content,
-                    'date': mtime
+                    'title': doc['title'],
+                    'preview': doc['preview'],
+                    'date': datetime.fromtimestamp(doc['mtime']).isoformat(),
+                    **write_doc_body('creative', doc['content']),
                 })
 
     out_path = os.path.join(CONFIG['OUTPUT_DIR'], 'creative.json')
-    with open(out_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json_output(out_path, data, indent=2)
+    prune_doc_bodies('creative', {item['hash'] for item in data['essays'] + data['diary']})
     print(f"🎨 Creative: {len(data['gallery'])} art, {len(data['essays'])} essays, {len(data['diary'])} diary entries")
     return data
 
 
-def main():
-    """メイン処理"""
-    print("🤖 Clawdia Dashboard Data Updater")
-    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+# Full-text search over daily reports and agent memories (see update_search_index)
+SEARCH_DIR = 'search'
+SEARCH_SHARDS = 16
+SEARCH_TERMS_PATH = os.path.join(CONFIG['CACHE_DIR'], 'search_terms.pkl')
+SEARCH_TERMS_VERSION = 2
+_SEARCH_SPLIT_RE = re.compile(r'[\W_]+')
+
+def search_terms(text):
+    """索引に載せる語: NFKC正規化・小文字化して記号と空白で区切り、各区間の文字と文字bigram
+
+    日本語は分かち書きせずbigramで引く。dashboard.js の searchTerms は検索語の各区間を
+    bigram（1文字の区間はその文字）にするので、「金」「株」のような1文字の語も
+    長い語の中の出現に一致するよう、索引には1文字ずつの語も入れる。
+    """
+    terms = []
+    for run in _SEARCH_SPLIT_RE.split(unicodedata.normalize('NFKC', text).lower()):
+        terms.extend(run)
+        terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+def search_shard(term):
+    """語の入るシャード番号（dashboard.js の searchShard と同じ）"""
+    h = 0
+    for ch in term:
+        h = (h * 31 + ord(ch)) % SEARCH_SHARDS
+    return h
+
+def _memory_search_docs(memories):
+    """update_agent_memories の結果から検索対象の (path, entry) を列挙"""
+    def walk(tree, prefix):
+        for name, node in tree.items():
+            if node.get('type') == 'folder':
+                yield from walk(node.get('children', {}), prefix + name)
+            elif node.get('type') == 'file':
+                yield prefix + name, node
+    for agent_id, agent in memories.items():
+        for fname, entry in agent.get('files', {}).items():
+            yield f'{agent_id}/{fname}', entry
+        for folder_name, tree in agent.get('folders', {}).items():
+            yield from walk(tree, f'{agent_id}/{folder_name}/')
+
+def update_search_index(daily_reports, memories):
+    """日報・エージェントメモリ（redact済みの本文）の全文検索インデックスを作る
+
+    search/index.json に文書一覧（種類・ハッシュ・タイトル・場所・語数）、
+    search/shard_NN.json に語 → [文書番号, 出現回数, ...] の転置リストを語のハッシュで分けて置く。
+    dashboard.js は検索語の入るシャードだけを読み、BM25で順位を付ける。
+    文書ごとの語の集計は本文のハッシュで .cache/search_terms.pkl に保存し、変わった文書だけ数え直す。
+    """
+    docs = [
+        {'kind': 'reports', 'hash': r['hash'], 'title': r['title'] or r['date'], 'path': r['date']}
+        for r in daily_reports
+    ]
+    docs += [
+        {'kind': 'memories', 'hash': entry['hash'], 'title': entry['title'] or path.rsplit('/', 1)[-1], 'path': path}
+        for path, entry in _memory_search_docs(memories)
+    ]
     
-    # 出力ディレクトリ作成
-    ensure_output_dir()
+    cached = {}
+    try:
+        with open(SEARCH_TERMS_PATH, 'rb') as f:
+            saved = pickle.load(f)
+        if saved.get('version') == SEARCH_TERMS_VERSION:
+            cached = saved.get('docs', {})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Search term cache unreadable, starting fresh: {e}")
+    
+    counts = {}
+    recounted = 0
+    for doc in docs:
+        if doc['hash'] in counts:
+            continue
+        if doc['hash'] not in cached:
+            body_path = os.path.join(CONFIG['OUTPUT_DIR'], DOC_BODY_DIR, doc['kind'], f"{doc['hash']}.md")
+            with open(body_path, 'r', encoding='utf-8') as f:
+                terms = search_terms(f.read())
+            tf = {}
+            for term in terms:
+                tf[term] = tf.get(term, 0) + 1
+            cached[doc['hash']] = (tf, len(terms))
+            recounted += 1
+        counts[doc['hash']] = cached[doc['hash']]
+    
+    shards = [{} for _ in range(SEARCH_SHARDS)]
+    for doc_id, doc in enumerate(docs):
+        tf, doc['len'] = counts[doc['hash']]
+        for term, n in tf.items():
+            shards[search_shard(term)].setdefault(term, []).extend((doc_id, n))
+    
+    search_dir = os.path.join(CONFIG['OUTPUT_DIR'], SEARCH_DIR)
+    os.makedirs(search_dir, exist_ok=True)
+    for i, shard in enumerate(shards):
+        write_json_output(os.path.join(search_dir, f'shard_{i:02d}.json'), shard)
+    index = {
+        'version': 2,
+        'shards': SEARCH_SHARDS,
+        'avg_len': round(sum(d['len'] for d in docs) / len(docs), 2) if docs else 0,
+        'docs': docs,
+    }
+    write_json_output(os.path.join(search_dir, 'index.json'), index)
+    
+    os.makedirs(CONFIG['CACHE_DIR'], exist_ok=True)
+    _atomic_write(SEARCH_TERMS_PATH, pickle.dumps(
+        {'version': SEARCH_TERMS_VERSION, 'docs': counts}, protocol=pickle.HIGHEST_PROTOCOL))
     
+    terms_total = sum(len(shard) for shard in shards)
+    print(f"  Search index: {len(docs)} documents, {terms_total} terms ({recounted} documents re-tokenized)")
+    return index
+
+# Pipeline stages: name, function, inputs (stages whose results are passed as
+# arguments, in order) and outputs (files written under OUTPUT_DIR)
+STAGES = [
+    {'name': 'trade_store', 'func': TradeStore.load, 'inputs': [], 'outputs': []},
+    {'name': 'trades', 'func': update_trades_data, 'inputs': ['trade_store'], 'outputs': ['trades.json']},
+    {'name': 'trade_shards', 'func': update_trade_shards, 'inputs': ['trade_store'], 'outputs': ['trades_index.json', 'trades_recent.json', 'trades/']},
+    {'name': 'signals', 'func': update_signals_data, 'inputs': [], 'outputs': ['signals.json', 'signal_series.json']},
+    {'name': 'wallet', 'func': update_wallet_data, 'inputs': [], 'outputs': ['wallet.json']},
+    {'name': 'tasks', 'func': update_tasks_data, 'inputs': [], 'outputs': ['tasks.json']},
+    {'name': 'daily_reports', 'func': update_daily_reports_data, 'inputs': ['trade_store'], 'outputs': ['daily_reports.json', 'docs/reports/']},
+    {'name': 'strategies', 'func': update_portfolio_strategies, 'inputs': ['trade_store', 'wallet'], 'outputs': ['strategies.json']},
+    {'name': 'portfolio_history', 'func': update_portfolio_history, 'inputs': [], 'outputs': ['portfolio_history.json', 'history/']},
+    {'name': 'memories', 'func': update_agent_memories, 'inputs': [], 'outputs': ['memories.json', 'docs/memories/']},
+    {'name': 'meme', 'func': update_meme_data, 'inputs': ['trade_store'], 'outputs': ['meme.json']},
+    {'name': 'paper_trading', 'func': update_paper_trading, 'inputs': [], 'outputs': ['paper_trading.json']},
+    {'name': 'creative_images', 'func': update_creative_images, 'inputs': [], 'outputs': ['creative/variants/']},
+    {'name': 'creative', 'func': update_creative_data, 'inputs': ['creative_images'], 'outputs': ['creative.json', 'docs/creative/']},
+    {'name': 'search_index', 'func': update_search_index, 'inputs': ['daily_reports', 'memories'], 'outputs': ['search/']},
+]
+
+def stage_sources():
+    """ステージごとの入力ファイル・ディレクトリ（globパターン可）。--watch で変更を判定する"""
+    bot = CONFIG['BOT_DATA_DIR']
+    workspace = _workspace_dir()
+    memories = []
+    for agent in AGENTS.values():
+        memories += [os.path.join(agent['workspace'], f) for f in agent['files']]
+        memories += [os.path.join(agent['workspace'], d) for d in agent['folders']]
+    return {
+        'trade_store': [os.path.join(bot, 'trades')],
+        'signals': [os.path.join(bot, 'signal_logs')],
+        'wallet': [os.path.join(bot, 'latest_snapshot.json')],
+        'tasks': ['../tasks.json'],
+        'daily_reports': ['../memory'],
+        'strategies': [
+            os.path.join(bot, '..', 'strategies.json'),
+            os.path.join(bot, 'live_state_*.json'),
+            os.path.join(bot, 'grid_state*.json'),
+            os.path.join(bot, 'run', '*.pid'),
+        ],
+        'portfolio_history': [os.path.join(bot, 'portfolio_snapshots'), os.path.join(bot, 'prices')],
+        'memories': memories,
+        'meme': [
+            os.path.join(bot, 'meme_scans'),
+            os.path.join(bot, 'meme_risk_survey_v2.json'),
+            os.path.join(bot, 'onchain_tx_cache'),
+        ],
+        'paper_trading': [os.path.join(bot, 'paper_trades')],
+        'creative_images': [os.path.join(workspace, 'creative', 'art')],
+        'creative': [os.path.join(workspace, 'creative')],
+    }
+
+def _source_matches(source, path):
+    source = os.path.abspath(source)
+    return path == source or path.startswith(source + os.sep) or fnmatch.fnmatch(path, source)
+
+def stages_for_changes(stages, changed_paths):
+    """変更されたパスを入力に持つステージと、その下流のステージを定義順で返す"""
+    sources = stage_sources()
+    changed = [os.path.abspath(p) for p in changed_paths]
+    selected = {
+        name for name, paths in sources.items()
+        if any(_source_matches(src, path) for src in paths for path in changed)
+    }
+    for stage in stages:  # 依存先が先に並んでいるので1回の走査で下流まで伝播する
+        if any(dep in selected for dep in stage['inputs']):
+            selected.add(stage['name'])
+    return [stage for stage in stages if stage['name'] in selected]
+
+def _thread_io():
+    """現在のスレッドの (rchar, wchar)。/proc/thread-self/io がない環境では None"""
     try:
-        # 各データを更新
-        trades = update_trades_data()
-        signals = update_signals_data()
-        wallet = update_wallet_data()
-        tasks = update_tasks_data()
-        daily_reports = update_daily_reports_data()
-        strategies = update_portfolio_strategies()
-        portfolio_history = update_portfolio_history()
-        memories = update_agent_memories()
-        meme_data = update_meme_data(trades)
-        paper = update_paper_trading()
-        creative = update_creative_data()
+        with open('/proc/thread-self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def _peak_rss_kb():
+    """プロセスのピークRSS（KB）"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOSはバイト単位
+
+def run_instrumented(stage, args, t0, profile_dir=None, metrics=None):
+    """ステージを実行して戻り値を返し、計測値を metrics（dict）に書き込む
+
+    ステージが例外を投げた場合も計測値を書き込み、'failed': True を付けてから例外を再送出する
+    （失敗したステージの所要時間も perf_history に残すため）。
+    wall/cpu はステージのスレッドで計測。bytes_read は /proc/thread-self/io の
+    rchar（なければJSONLリーダーの読み込みバイト数）、bytes_written は
+    write_json_output() が実際に書いたバイト数（変更なしで省略した分は含まない）。
+    rss_peak_delta_kb はプロセス全体のピークRSSの増分なので、並列実行中は
+    他のステージの分も含みうる。
+    """
+    metrics = {} if metrics is None else metrics
+    counters = {'bytes_read': 0, 'records_parsed': 0, 'bytes_written': 0}
+    _stage_counters.current = counters
+    io_before = _thread_io()
+    rss_before = _peak_rss_kb()
+    profiler = cProfile.Profile() if profile_dir else None
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    failed = True
+    try:
+        if profiler:
+            profiler.enable()
+        try:
+            result = stage['func'](*args)
+        finally:
+            if profiler:
+                profiler.disable()
+        failed = False
+        return result
+    finally:
+        cpu = time.thread_time() - cpu_start
+        end = time.perf_counter()
+        _stage_counters.current = None
+        io_after = _thread_io()
+        metrics.update({
+            'start': round(start - t0, 4),
+            'end': round(end - t0, 4),
+            'wall': round(end - start, 4),
+            'cpu': round(cpu, 4),
+            'rss_peak_delta_kb': _peak_rss_kb() - rss_before,
+            'bytes_read': io_after[0] - io_before[0] if io_before and io_after else counters['bytes_read'],
+            'records_parsed': counters['records_parsed'],
+            'bytes_written': counters['bytes_written'],
+        })
+        if failed:
+            metrics['failed'] = True
+        if profiler:
+            profiler.dump_stats(os.path.join(profile_dir, f"{stage['name']}.prof"))
+
+def run_stages(stages, max_workers=None, profile_dir=None, initial=None):
+    """依存関係（inputs）を満たしたステージからスレッドプールで並列実行する
+
+    失敗したステージに依存するステージはスキップする。
+    initial には今回実行しないステージの前回の結果を渡せる（--watch の部分更新用）。
+    profile_dir を指定すると各ステージをcProfileで計測し <stage>.prof に保存する
+    （cProfileは同時に1つしか有効にできないので直列実行になる）。
+    戻り値: (results, metrics, errors)
+      results: {stage名: 戻り値}
+      metrics: {stage名: run_instrumented() のメトリクス}（失敗したステージは 'failed': True 付き）
+      errors: {stage名: 例外 or スキップ理由}
+    """
+    initial = initial or {}
+    by_name = {stage['name']: stage for stage in stages}
+    for stage in stages:
+        for dep in stage['inputs']:
+            if dep not in by_name and dep not in initial:
+                raise ValueError(f"Stage {stage['name']} depends on unknown stage {dep}")
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        max_workers = 1
+    
+    results = {name: value for name, value in initial.items() if name not in by_name}
+    metrics = {}
+    errors = {}
+    pending = list(stages)
+    running = {}
+    t0 = time.perf_counter()
+    
+    def run(stage):
+        stage_metrics = {}
+        try:
+            return run_instrumented(stage, [results[dep] for dep in stage['inputs']], t0, profile_dir, stage_metrics)
+        finally:
+            if stage_metrics:
+                metrics[stage['name']] = stage_metrics
+    
+    with ThreadPoolExecutor(max_workers=max_workers or CONFIG['MAX_WORKERS']) as pool:
+        while pending or running:
+            for stage in list(pending):
+                failed = [dep for dep in stage['inputs'] if dep in errors]
+                if failed:
+                    errors[stage['name']] = f"skipped (depends on failed {', '.join(failed)})"
+                    pending.remove(stage)
+                elif all(dep in results for dep in stage['inputs']):
+                    running[pool.submit(run, stage)] = stage
+                    pending.remove(stage)
+            if not running:
+                if pending:
+                    raise ValueError(f"Dependency cycle among stages: {[s['name'] for s in pending]}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    results[stage['name']] = future.result()
+                except Exception as e:
+                    print(f"❌ Stage {stage['name']} failed: {e}")
+                    traceback.print_exception(e)
+                    errors[stage['name']] = e
+    
+    return results, metrics, errors
+
+def critical_path(stages, metrics):
+    """実行時間ベースのクリティカルパス（最も長い依存チェーン）を返す: (秒, [stage名...])"""
+    best = {}
+    for stage in stages:  # STAGES は依存先が先に並ぶ順序で定義されている
+        name = stage['name']
+        if name not in metrics:
+            continue
+        prev = max((best[dep] for dep in stage['inputs'] if dep in best), default=(0.0, []))
+        best[name] = (prev[0] + metrics[name]['wall'], prev[1] + [name])
+    return max(best.values(), default=(0.0, []))
+
+def record_perf_history(entry):
+    """perf_history.jsonl に1行追記（上限を超えたら古い半分を捨てる）"""
+    with open(PERF_HISTORY_PATH, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    if os.path.getsize(PERF_HISTORY_PATH) > PERF_HISTORY_MAX_BYTES:
+        with open(PERF_HISTORY_PATH, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(PERF_HISTORY_PATH, 'w', encoding='utf-8') as f:
+            f.writelines(lines[len(lines) // 2:])
+
+def print_profile(profile_dir, stages, limit=25):
+    """ステージごとの.profをまとめて累積時間順に表示"""
+    paths = [os.path.join(profile_dir, f"{stage['name']}.prof") for stage in stages]
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths:
+        return
+    stats = pstats.Stats(*paths)
+    stats.dump_stats(os.path.join(profile_dir, 'pipeline.prof'))
+    stats.sort_stats('cumulative').print_stats(limit)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Clawdia Dashboard Data Updater')
+    parser.add_argument('--profile', action='store_true',
+                        help='cProfileで各ステージを計測し .cache/profile/ に保存（UPDATE_PROFILE=1 と同じ）')
+    parser.add_argument('--watch', action='store_true',
+                        help='常駐して入力ファイルの変更を監視し、変更のあったステージだけを再実行する')
+    parser.add_argument('--poll', action='store_true',
+                        help='--watch でinotifyを使わずポーリングで監視する')
+    return parser.parse_args(argv)
+
+def run_update(stages, previous=None, profile_dir=None):
+    """ステージを実行してサマリーを書き出す。前回の結果とマージした results を返す"""
+    results = dict(previous or {})
+    reset_redaction_stats()
+    try:
+        # 各データを更新（独立したステージは並列実行）
+        new_results, metrics, errors = run_stages(stages, profile_dir=profile_dir, initial=previous)
+        results.update(new_results)
+        
+        wall = max((m['end'] for m in metrics.values()), default=0.0)
+        serial = sum(m['wall'] for m in metrics.values())
+        path_time, path = critical_path(stages, metrics)
+        print(f"\n⏱️ {wall:.2f}s wall, {serial:.2f}s if serial, critical path {path_time:.2f}s ({' → '.join(path)})")
+        for name, m in sorted(metrics.items(), key=lambda kv: -kv[1]['wall']):
+            print(f"  {name:<18} {m['wall']:7.3f}s wall {m['cpu']:7.3f}s cpu "
+                  f"{m['bytes_read']:>10,}B in {m['records_parsed']:>7,} rec {m['bytes_written']:>10,}B out "
+                  f"{m['rss_peak_delta_kb']:>+8,}KB rss{' (failed)' if m.get('failed') else ''}")
+        perf = {
+            'wall': round(wall, 4),
+            'serial': round(serial, 4),
+            'critical_path': {'seconds': round(path_time, 4), 'stages': path},
+            'stages': metrics,
+            'redaction': redaction_stats(),
+        }
+        record_perf_history({'timestamp': datetime.now().isoformat(), 'failed': list(errors), **perf})
+        if profile_dir:
+            print_profile(profile_dir, stages)
+        
+        if errors:
+            print(f"\n❌ Update failed: {len(errors)} stage(s) failed")
+            for name, err in errors.items():
+                print(f"  {name}: {err}")
+            return results
+        
+        trades = results['trades']
+        signals = results['signals']
+        wallet = results['wallet']
+        tasks = results['tasks']
+        daily_reports = results['daily_reports']
         
         # サマリー作成
         summary = {
@@ -1040,12 +3485,12 @@ def main():
             'signals_count': len(signals),
             'tasks_count': len(tasks),
             'daily_reports_count': len(daily_reports),
-            'wallet_total_usd': wallet.get('total_usd', 0)
+            'wallet_total_usd': wallet.get('total_usd', 0),
+            'perf': perf,
         }
         
         summary_path = os.path.join(CONFIG['OUTPUT_DIR'], 'summary.json')
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+        write_json_output(summary_path, summary, indent=2)
         
         print(f"\n✅ Update completed successfully!")
         print(f"📊 {summary['trades_count']} trades, {summary['signals_count']} signals")
@@ -1054,8 +3499,251 @@ def main():
         
     except Exception as e:
         print(f"\n❌ Update failed: {e}")
-        import traceback
         traceback.print_exc()
+    finally:
+        save_ingest_state()
+        save_doc_cache()
+        save_manifest(prune=True)
+    return results
+
+class InotifyWatcher:
+    """inotify（ctypes経由、Linuxのみ）でディレクトリを監視する
+
+    まだ存在しない監視対象は、存在する最も近い親ディレクトリを監視しておき、作られた時点で監視を追加する。
+    """
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, roots):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._watches = {}  # wd -> (path, recursive)
+        self._paths = {}  # path -> wd
+        self._roots = dict(roots)
+        self._pending = set(self._roots)  # roots that do not exist (yet)
+        self._sync_pending([])
+
+    def _add(self, path, recursive, changed=None):
+        """path（recursive なら配下も）に監視を追加する。changed が渡されたら、既にあるファイルを追加する
+        （ディレクトリ作成から監視追加までの間に書かれたファイルを取りこぼさないため）"""
+        if not os.path.isdir(path):
+            return False
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            print(f"inotify_add_watch failed for {path}: {os.strerror(ctypes.get_errno())}")
+            return False
+        # Never downgrade a recursive watch when an ancestor of a pending root is the same directory
+        recursive = recursive or self._watches.get(wd, (path, False))[1]
+        self._watches[wd] = (path, recursive)
+        self._paths[path] = wd
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return True
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    self._add(entry.path, True, changed)
+            elif changed is not None:
+                changed.append(entry.path)
+        return True
+
+    def _sync_pending(self, changed):
+        """未作成の監視対象を確認し、できていれば監視を追加、なければ最も近い親ディレクトリを監視する"""
+        for root in sorted(self._pending):
+            if self._add(root, self._roots[root], changed):
+                self._pending.discard(root)
+                continue
+            ancestor = os.path.dirname(root)
+            while ancestor != os.path.dirname(ancestor) and not os.path.isdir(ancestor):
+                ancestor = os.path.dirname(ancestor)
+            if ancestor not in self._paths:
+                self._add(ancestor, False)
+
+    def wait(self, timeout):
+        """変更されたパスのリストを返す。イベントキューが溢れた場合は None（全体を更新）"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        buf = os.read(self._fd, 64 * 1024)
+        changed = []
+        offset = 0
+        sync = False
+        while offset < len(buf):
+            wd, mask, _, name_len = self.EVENT.unpack_from(buf, offset)
+            name = buf[offset + self.EVENT.size:offset + self.EVENT.size + name_len].rstrip(b'\0')
+            offset += self.EVENT.size + name_len
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            if wd not in self._watches:
+                continue
+            dir_path, recursive = self._watches[wd]
+            if mask & self.IN_IGNORED:
+                # The directory was deleted (or moved away); watch for it to come back if it is a root
+                del self._watches[wd]
+                if self._paths.get(dir_path) == wd:
+                    del self._paths[dir_path]
+                if dir_path in self._roots:
+                    self._pending.add(dir_path)
+                sync = True
+                continue
+            path = os.path.join(dir_path, os.fsdecode(name)) if name else dir_path
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                if recursive:
+                    self._add(path, True, changed)
+                elif self._pending:
+                    sync = True
+            changed.append(path)
+        if sync:
+            self._sync_pending(changed)
+        return changed
+
+class PollingWatcher:
+    """inotifyが使えない環境（macOS等）向け: mtime/sizeのスナップショットを定期的に比較する"""
+
+    def __init__(self, roots, interval=None):
+        self._roots = roots
+        self._interval = interval or CONFIG['WATCH_POLL_INTERVAL']
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root, recursive in self._roots:
+            if not os.path.isdir(root):
+                continue
+            if recursive:
+                walker = os.walk(root)
+            else:
+                walker = [(root, [], os.listdir(root))]
+            for dir_path, dir_names, file_names in walker:
+                dir_names[:] = [d for d in dir_names if not d.startswith('.')]
+                for name in file_names:
+                    path = os.path.join(dir_path, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self._interval))
+        current = self._scan()
+        changed = [p for p, sig in current.items() if self._snapshot.get(p) != sig]
+        changed += [p for p in self._snapshot if p not in current]
+        self._snapshot = current
+        return changed
+
+def watch_roots():
+    """監視するディレクトリ: (path, recursive)。ディレクトリの入力は再帰的に、
+    ファイル・globの入力は親ディレクトリだけを監視する（まだ無い入力は両方）"""
+    roots = {}
+    for paths in stage_sources().values():
+        for src in paths:
+            src = os.path.abspath(src)
+            if os.path.isdir(src):
+                roots[src] = True
+                continue
+            if not (os.path.exists(src) or glob.has_magic(src) or os.path.splitext(src)[1]):
+                # A missing extensionless input may be a directory created later; the watcher adds it once it appears
+                roots[src] = True
+            roots.setdefault(os.path.dirname(src), False)
+    return sorted(roots.items())
+
+def make_watcher(force_poll=False):
+    roots = watch_roots()
+    if not force_poll and sys.platform.startswith('linux'):
+        try:
+            watcher = InotifyWatcher(roots)
+            print(f"👀 Watching {len(roots)} locations with inotify")
+            return watcher
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), falling back to polling")
+    print(f"👀 Polling {len(roots)} locations every {CONFIG['WATCH_POLL_INTERVAL']}s")
+    return PollingWatcher(roots)
+
+def watch(force_poll=False, profile_dir=None):
+    """常駐モード: 入力の変更をデバウンスして、影響のあるステージだけを再実行する
+
+    インジェスト状態・マニフェスト・前回のステージ結果はメモリに保持したまま使い回す。
+    日付の境界（シグナルの期間・直近トレード）を進めるため、WATCH_FULL_INTERVAL ごとに全体を更新する。
+    """
+    results = run_update(STAGES, profile_dir=profile_dir)
+    watcher = make_watcher(force_poll)
+    output_dir = os.path.abspath(CONFIG['OUTPUT_DIR'])
+    cache_dir = os.path.abspath(CONFIG['CACHE_DIR'])
+    debounce = CONFIG['WATCH_DEBOUNCE']
+    pending = set()
+    full_refresh = False
+    first_change = last_change = None
+    last_full = time.monotonic()
+    
+    try:
+        while True:
+            changed = watcher.wait(timeout=1.0)
+            now = time.monotonic()
+            if changed is None:
+                full_refresh = True
+                changed = []
+            changed = [p for p in changed if not p.startswith((output_dir + os.sep, cache_dir + os.sep))]
+            if changed or full_refresh:
+                pending.update(changed)
+                first_change = first_change or now
+                last_change = now
+            if now - last_full >= CONFIG['WATCH_FULL_INTERVAL']:
+                full_refresh = True
+                first_change = first_change or now
+                last_change = last_change or now
+            
+            # Wait until changes settle (or have been pending for too long)
+            if first_change is None:
+                continue
+            if now - last_change < debounce and now - first_change < debounce * 5:
+                continue
+            
+            stages = STAGES if full_refresh else stages_for_changes(STAGES, pending)
+            if stages:
+                print(f"\n🔄 {datetime.now().strftime('%H:%M:%S')} {len(pending)} change(s) → "
+                      f"{'full refresh' if full_refresh else ', '.join(s['name'] for s in stages)}")
+                results = run_update(stages, previous=results, profile_dir=profile_dir)
+            if full_refresh:
+                last_full = time.monotonic()
+            pending.clear()
+            full_refresh = False
+            first_change = last_change = None
+    except KeyboardInterrupt:
+        print("\n👋 Watch stopped")
+
+def main(argv=None):
+    """メイン処理"""
+    print("🤖 Clawdia Dashboard Data Updater")
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    args = parse_args(argv)
+    profile_dir = os.path.join(CONFIG['CACHE_DIR'], 'profile') if args.profile or CONFIG['PROFILE'] else None
+    
+    # 出力ディレクトリ作成
+    ensure_output_dir()
+    
+    if args.watch:
+        watch(force_poll=args.poll, profile_dir=profile_dir)
+    else:
+        run_update(STAGES, profile_dir=profile_dir)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()